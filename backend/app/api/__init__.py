@@ -1,3 +1,3 @@
-from . import events, users, votes, search
+from . import events, users, votes, search, export
 
-__all__ = ["events", "users", "votes", "search"]
\ No newline at end of file
+__all__ = ["events", "users", "votes", "search", "export"]
\ No newline at end of file
@@ -2,8 +2,8 @@
 智能分析API端点
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from ..services.simple_db_service import db_service
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
+from ..services.async_db_service import async_db_service
 from ..config import settings
 from pydantic import BaseModel
 from typing import Dict, Any
@@ -11,6 +11,8 @@ from datetime import datetime
 from pathlib import Path
 import json
 
+from ..utils.http_cache import make_etag, conditional
+from ..utils.json_response import json_response
 from ..services.analysis_service import run_news_analysis, get_analysis_result
 
 router = APIRouter()
@@ -39,7 +41,7 @@ async def analyze_event(request: AnalysisRequest, background_tasks: BackgroundTa
         event_id = request.event_id or 999
         # 后端前置校验：关注人数≥10 或已通过管理员审核，否则拒绝启动
         try:
-            event = db_service.get_event_detail(event_id)
+            event = await async_db_service.get_event_detail(event_id, include=())
             interest_count = int(event.get('interest_count') or 0)
             status_val = event.get('status')
             min_interest = int(getattr(settings, 'interest_threshold', 10))
@@ -190,26 +192,42 @@ async def get_final_result(event_id: int):
         if status_file.exists():
             with open(status_file, 'r', encoding='utf-8') as f:
                 status = json.load(f)
+            # 分析报告体积较大，直接序列化返回
             if status.get('result_inline'):
-                return {"success": True, "event_id": event_id, "detailed_result": status['result_inline']}
+                return json_response({"success": True, "event_id": event_id, "detailed_result": status['result_inline']})
             if status.get('result_file') and Path(status['result_file']).exists():
                 with open(status['result_file'], 'r', encoding='utf-8') as rf:
                     detailed = json.load(rf)
-                return {"success": True, "event_id": event_id, "detailed_result": detailed}
+                return json_response({"success": True, "event_id": event_id, "detailed_result": detailed})
         return {"success": False, "event_id": event_id, "error": "result_not_ready"}
     except Exception as e:
         return {"success": False, "event_id": event_id, "error": str(e)}
 
 
 @router.get("/status/{event_id}")
-async def get_analysis_status(event_id: int):
-    """返回后端写入的真实进度状态文件"""
+async def get_analysis_status(event_id: int, request: Request, response: Response):
+    """返回后端写入的真实进度状态文件；文件未变化时返回304，不再读取和解析文件"""
     try:
         status_file = Path(__file__).resolve().parents[2] / 'modules' / 'TruthNews' / 'news_analysis' / f'status_event_{event_id}.json'
-        if status_file.exists():
+        try:
+            file_stat = status_file.stat()
+        except FileNotFoundError:
+            file_stat = None
+
+        if file_stat is not None:
+            # 状态文件的版本：修改时间（纳秒）+ 大小
+            modified_at = datetime.fromtimestamp(file_stat.st_mtime)
+            etag = make_etag("analysis_status", event_id, file_stat.st_mtime_ns, file_stat.st_size)
+            cached_response = conditional(request, response, etag, modified_at)
+            if cached_response is not None:
+                return cached_response
             with open(status_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             return {"success": True, **data}
+
+        cached_response = conditional(request, response, make_etag("analysis_status", event_id, "idle"))
+        if cached_response is not None:
+            return cached_response
         return {"success": True, "status": "idle", "event_id": event_id}
     except Exception as e:
         return {"success": False, "status": "error", "error": str(e), "event_id": event_id}
@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Header, Query
+from fastapi import APIRouter, HTTPException, status, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from ..services.simple_db_service import db_service
+import time
+from ..services.simple_db_service import db_service, EVENT_DETAIL_INCLUDES, VOTE_TREND_BUCKETS, MAX_TREND_BUCKETS
+from ..services.async_db_service import async_db_service
+from ..utils.pagination import next_cursor
+from ..utils.http_cache import make_etag, conditional
+from ..utils.json_response import json_response, dumps
+from ..utils.idempotency import idempotent
+from ..config import settings
+from ..tasks.counter_reconciler import counter_reconciler
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -12,6 +21,13 @@ class EventCreate(BaseModel):
     keywords: str
     creator_id: Optional[int] = None  # 允许前端传递创建者ID
 
+
+def _event_version(event: dict) -> tuple:
+    """事件的版本信息：updated_at精度只到秒，同一秒内的计数变化由计数器本身区分"""
+    return (event["id"], event.get("updated_at"), event.get("status"),
+            event.get("interest_count"), event.get("vote_count"),
+            event.get("support_votes"), event.get("oppose_votes"))
+
 @router.post("/events/", status_code=status.HTTP_201_CREATED)
 async def create_event(event: EventCreate, x_user_id: Optional[str] = Header(None)):
     """创建新事件 - 使用简单数据库服务"""
@@ -36,7 +52,7 @@ async def create_event(event: EventCreate, x_user_id: Optional[str] = Header(Non
 
         print(f"API: 创建事件，创建者ID: {creator_id}")
 
-        result = db_service.create_event(
+        result = await async_db_service.create_event(
             title=event.title,
             description=event.description,
             keywords=event.keywords,
@@ -60,20 +76,38 @@ async def create_event(event: EventCreate, x_user_id: Optional[str] = Header(Non
         )
 
 @router.get("/events/")
-async def get_events(skip: int = 0, limit: int = 10, status: str = None):
-    """获取事件列表 - 使用简单数据库服务"""
+async def get_events(request: Request, response: Response, skip: int = 0, limit: int = 10,
+                     status: str = None, cursor: str = None,
+                     fields: Optional[str] = Query(None, description="逗号分隔的返回字段，如 title,status,vote_count；默认全部")):
+    """获取事件列表 - 使用简单数据库服务
+
+    支持两种分页方式：skip/limit偏移分页（兼容旧版），以及传入上一页返回的
+    next_cursor进行游标分页（深翻页不退化）。
+    传入fields时只查询并返回这些字段（id、created_at、updated_at总会返回），
+    列表页不需要描述、AI总结等大字段时可以明显减少传输量。
+    响应带弱ETag，请求头If-None-Match匹配时返回304。
+    """
     print("=" * 50)
     print("API: 进入get_events函数")
-    print(f"API: 参数 - skip={skip}, limit={limit}, status={status}")
+    print(f"API: 参数 - skip={skip}, limit={limit}, status={status}, cursor={cursor}")
     print("=" * 50)
 
     try:
         # 获取事件列表和总数
-        events = db_service.get_events(skip=skip, limit=limit, status=status)
-        total_count = db_service.get_events_count(status=status)
+        field_list = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        events = await async_db_service.get_events(skip=skip, limit=limit, status=status,
+                                                   cursor=cursor, fields=field_list)
+        total_count = await async_db_service.get_events_count(status=status)
+        cursor_for_next = next_cursor(events, limit)
 
         print(f"API: 从数据库获取了 {len(events)} 个事件，总共 {total_count} 个事件")
 
+        etag = make_etag("events", skip, limit, status, cursor, fields, total_count,
+                         *(_event_version(event) for event in events))
+        cached_response = conditional(request, response, etag)
+        if cached_response is not None:
+            return cached_response
+
         # 转换datetime对象为字符串，确保JSON序列化
         for event in events:
             if event.get('created_at'):
@@ -86,31 +120,83 @@ async def get_events(skip: int = 0, limit: int = 10, status: str = None):
         print(f"API: 返回事件列表，第一个事件: {events[0]['title'] if events else 'None'}")
 
         # 返回包含事件列表和总数的对象
-        return {
+        return json_response({
             "events": events,
             "total": total_count,
             "page": (skip // limit) + 1,
             "pageSize": limit,
-            "totalPages": (total_count + limit - 1) // limit  # 向上取整
-        }
+            "totalPages": (total_count + limit - 1) // limit,  # 向上取整
+            "next_cursor": cursor_for_next
+        }, response)
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"API: 获取事件列表错误: {e}")
         import traceback
         traceback.print_exc()
         return []
 
+# 单次批量获取的事件数量上限
+MAX_BATCH_EVENTS = 100
+
+# 注意：必须注册在 /events/{event_id} 之前，否则"batch"会被当作事件ID
+@router.get("/events/batch")
+async def get_events_batch(ids: str = Query(..., description="逗号分隔的事件ID，如 1,2,3")):
+    """批量获取事件详情，结果按事件ID组织；不存在的ID列在missing中"""
+    try:
+        event_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids必须是逗号分隔的整数")
+
+    if not event_ids:
+        raise HTTPException(status_code=400, detail="请至少提供一个事件ID")
+    if len(event_ids) > MAX_BATCH_EVENTS:
+        raise HTTPException(status_code=400, detail=f"单次最多获取{MAX_BATCH_EVENTS}个事件")
+
+    try:
+        events = await async_db_service.get_events_batch(event_ids)
+        return {
+            "events": events,
+            "missing": [eid for eid in event_ids if eid not in events]
+        }
+    except Exception as e:
+        print(f"批量获取事件错误: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"服务器内部错误: {str(e)}"
+        )
+
 @router.get("/events/{event_id}")
-async def get_event(event_id: int, x_user_id: str = Header(None)):
-    """获取事件详情 - 使用简单数据库服务"""
+async def get_event(event_id: int, request: Request, response: Response, x_user_id: str = Header(None),
+                    include: Optional[str] = Query(None, description="逗号分隔的附带内容：interest,sources，默认全部")):
+    """获取事件详情 - 使用简单数据库服务；请求头If-None-Match与当前版本一致时返回304"""
+    includes = None
+    if include is not None:
+        includes = [item.strip() for item in include.split(",") if item.strip()]
+        unknown = set(includes) - set(EVENT_DETAIL_INCLUDES)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"无效的include值: {', '.join(sorted(unknown))}，可选: {', '.join(EVENT_DETAIL_INCLUDES)}"
+            )
+
     try:
         # 获取用户ID
         current_user_id = int(x_user_id) if x_user_id else None
 
-        event = db_service.get_event_detail(event_id, current_user_id)
+        event = await async_db_service.get_event_detail(event_id, current_user_id, include=includes)
         if not event:
             raise HTTPException(status_code=404, detail="事件不存在")
-        return event
+
+        # 信息源的增加不会更新events.updated_at，单独计入版本
+        source_ids = tuple(src["id"] for src in event.get("information_sources") or ())
+        etag = make_etag("event", _event_version(event), event.get("user_interested"),
+                         include, source_ids)
+        cached_response = conditional(request, response, etag)
+        if cached_response is not None:
+            return cached_response
+        return json_response(event, response)
     except HTTPException:
         raise
     except Exception as e:
@@ -127,35 +213,36 @@ async def update_event(event_id: int, current_user_id: int = 1):
     raise HTTPException(status_code=501, detail="功能暂未实现")
 
 @router.post("/events/{event_id}/interest")
-async def add_interest(event_id: int, x_user_id: str = Header(None)):
-    """对事件表示兴趣"""
-    try:
-        # 获取用户ID
-        current_user_id = int(x_user_id) if x_user_id else 1
-
-        # 检查事件是否存在
-        event = db_service.get_event_detail(event_id)
-        if not event:
-            raise HTTPException(status_code=404, detail="事件不存在")
-
-        # 添加兴趣
-        success = db_service.add_event_interest(event_id, current_user_id)
-
-        if success:
-            # 检查是否达到关注阈值，自动触发AI分析
-            db_service.check_and_update_event_status(event_id)
-            return {"message": "成功表示兴趣"}
-        else:
-            raise HTTPException(status_code=400, detail="您已经对该事件表示过兴趣了")
+async def add_interest(event_id: int, x_user_id: str = Header(None), idempotency_key: Optional[str] = Header(None)):
+    """对事件表示兴趣；请求头带Idempotency-Key时，客户端重试返回第一次请求的响应"""
+    # 获取用户ID
+    current_user_id = int(x_user_id) if x_user_id else 1
+
+    async def handle():
+        try:
+            # 检查事件是否存在
+            event = await async_db_service.get_event_detail(event_id, include=())
+            if not event:
+                raise HTTPException(status_code=404, detail="事件不存在")
+
+            # 添加兴趣，达到关注阈值时在同一个事务中自动转为AI处理
+            interest_count = await async_db_service.add_event_interest(event_id, current_user_id)
+
+            if interest_count is not None:
+                return {"message": "成功表示兴趣", "interest_count": interest_count}
+            else:
+                raise HTTPException(status_code=400, detail="您已经对该事件表示过兴趣了")
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"添加兴趣错误: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"服务器内部错误: {str(e)}"
+            )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"添加兴趣错误: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"服务器内部错误: {str(e)}"
-        )
+    return await idempotent("interest", current_user_id, idempotency_key, (event_id,), handle)
 
 @router.delete("/events/{event_id}/interest")
 async def remove_interest(event_id: int, x_user_id: str = Header(None)):
@@ -165,15 +252,15 @@ async def remove_interest(event_id: int, x_user_id: str = Header(None)):
         current_user_id = int(x_user_id) if x_user_id else 1
 
         # 检查事件是否存在
-        event = db_service.get_event_detail(event_id)
+        event = await async_db_service.get_event_detail(event_id, include=())
         if not event:
             raise HTTPException(status_code=404, detail="事件不存在")
 
         # 移除兴趣
-        success = db_service.remove_event_interest(event_id, current_user_id)
+        interest_count = await async_db_service.remove_event_interest(event_id, current_user_id)
 
-        if success:
-            return {"message": "成功取消兴趣"}
+        if interest_count is not None:
+            return {"message": "成功取消兴趣", "interest_count": interest_count}
         else:
             raise HTTPException(status_code=400, detail="您尚未对该事件表示兴趣")
 
@@ -191,12 +278,12 @@ async def check_interest(event_id: int, current_user_id: int = 1):
     """检查用户是否对事件表示过兴趣"""
     try:
         # 检查事件是否存在
-        event = db_service.get_event_detail(event_id)
+        event = await async_db_service.get_event_detail(event_id, include=())
         if not event:
             raise HTTPException(status_code=404, detail="事件不存在")
 
         # 检查兴趣状态
-        has_interest = db_service.check_user_interest(event_id, current_user_id)
+        has_interest = await async_db_service.check_user_interest(event_id, current_user_id)
 
         return {"has_interest": has_interest}
 
@@ -209,46 +296,83 @@ async def check_interest(event_id: int, current_user_id: int = 1):
             detail=f"服务器内部错误: {str(e)}"
         )
 
-@router.get("/events/{event_id}/votes/stats")
-async def get_event_vote_stats(event_id: int):
-    """获取事件投票统计"""
+@router.get("/events/{event_id}/votes/trend")
+async def get_vote_trend(event_id: int, request: Request, response: Response,
+                         bucket: str = Query("1h", description="时间粒度：1m、1h、1d"),
+                         limit: int = Query(48, ge=1, le=MAX_TREND_BUCKETS, description="返回最近多少个时间段")):
+    """投票趋势 - 读取按分钟汇总的投票数；票数未变化且仍在同一时间段内时返回304"""
+    if bucket not in VOTE_TREND_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket必须是 {', '.join(VOTE_TREND_BUCKETS)} 之一")
+
     try:
-        # 检查事件是否存在
-        event = db_service.get_event_detail(event_id)
+        event = await async_db_service.get_event_detail(event_id, include=())
         if not event:
             raise HTTPException(status_code=404, detail="事件不存在")
 
-        # 获取投票统计
-        stats = db_service.execute_query(
-            """SELECT
-                COUNT(*) as total_votes,
-                SUM(CASE WHEN stance = 'support' THEN 1 ELSE 0 END) as support_votes,
-                SUM(CASE WHEN stance = 'oppose' THEN 1 ELSE 0 END) as oppose_votes
-               FROM votes WHERE event_id = %s""",
-            (event_id,)
-        )
+        # 趋势随票数变化，也随时间窗口滑动变化
+        window = int(time.time() // VOTE_TREND_BUCKETS[bucket][2])
+        etag = make_etag("vote_trend", bucket, limit, window, *_event_version(event))
+        cached_response = conditional(request, response, etag)
+        if cached_response is not None:
+            return cached_response
 
-        if stats:
-            result = stats[0]
-            total = result['total_votes'] or 0
-            support = result['support_votes'] or 0
-            oppose = result['oppose_votes'] or 0
+        points = await async_db_service.get_vote_trend(event_id, bucket=bucket, limit=limit)
+        return {"event_id": event_id, "bucket": bucket, "points": points}
 
-            return {
-                "total_votes": total,
-                "support_votes": support,
-                "oppose_votes": oppose,
-                "support_percentage": (support / total * 100) if total > 0 else 0,
-                "oppose_percentage": (oppose / total * 100) if total > 0 else 0
-            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"获取投票趋势错误: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"服务器内部错误: {str(e)}"
+        )
 
-        return {
-            "total_votes": 0,
-            "support_votes": 0,
-            "oppose_votes": 0,
-            "support_percentage": 0,
-            "oppose_percentage": 0
+@router.get("/events/{event_id}/stream")
+async def stream_event(event_id: int, request: Request):
+    """事件实时更新（Server-Sent Events）
+
+    连接后先推送一次当前计数，之后投票、关注或状态变化时推送 counters 事件
+    （同一事件最多每 EVENT_STREAM_MIN_INTERVAL 秒一次），空闲时定期发送心跳注释。
+    """
+    snapshot = await async_db_service.get_event_counters(event_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="事件不存在")
+
+    subscription = db_service.event_bus.subscribe(event_id)
+
+    def sse(data: dict) -> bytes:
+        return b"event: counters\ndata: " + dumps(data) + b"\n\n"
+
+    async def event_stream():
+        try:
+            yield sse(snapshot)
+            while not await request.is_disconnected():
+                data = await subscription.next(timeout=settings.event_stream_keepalive)
+                yield sse(data) if data is not None else b": keepalive\n\n"
+        finally:
+            db_service.event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # 告诉反向代理不要缓冲，保证每条消息立即送达（GZip中间件在main.py中排除了该路径）
+            "X-Accel-Buffering": "no",
         }
+    )
+
+@router.get("/events/{event_id}/votes/stats")
+async def get_event_vote_stats(event_id: int):
+    """获取事件投票统计 - 读取事件上的冗余计数，last_reconciled_at为最近一次后台对账时间"""
+    try:
+        stats = await async_db_service.get_vote_stats(event_id)
+        if stats is None:
+            raise HTTPException(status_code=404, detail="事件不存在")
+
+        stats["last_reconciled_at"] = await async_db_service.run(counter_reconciler.get_last_reconciled_at)
+        return stats
 
     except HTTPException:
         raise
@@ -263,7 +387,7 @@ async def get_event_vote_stats(event_id: int):
 async def start_ai_processing(event_id: int):
     """开始AI处理"""
     try:
-        success = db_service.start_ai_processing(event_id)
+        success = await async_db_service.start_ai_processing(event_id)
         if success:
             return {"message": "AI处理已开始"}
         else:
@@ -282,7 +406,7 @@ async def complete_ai_processing(
 ):
     """完成AI处理"""
     try:
-        success = db_service.complete_ai_processing(event_id, ai_summary, ai_rating)
+        success = await async_db_service.complete_ai_processing(event_id, ai_summary, ai_rating)
         if success:
             return {"message": "AI处理已完成，进入投票阶段"}
         else:
@@ -298,7 +422,7 @@ async def approve_event(event_id: int):
     """审核通过事件（从pending状态转为nominated）"""
     try:
         # 检查当前状态
-        event = db_service.get_event_detail(event_id)
+        event = await async_db_service.get_event_detail(event_id, include=())
         if not event:
             raise HTTPException(status_code=404, detail="事件不存在")
 
@@ -306,7 +430,7 @@ async def approve_event(event_id: int):
             raise HTTPException(status_code=400, detail=f"事件当前状态为{event['status']}，无法审核")
 
         # 更新状态为nominated
-        success = db_service.update_event_status(event_id, 'nominated')
+        success = await async_db_service.update_event_status(event_id, 'nominated', from_status='pending')
         if success:
             return {"message": "事件审核通过，已进入提名阶段"}
         else:
@@ -328,12 +452,12 @@ async def reset_event_status(event_id: int, new_status: str = Query(...)):
             raise HTTPException(status_code=400, detail=f"无效的状态值，必须是: {', '.join(valid_statuses)}")
 
         # 检查事件是否存在
-        event = db_service.get_event_detail(event_id)
+        event = await async_db_service.get_event_detail(event_id, include=())
         if not event:
             raise HTTPException(status_code=404, detail="事件不存在")
 
         # 更新状态
-        success = db_service.update_event_status(event_id, new_status)
+        success = await async_db_service.update_event_status(event_id, new_status)
         if success:
             return {"message": f"事件状态已重置为: {new_status}"}
         else:
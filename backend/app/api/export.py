@@ -0,0 +1,131 @@
+"""
+数据导出API端点
+以NDJSON（每行一个JSON对象）流式导出投票、事件和信息源，供离线审计使用
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..services.simple_db_service import db_service
+from ..utils.json_response import dumps
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+router = APIRouter()
+
+VALID_STATUSES = ['pending', 'nominated', 'processing', 'voting', 'confirmed']
+
+
+def _ndjson_lines(sql: str, params: tuple) -> Iterator[bytes]:
+    """逐行读取查询结果并编码为NDJSON"""
+    for row in db_service.stream_query(sql, params):
+        yield dumps(row) + b"\n"
+
+
+def _time_range(column: str, since: Optional[datetime], until: Optional[datetime],
+                conditions: List[str], params: List) -> None:
+    """追加 [since, until) 时间范围条件"""
+    if since:
+        conditions.append(f"{column} >= %s")
+        params.append(since)
+    if until:
+        conditions.append(f"{column} < %s")
+        params.append(until)
+
+
+def _ndjson_response(name: str, sql: str, conditions: List[str], params: List,
+                     order_by: str) -> StreamingResponse:
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order_by}"
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.ndjson"
+    return StreamingResponse(
+        _ndjson_lines(sql, tuple(params)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/export/votes")
+async def export_votes(
+    event_id: Optional[int] = None,
+    stance: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="起始时间（含），ISO格式"),
+    until: Optional[datetime] = Query(None, description="截止时间（不含），ISO格式")
+):
+    """流式导出投票记录"""
+    if stance and stance not in ["support", "oppose"]:
+        raise HTTPException(status_code=400, detail="投票立场必须是 'support' 或 'oppose'")
+
+    conditions, params = [], []
+    if event_id is not None:
+        conditions.append("event_id = %s")
+        params.append(event_id)
+    if stance:
+        conditions.append("stance = %s")
+        params.append(stance)
+    _time_range("created_at", since, until, conditions, params)
+
+    return _ndjson_response(
+        "votes",
+        """SELECT id, event_id, user_id, stance, ai_good_points, ai_bad_points,
+                  user_comment, created_at
+           FROM votes""",
+        conditions, params, "id"
+    )
+
+
+@router.get("/export/events")
+async def export_events(
+    status: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="起始时间（含），ISO格式"),
+    until: Optional[datetime] = Query(None, description="截止时间（不含），ISO格式")
+):
+    """流式导出事件"""
+    if status and status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"无效的状态值，必须是: {', '.join(VALID_STATUSES)}")
+
+    conditions, params = [], []
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    _time_range("created_at", since, until, conditions, params)
+
+    return _ndjson_response(
+        "events",
+        """SELECT id, title, description, keywords, status,
+                  interest_count, vote_count, support_votes, oppose_votes,
+                  ai_summary, ai_rating, nomination_deadline, creator_id,
+                  created_at, updated_at
+           FROM events""",
+        conditions, params, "id"
+    )
+
+
+@router.get("/export/sources")
+async def export_sources(
+    event_id: Optional[int] = None,
+    status: Optional[str] = Query(None, description="按所属事件状态过滤"),
+    since: Optional[datetime] = Query(None, description="起始时间（含），ISO格式"),
+    until: Optional[datetime] = Query(None, description="截止时间（不含），ISO格式")
+):
+    """流式导出信息源"""
+    if status and status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"无效的状态值，必须是: {', '.join(VALID_STATUSES)}")
+
+    conditions, params = [], []
+    if event_id is not None:
+        conditions.append("s.event_id = %s")
+        params.append(event_id)
+    if status:
+        conditions.append("e.status = %s")
+        params.append(status)
+    _time_range("s.created_at", since, until, conditions, params)
+
+    return _ndjson_response(
+        "sources",
+        """SELECT s.id, s.event_id, s.url, s.title, s.website_name, s.content,
+                  s.ai_summary, s.relevance_score, s.created_at
+           FROM information_sources s
+           JOIN events e ON s.event_id = e.id""",
+        conditions, params, "s.id"
+    )
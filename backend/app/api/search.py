@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 from ..services.simple_db_service import db_service
+from ..services.async_db_service import async_db_service
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -11,33 +12,10 @@ class SearchQuery(BaseModel):
     event_id: int = None
 
 @router.get("/search/")
-async def search_events(q: str = "", limit: int = 10):
-    """搜索事件 - 使用简单数据库服务"""
+async def search_events(q: str = "", limit: int = 10, status: str = None):
+    """搜索事件 - 优先使用进程内倒排索引，可按状态过滤"""
     try:
-        if not q:
-            # 如果没有查询词，返回最新的事件
-            events = db_service.execute_query(
-                """SELECT e.id, e.title, e.description, e.keywords, e.status, 
-                          e.created_at, u.username, u.nickname
-                   FROM events e
-                   LEFT JOIN users u ON e.creator_id = u.id
-                   ORDER BY e.created_at DESC
-                   LIMIT %s""",
-                (limit,)
-            )
-        else:
-            # 在标题、描述和关键词中搜索
-            search_term = f"%{q}%"
-            events = db_service.execute_query(
-                """SELECT e.id, e.title, e.description, e.keywords, e.status, 
-                          e.created_at, u.username, u.nickname
-                   FROM events e
-                   LEFT JOIN users u ON e.creator_id = u.id
-                   WHERE e.title LIKE %s OR e.description LIKE %s OR e.keywords LIKE %s
-                   ORDER BY e.created_at DESC
-                   LIMIT %s""",
-                (search_term, search_term, search_term, limit)
-            )
+        events = await async_db_service.search_events(q, limit, status)
         
         return {
             "query": q,
@@ -53,11 +31,22 @@ async def search_events(q: str = "", limit: int = 10):
             "total": 0
         }
 
+MAX_SUGGESTIONS = 20
+
+@router.get("/search/suggest")
+async def suggest(prefix: str = "", limit: int = 10):
+    """搜索框联想词 - 内存前缀索引，不访问数据库"""
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    return {
+        "prefix": prefix,
+        "suggestions": db_service.suggest_events(prefix, limit)
+    }
+
 @router.get("/search/sources/{event_id}")
 async def get_information_sources(event_id: int):
     """获取事件的信息源 - 使用简单数据库服务"""
     try:
-        sources = db_service.execute_query(
+        sources = await async_db_service.execute_query(
             """SELECT id, url, title, website_name, content,
                       ai_summary, relevance_score, created_at
                FROM information_sources
@@ -74,7 +63,7 @@ async def get_information_sources(event_id: int):
 async def add_information_source(event_id: int, title: str, url: str, website_name: str = None):
     """添加信息源 - 使用简单数据库服务"""
     try:
-        source_id = db_service.execute_update(
+        source_id = await async_db_service.execute_update(
             """INSERT INTO information_sources
                (event_id, url, title, website_name, created_at)
                VALUES (%s, %s, %s, %s, NOW())""",
@@ -82,6 +71,8 @@ async def add_information_source(event_id: int, title: str, url: str, website_na
         )
         
         if source_id:
+            # 事件详情中附带信息源
+            db_service.invalidate_event_cache(event_id)
             return {"message": "信息源添加成功", "source_id": source_id}
         else:
             raise HTTPException(status_code=500, detail="添加信息源失败")
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
 from typing import List
-from ..services.simple_db_service import db_service
+from ..services.async_db_service import async_db_service
+from ..utils.pagination import next_cursor
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -33,7 +34,7 @@ async def create_user(user: UserCreate):
     """创建新用户 - 使用简单数据库服务"""
     try:
         # 检查用户名是否已存在
-        existing_users = db_service.execute_query(
+        existing_users = await async_db_service.execute_query(
             "SELECT id FROM users WHERE username = %s OR email = %s",
             (user.username, user.email)
         )
@@ -45,7 +46,7 @@ async def create_user(user: UserCreate):
             )
         
         # 创建用户
-        user_id = db_service.execute_update(
+        user_id = await async_db_service.execute_update(
             """INSERT INTO users (username, email, password, nickname, role, created_at)
                VALUES (%s, %s, %s, %s, 'user', NOW())""",
             (user.username, user.email, user.password, user.nickname or user.username)
@@ -53,7 +54,7 @@ async def create_user(user: UserCreate):
         
         if user_id:
             # 获取创建的用户信息
-            new_user = db_service.execute_query(
+            new_user = await async_db_service.execute_query(
                 "SELECT id, username, email, nickname, role FROM users WHERE username = %s",
                 (user.username,)
             )
@@ -75,14 +76,19 @@ async def create_user(user: UserCreate):
         )
 
 @router.get("/users/")
-async def get_users(skip: int = 0, limit: int = 10):
-    """获取用户列表 - 使用简单数据库服务"""
+async def get_users(response: Response, skip: int = 0, limit: int = 10, cursor: str = None):
+    """获取用户列表 - 使用简单数据库服务
+
+    传入cursor时使用游标分页，下一页游标通过响应头X-Next-Cursor返回。
+    """
     try:
-        users = db_service.execute_query(
-            "SELECT id, username, email, nickname, role, created_at FROM users ORDER BY created_at DESC LIMIT %s OFFSET %s",
-            (limit, skip)
-        )
+        users = await async_db_service.get_users(skip=skip, limit=limit, cursor=cursor)
+        cursor_for_next = next_cursor(users, limit)
+        if cursor_for_next:
+            response.headers["X-Next-Cursor"] = cursor_for_next
         return users
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"获取用户列表错误: {e}")
         return []
@@ -91,7 +97,7 @@ async def get_users(skip: int = 0, limit: int = 10):
 async def get_user(user_id: int):
     """获取用户详情 - 使用简单数据库服务"""
     try:
-        users = db_service.execute_query(
+        users = await async_db_service.execute_query(
             "SELECT id, username, email, nickname, role, created_at FROM users WHERE id = %s",
             (user_id,)
         )
@@ -117,7 +123,7 @@ async def login(payload: LoginRequest):
     返回字段需包含 id/username/email/nickname/role，前端将其缓存为 currentUser。
     """
     try:
-        users = db_service.execute_query(
+        users = await async_db_service.execute_query(
             "SELECT id, username, email, nickname, role, password FROM users WHERE username = %s",
             (payload.username,)
         )
@@ -148,7 +154,7 @@ async def update_user(user_id: int, user_update: UserUpdate):
     """更新用户信息"""
     try:
         # 检查用户是否存在
-        existing_user = db_service.execute_query(
+        existing_user = await async_db_service.execute_query(
             "SELECT id, username, email, nickname, bio FROM users WHERE id = %s",
             (user_id,)
         )
@@ -166,7 +172,7 @@ async def update_user(user_id: int, user_update: UserUpdate):
 
         if user_update.email is not None:
             # 检查邮箱是否已被其他用户使用
-            email_check = db_service.execute_query(
+            email_check = await async_db_service.execute_query(
                 "SELECT id FROM users WHERE email = %s AND id != %s",
                 (user_update.email, user_id)
             )
@@ -187,11 +193,11 @@ async def update_user(user_id: int, user_update: UserUpdate):
         update_values.append(user_id)
         update_sql = f"UPDATE users SET {', '.join(update_fields)}, updated_at = NOW() WHERE id = %s"
 
-        result = db_service.execute_update(update_sql, tuple(update_values))
+        result = await async_db_service.execute_update(update_sql, tuple(update_values))
 
         if result:
             # 返回更新后的用户信息
-            updated_user = db_service.execute_query(
+            updated_user = await async_db_service.execute_query(
                 "SELECT id, username, email, nickname, role, bio, created_at, updated_at FROM users WHERE id = %s",
                 (user_id,)
             )
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from ..services.simple_db_service import db_service
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from typing import List, Optional
+from ..services.simple_db_service import MAX_BULK_VOTES
+from ..services.async_db_service import async_db_service
+from ..utils.pagination import next_cursor
+from ..utils.http_cache import make_etag, conditional
+from ..utils.idempotency import idempotent
+from ..tasks.counter_reconciler import counter_reconciler
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -11,124 +16,125 @@ class VoteCreate(BaseModel):
     stance: str  # "support" 或 "oppose"
     user_comment: str = None
 
+class BulkVoteItem(BaseModel):
+    event_id: int
+    user_id: int
+    stance: str  # "support" 或 "oppose"
+    user_comment: Optional[str] = None
+
+class BulkVoteRequest(BaseModel):
+    votes: List[BulkVoteItem]
+
 @router.post("/votes/", status_code=status.HTTP_201_CREATED)
-async def create_vote(vote: VoteCreate, x_user_id: str = "1"):
-    """投票 - 使用简单数据库服务"""
-    try:
-        # 获取用户ID
-        current_user_id = int(x_user_id) if x_user_id else 1
+async def create_vote(vote: VoteCreate, x_user_id: str = "1", idempotency_key: Optional[str] = Header(None)):
+    """投票 - 使用简单数据库服务
+
+    请求头带Idempotency-Key时，客户端重试返回第一次请求的响应，不会重复投票。
+    """
+    # 获取用户ID
+    current_user_id = int(x_user_id) if x_user_id else 1
+
+    async def handle():
+        try:
+            # 验证stance值
+            if vote.stance not in ["support", "oppose"]:
+                raise HTTPException(
+                    status_code=400,
+                    detail="投票立场必须是 'support' 或 'oppose'"
+                )
 
-        # 验证stance值
-        if vote.stance not in ["support", "oppose"]:
-            raise HTTPException(
-                status_code=400,
-                detail="投票立场必须是 'support' 或 'oppose'"
+            # 投票、计数更新与阈值检查在同一个事务中完成
+            vote_id = await async_db_service.create_vote(
+                vote.event_id, current_user_id, vote.stance, vote.user_comment
             )
 
-        # 检查是否已经投票
-        existing_votes = db_service.execute_query(
-            "SELECT id FROM votes WHERE event_id = %s AND user_id = %s",
-            (vote.event_id, current_user_id)
-        )
-        
-        if existing_votes:
+            if vote_id is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="您已经对该事件投过票了"
+                )
+
+            return {"message": "投票成功", "vote_id": vote_id}
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"投票错误: {e}")
             raise HTTPException(
-                status_code=400,
-                detail="您已经对该事件投过票了"
+                status_code=500,
+                detail=f"服务器内部错误: {str(e)}"
             )
-        
-        # 创建投票
-        vote_id = db_service.execute_update(
-            """INSERT INTO votes (event_id, user_id, stance, user_comment, created_at)
-               VALUES (%s, %s, %s, %s, NOW())""",
-            (vote.event_id, current_user_id, vote.stance, vote.user_comment)
-        )
-        
-        if vote_id:
-            # 更新事件的投票统计
-            if vote.stance == "support":
-                db_service.execute_update(
-                    "UPDATE events SET vote_count = vote_count + 1, support_votes = support_votes + 1 WHERE id = %s",
-                    (vote.event_id,)
-                )
-            else:
-                db_service.execute_update(
-                    "UPDATE events SET vote_count = vote_count + 1, oppose_votes = oppose_votes + 1 WHERE id = %s",
-                    (vote.event_id,)
-                )
 
-            # 检查是否达到投票阈值，自动转换状态
-            db_service.check_and_update_event_status(vote.event_id)
+    return await idempotent("vote", current_user_id, idempotency_key,
+                            (vote.event_id, vote.stance, vote.user_comment), handle,
+                            status_code=status.HTTP_201_CREATED)
 
-            return {"message": "投票成功", "vote_id": vote_id}
-        
-        raise HTTPException(
-            status_code=500,
-            detail="投票失败"
-        )
-        
-    except HTTPException:
-        raise
+@router.post("/votes/bulk")
+async def create_votes_bulk(request: BulkVoteRequest):
+    """批量投票 - 供合作方接入和压测脚本使用，整批在一个事务中写入
+
+    返回每一项的处理结果：accepted（已写入）、duplicate（已投过或本批重复）、invalid（参数无效）。
+    """
+    if not request.votes:
+        raise HTTPException(status_code=400, detail="votes不能为空")
+    if len(request.votes) > MAX_BULK_VOTES:
+        raise HTTPException(status_code=400, detail=f"单次最多提交{MAX_BULK_VOTES}票")
+
+    try:
+        results = await async_db_service.create_votes_bulk([vote.model_dump() for vote in request.votes])
     except Exception as e:
-        print(f"投票错误: {e}")
+        print(f"批量投票错误: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"服务器内部错误: {str(e)}"
         )
 
+    summary = {"accepted": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    return {**summary, "results": results}
+
 @router.get("/votes/event/{event_id}")
-async def get_event_votes(event_id: int, skip: int = 0, limit: int = 10):
-    """获取事件的投票列表 - 使用简单数据库服务"""
+async def get_event_votes(event_id: int, response: Response, skip: int = 0, limit: int = 10,
+                          cursor: str = None):
+    """获取事件的投票列表 - 使用简单数据库服务
+
+    传入cursor时使用游标分页，下一页游标通过响应头X-Next-Cursor返回。
+    """
     try:
-        votes = db_service.execute_query(
-            """SELECT v.id, v.user_id, v.stance, v.user_comment, v.created_at,
-                      u.username, u.nickname
-               FROM votes v
-               LEFT JOIN users u ON v.user_id = u.id
-               WHERE v.event_id = %s
-               ORDER BY v.created_at DESC
-               LIMIT %s OFFSET %s""",
-            (event_id, limit, skip)
-        )
+        votes = await async_db_service.get_event_votes(event_id, skip=skip, limit=limit, cursor=cursor)
+        cursor_for_next = next_cursor(votes, limit)
+        if cursor_for_next:
+            response.headers["X-Next-Cursor"] = cursor_for_next
         return votes
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"获取投票列表错误: {e}")
         return []
 
 @router.get("/votes/stats/{event_id}")
-async def get_vote_stats(event_id: int):
-    """获取事件投票统计 - 使用简单数据库服务"""
+async def get_vote_stats(event_id: int, request: Request, response: Response):
+    """获取事件投票统计 - 读取事件上的冗余计数；票数未变化时返回304"""
     try:
-        stats = db_service.execute_query(
-            """SELECT 
-                COUNT(*) as total_votes,
-                SUM(CASE WHEN stance = 'support' THEN 1 ELSE 0 END) as support_votes,
-                SUM(CASE WHEN stance = 'oppose' THEN 1 ELSE 0 END) as oppose_votes
-               FROM votes WHERE event_id = %s""",
-            (event_id,)
-        )
-        
-        if stats:
-            result = stats[0]
-            total = result['total_votes'] or 0
-            support = result['support_votes'] or 0
-            oppose = result['oppose_votes'] or 0
-            
-            return {
-                "total_votes": total,
-                "support_votes": support,
-                "oppose_votes": oppose,
-                "support_percentage": (support / total * 100) if total > 0 else 0,
-                "oppose_percentage": (oppose / total * 100) if total > 0 else 0
+        stats = await async_db_service.get_vote_stats(event_id)
+        if stats is None:
+            stats = {
+                "total_votes": 0,
+                "support_votes": 0,
+                "oppose_votes": 0,
+                "support_percentage": 0,
+                "oppose_percentage": 0
             }
-        
-        return {
-            "total_votes": 0,
-            "support_votes": 0,
-            "oppose_votes": 0,
-            "support_percentage": 0,
-            "oppose_percentage": 0
-        }
+        stats["last_reconciled_at"] = await async_db_service.run(counter_reconciler.get_last_reconciled_at)
+
+        # 只按票数生成：对账时间变化不代表票数变化，不需要让客户端重新下载
+        etag = make_etag("vote_stats", event_id, stats["total_votes"], stats["support_votes"],
+                         stats["oppose_votes"])
+        cached_response = conditional(request, response, etag)
+        if cached_response is not None:
+            return cached_response
+        return stats
         
     except Exception as e:
         print(f"获取投票统计错误: {e}")
@@ -140,55 +146,16 @@ async def get_vote_stats(event_id: int):
 # 删除投票API
 @router.delete("/votes/{vote_id}")
 async def delete_vote(vote_id: int, current_user_id: int = 1):
-    """删除投票"""
+    """删除投票 - 投票记录、计数与投票趋势在同一个事务中扣减"""
     try:
-        # 检查投票是否存在且属于当前用户
-        existing_vote = db_service.execute_query(
-            "SELECT id, event_id, stance FROM votes WHERE id = %s AND user_id = %s",
-            (vote_id, current_user_id)
-        )
-
-        if not existing_vote:
+        event_id = await async_db_service.delete_vote(vote_id, current_user_id)
+        if event_id is None:
             raise HTTPException(
                 status_code=404,
                 detail="投票不存在或您无权删除此投票"
             )
 
-        vote = existing_vote[0]
-        event_id = vote['event_id']
-        stance = vote['stance']
-
-        # 删除投票
-        success = db_service.execute_update(
-            "DELETE FROM votes WHERE id = %s",
-            (vote_id,)
-        )
-
-        if success:
-            # 更新事件的投票统计
-            if stance == "support":
-                db_service.execute_update(
-                    "UPDATE events SET vote_count = vote_count - 1, support_votes = support_votes - 1 WHERE id = %s",
-                    (event_id,)
-                )
-            else:
-                db_service.execute_update(
-                    "UPDATE events SET vote_count = vote_count - 1, oppose_votes = oppose_votes - 1 WHERE id = %s",
-                    (event_id,)
-                )
-
-            # 更新用户统计
-            db_service.execute_update(
-                "UPDATE users SET votes_cast = votes_cast - 1 WHERE id = %s",
-                (current_user_id,)
-            )
-
-            return {"message": "投票已删除"}
-
-        raise HTTPException(
-            status_code=500,
-            detail="删除投票失败"
-        )
+        return {"message": "投票已删除"}
 
     except HTTPException:
         raise
@@ -1,13 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .config import settings
 # 使用新的pymysql API模块
-from .api import events, users, votes, search, analysis
+from .api import events, users, votes, search, analysis, export
+from .services.simple_db_service import db_service
+from .services.async_db_service import async_db_service
+from .utils.json_response import FastJSONResponse
+from .utils.compression import SelectiveGZipMiddleware
+from .tasks.counter_reconciler import counter_reconciler
+from .tasks.search_index_refresher import search_index_refresher
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.version,
-    description="真相之镜 - 基于AI和众包验证的事件真相验证平台（使用pymysql）"
+    description="真相之镜 - 基于AI和众包验证的事件真相验证平台（使用pymysql）",
+    default_response_class=FastJSONResponse
 )
 
 # 添加CORS中间件
@@ -20,12 +28,45 @@ app.add_middleware(
     expose_headers=["*"],  # 允许前端访问所有响应头
 )
 
+# 响应体较大（事件列表、分析报告）时压缩传输；流式导出和实时推送不经过压缩，避免被缓冲
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compress_level,
+    exclude_paths=[r"^/api/v1/export/", r"^/api/v1/events/\d+/stream$"]
+)
+
 # 包含API路由 - 全部使用pymysql
 app.include_router(events.router, prefix="/api/v1", tags=["events"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(votes.router, prefix="/api/v1", tags=["votes"])
 app.include_router(search.router, prefix="/api/v1", tags=["search"])
 app.include_router(analysis.router, prefix="/api/v1/analysis", tags=["analysis"])
+app.include_router(export.router, prefix="/api/v1", tags=["export"])
+
+@app.on_event("startup")
+async def startup():
+    """构建进程内搜索索引与联想词索引，启动计数器对账与搜索索引刷新任务"""
+    stats = await async_db_service.build_search_index()
+    if stats:
+        print(f"搜索索引构建完成: {stats['documents']} 个事件, {stats['terms']} 个词条, "
+              f"约 {stats['memory_bytes'] / 1024 / 1024:.1f} MB, 耗时 {stats['build_ms']} ms")
+    stats = await async_db_service.build_suggest_index()
+    if stats:
+        print(f"联想词索引构建完成: {stats['entries']} 个条目, 耗时 {stats['build_ms']} ms")
+    counter_reconciler.start()
+    search_index_refresher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """停止后台任务，释放数据库线程池与连接池"""
+    counter_reconciler.stop()
+    search_index_refresher.stop()
+    async_db_service.shutdown()
+    # 等进行中的投票结束后，在关闭连接池前写回缓冲中尚未落库的投票计数
+    if db_service.vote_buffer is not None:
+        db_service.vote_buffer.stop()
+    db_service.close()
 
 @app.get("/")
 async def root():
@@ -37,7 +78,40 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "db_pool": db_service.pool_stats(),
+        "db_batch_pool": db_service.batch_pool_stats(),
+        "counter_reconciler": counter_reconciler.last_report,
+        "vote_buffer": db_service.vote_buffer.stats() if db_service.vote_buffer is not None else None,
+        "event_stream": db_service.event_bus.stats(),
+        "idempotency": db_service.idempotency_store.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus格式的运行指标：SQL语句统计、连接池与读缓存状态"""
+    lines = [db_service.sql_metrics.prometheus()]
+    lines.append("# HELP truthmirror_db_pool Database connection pool state")
+    lines.append("# TYPE truthmirror_db_pool gauge")
+    for key, value in db_service.pool_stats().items():
+        lines.append(f'truthmirror_db_pool{{stat="{key}"}} {value}')
+    lines.append("# HELP truthmirror_read_cache Read cache hits, misses and size")
+    lines.append("# TYPE truthmirror_read_cache gauge")
+    for cache in (db_service.event_list_cache, db_service.event_detail_cache):
+        for key, value in cache.stats().items():
+            if key != "name":
+                lines.append(f'truthmirror_read_cache{{cache="{cache.name}",stat="{key}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+@app.get("/metrics/sql")
+async def sql_metrics(limit: int = 20):
+    """按累计耗时排序的热点SQL语句"""
+    return {
+        "slow_query_ms": db_service.sql_metrics.slow_query_ms,
+        "slow_queries": db_service.sql_metrics.slow_queries,
+        "statements": db_service.sql_metrics.snapshot(limit)
+    }
 
 if __name__ == "__main__":
     import uvicorn
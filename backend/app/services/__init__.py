@@ -1,3 +1,9 @@
 from .simple_db_service import SimpleDBService, db_service
+from .async_db_service import AsyncDBService, async_db_service
+from .db_pool import ConnectionPool, PoolTimeoutError
 
-__all__ = ["SimpleDBService", "db_service"]
\ No newline at end of file
+__all__ = [
+    "SimpleDBService", "db_service",
+    "AsyncDBService", "async_db_service",
+    "ConnectionPool", "PoolTimeoutError"
+]
\ No newline at end of file
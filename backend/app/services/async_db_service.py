@@ -0,0 +1,68 @@
+"""
+异步数据库服务
+在专用线程池中执行SimpleDBService的方法，避免pymysql的同步IO阻塞FastAPI事件循环
+"""
+
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from ..config import settings
+from .simple_db_service import SimpleDBService, db_service
+
+
+# 不能通过线程池代理的SimpleDBService方法：
+# - transaction 是上下文管理器，事务的各条语句必须在同一个线程、同一条连接上执行
+# - stream_query 是生成器，迭代期间独占一条连接，应在同一个线程中迭代完（如StreamingResponse的同步迭代）
+# - connect/close 管理连接池的生命周期，只在启动和退出时调用
+# 其余生成器函数和以下划线开头的内部方法同样不代理
+ASYNC_DENY = frozenset({"transaction", "stream_query", "connect", "close"})
+
+
+class AsyncDBService:
+    """SimpleDBService公开方法的异步包装：`await async_db_service.get_events(...)`
+
+    除ASYNC_DENY中的方法和生成器外，SimpleDBService的公开方法都可以这样调用；
+    纯内存操作（如suggest_events）也会进入线程池，只是没有必要，可直接使用db_service。
+    线程数与连接池上限一致，保证并发的数据库调用数有界，不会在连接池上排长队。
+    """
+
+    def __init__(self, service: SimpleDBService, max_workers: int = None):
+        self.service = service
+        self.max_workers = max_workers or settings.db_pool_max_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="db"
+        )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在数据库线程池中执行任意同步函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name in ASYNC_DENY:
+            raise AttributeError(f"AsyncDBService不代理 {name}，请直接使用db_service")
+        attr = getattr(self.service, name)
+        if not callable(attr):
+            raise AttributeError(f"{name} 不是SimpleDBService的方法，请直接使用db_service.{name}")
+        if inspect.isgeneratorfunction(attr) or inspect.isgeneratorfunction(getattr(attr, "__wrapped__", None)):
+            raise AttributeError(f"{name} 是生成器或上下文管理器，不能在线程池中代理，请直接使用db_service")
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return wrapper
+
+    def shutdown(self):
+        """关闭线程池（应用退出时调用）"""
+        self._executor.shutdown(wait=True)
+
+
+# 创建全局异步数据库服务实例
+async_db_service = AsyncDBService(db_service)
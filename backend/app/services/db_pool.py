@@ -0,0 +1,242 @@
+"""
+线程安全的pymysql连接池
+为SimpleDBService提供有界的连接借出/归还、空闲回收以及连接池饱和度统计
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+
+class PoolTimeoutError(Exception):
+    """连接池耗尽且在等待时间内没有可用连接"""
+
+
+class ConnectionPool:
+    """有界连接池：最少保持min_size个空闲连接，最多同时借出max_size个连接"""
+
+    def __init__(self, creator: Callable[[], Any], min_size: int = 2, max_size: int = 20,
+                 idle_timeout: float = 300, checkout_timeout: float = 10,
+                 validate: Callable[[Any], None] = None, validate_after: float = 30):
+        if max_size < 1:
+            raise ValueError("max_size必须大于0")
+        self._creator = creator
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        # 连接空闲超过validate_after秒后，借出前调用validate检查存活（失败时抛异常）
+        self._validate = validate
+        self.validate_after = validate_after
+
+        # 空闲连接栈：(连接, 最后归还时间)，后进先出，让热连接优先被复用
+        self._idle = deque()
+        self._size = 0  # 已创建且未关闭的连接数（空闲+借出）
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+
+        # 统计信息
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._evicted = 0
+        self._validations = 0
+        self._invalid = 0
+        self._peak_in_use = 0
+
+    # ===== 借出/归还 =====
+
+    def checkout(self, timeout: float = None):
+        """借出一个连接，连接池已满时最多等待timeout秒
+
+        只有空闲较久的连接才会在借出前做一次存活检查，热连接直接复用，不产生额外往返。
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        while True:
+            conn, idle_for = self._checkout(timeout)
+            if self._validate is None or idle_for < self.validate_after:
+                return conn
+            try:
+                self._validate(conn)
+                with self._cond:
+                    self._validations += 1
+                return conn
+            except Exception:
+                with self._cond:
+                    self._validations += 1
+                    self._invalid += 1
+                self.checkin(conn, discard=True)
+
+    def _checkout(self, timeout: float):
+        """借出连接，返回(连接, 已空闲秒数)；新建的连接空闲时间为0"""
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = None
+        # 回收的空闲连接在释放锁之后再关闭，关闭时的网络I/O不阻塞其他线程借出连接
+        evicted = []
+
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("连接池已关闭")
+
+                    evicted.extend(self._evict_idle_locked())
+
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        self._on_checkout_locked(waited, wait_started)
+                        return conn, time.monotonic() - last_used
+
+                    if self._size < self.max_size:
+                        # 先占位再在锁外建立连接，避免建连阻塞其他线程
+                        self._size += 1
+                        break
+
+                    # 连接池已饱和，等待其他线程归还
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(f"等待数据库连接超时（{timeout}秒，最大连接数{self.max_size}）")
+                    self._cond.wait(remaining)
+        finally:
+            for stale in evicted:
+                self._close_quietly(stale)
+
+        try:
+            conn = self._creator()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created += 1
+            self._on_checkout_locked(waited, wait_started)
+        return conn, 0.0
+
+    def checkin(self, conn, discard: bool = False):
+        """归还连接；discard=True表示连接已损坏，直接关闭而不放回池中"""
+        with self._cond:
+            close = discard or self._closed
+            if close:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if close:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """以上下文管理器方式借用连接，出现异常时丢弃该连接"""
+        conn = self.checkout()
+        try:
+            yield conn
+        except Exception:
+            self.checkin(conn, discard=True)
+            raise
+        else:
+            self.checkin(conn)
+
+    def fill(self) -> int:
+        """预先建立min_size个空闲连接，返回当前空闲连接数"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return len(self._idle)
+                self._size += 1
+            try:
+                conn = self._creator()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._created += 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close(self):
+        """关闭所有空闲连接；借出中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def reopen(self):
+        """close()之后重新启用连接池"""
+        with self._cond:
+            self._closed = False
+
+    # ===== 统计 =====
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池状态与饱和度统计"""
+        with self._cond:
+            idle = len(self._idle)
+            in_use = self._size - idle
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": in_use,
+                "peak_in_use": self._peak_in_use,
+                "saturation": round(in_use / self.max_size, 4),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "evicted": self._evicted,
+                "validations": self._validations,
+                "invalid": self._invalid,
+            }
+
+    # ===== 内部方法（调用方需持有锁） =====
+
+    def _on_checkout_locked(self, waited: bool, wait_started: float):
+        self._checkouts += 1
+        if waited:
+            self._waits += 1
+            self._wait_time_total += time.monotonic() - wait_started
+        in_use = self._size - len(self._idle)
+        if in_use > self._peak_in_use:
+            self._peak_in_use = in_use
+
+    def _evict_idle_locked(self) -> list:
+        """从空闲栈中移除空闲过久的连接（保留min_size个），返回这些连接，由调用方在锁外关闭"""
+        evicted = []
+        if not self._idle or self.idle_timeout <= 0:
+            return evicted
+        now = time.monotonic()
+        # 最旧的空闲连接位于队首
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            evicted.append(conn)
+        return evicted
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,128 @@
+"""
+事件实时更新的进程内发布/订阅
+投票、关注等写操作（在线程池中执行）调用publish(event_id)只做标记；
+同一事件在min_interval秒内最多推送一次，推送时读取一次最新计数，再分发给该事件的所有订阅者，
+N个观看者共享一次读取，不再各自轮询数据库
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+# 读取事件最新计数快照的函数，事件不存在时返回None
+Loader = Callable[[int], Optional[Dict[str, Any]]]
+
+
+class Subscription:
+    """单个订阅者：只保留最新一份数据，消费慢的客户端会跳过中间状态"""
+
+    def __init__(self, event_id: int):
+        self.event_id = event_id
+        self._latest: Optional[Dict[str, Any]] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, data: Dict[str, Any]):
+        self._latest = data
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """等待下一份数据，超时返回None（调用方据此发送心跳）"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        data, self._latest = self._latest, None
+        return data
+
+
+class EventBus:
+    """按事件合并推送的发布/订阅"""
+
+    def __init__(self, loader: Loader, min_interval: float = 0.25):
+        # loader(event_id) 读取事件最新的计数快照（阻塞调用，在线程池中执行）
+        self._loader = loader
+        self.min_interval = min_interval
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._scheduled: Set[int] = set()
+        self._last_push: Dict[int, float] = {}
+        # 进行中的推送任务：事件循环只弱引用任务，不保留引用的任务可能在完成前被回收
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.published = 0
+        self.pushes = 0
+
+    def subscribe(self, event_id: int) -> Subscription:
+        """在事件循环中调用，订阅某个事件的更新"""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(event_id)
+        with self._lock:
+            self._subscribers.setdefault(event_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.event_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.event_id]
+                    self._last_push.pop(subscription.event_id, None)
+
+    def has_subscribers(self, event_id: int) -> bool:
+        with self._lock:
+            return event_id in self._subscribers
+
+    def publish(self, event_id: int):
+        """事件数据发生变化；可在任意线程调用"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self.has_subscribers(event_id):
+            return
+        with self._lock:
+            self.published += 1
+        loop.call_soon_threadsafe(self._schedule, event_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "events": len(self._subscribers),
+                "subscribers": sum(len(subs) for subs in self._subscribers.values()),
+                "published": self.published,
+                "pushes": self.pushes,
+            }
+
+    def _schedule(self, event_id: int):
+        # 已有待执行的推送时直接合并
+        if event_id in self._scheduled:
+            return
+        self._scheduled.add(event_id)
+        delay = max(0.0, self._last_push.get(event_id, 0.0) + self.min_interval - time.monotonic())
+        self._loop.call_later(delay, self._start_push, event_id)
+
+    def _start_push(self, event_id: int):
+        task = asyncio.ensure_future(self._push(event_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _push(self, event_id: int):
+        # 先移出待推送集合：读取期间的新变化会再安排一次推送
+        self._scheduled.discard(event_id)
+        if not self.has_subscribers(event_id):
+            return
+        self._last_push[event_id] = time.monotonic()
+        try:
+            data = await self._loop.run_in_executor(None, self._loader, event_id)
+        except Exception as e:
+            print(f"读取事件 {event_id} 实时数据失败: {e}")
+            return
+        if data is None:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(event_id, ()))
+        for subscription in subscribers:
+            subscription.offer(data)
+        self.pushes += 1
@@ -0,0 +1,117 @@
+"""
+事件数量缓存
+按状态保存事件数量，创建事件和状态流转时增量维护，并定期从数据库重新统计对账，
+事件列表分页不再每次都对events表执行COUNT(*)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 对账失败后至少等待的秒数，期间返回上次的数量，数据库故障时不会每次读取都再查一次
+RECONCILE_RETRY_SECONDS = 5
+
+
+class EventCountCache:
+    """进程内按状态维护的事件数量"""
+
+    def __init__(self, loader: Callable[[], Dict[str, int]], reconcile_interval: float = 60):
+        # loader返回 {状态: 数量}，失败时抛出异常
+        self._loader = loader
+        self.reconcile_interval = reconcile_interval
+        self._counts: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        self._dirty = True
+        # 上次对账失败后，在此之前（monotonic时间）不再重试
+        self._retry_after = 0.0
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.reconciles = 0
+        self.drift_corrected = 0
+
+    def get(self, status: str = None) -> int:
+        """获取事件数量，status为空时返回总数"""
+        if self._needs_reconcile():
+            self.reconcile()
+        with self._lock:
+            self.hits += 1
+            counts = self._counts or {}
+            if status:
+                return counts.get(status, 0)
+            return sum(counts.values())
+
+    def on_created(self, status: str = 'pending'):
+        """新建事件后调用"""
+        self._adjust(status, 1)
+
+    def on_status_changed(self, old_status: Optional[str], new_status: str):
+        """事件状态流转后调用；旧状态未知时标记为待对账"""
+        if old_status is None:
+            self.invalidate()
+            return
+        if old_status == new_status:
+            return
+        with self._lock:
+            if self._counts is not None:
+                self._counts[old_status] = max(0, self._counts.get(old_status, 0) - 1)
+                self._counts[new_status] = self._counts.get(new_status, 0) + 1
+
+    def invalidate(self):
+        """下次读取时重新从数据库统计"""
+        with self._lock:
+            self._dirty = True
+
+    def reconcile(self) -> Dict[str, int]:
+        """从数据库重新统计并替换缓存，返回最新数量"""
+        with self._reconcile_lock:
+            # 等锁期间其他线程可能已完成对账
+            if not self._needs_reconcile() and self._counts is not None:
+                return dict(self._counts)
+            try:
+                fresh = self._loader()
+            except Exception as e:
+                print(f"事件数量对账失败: {e}")
+                # 保留旧值，稍后再试；被标记失效的缓存同样要等到retry_after
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+                    self._retry_after = self._loaded_at + min(RECONCILE_RETRY_SECONDS, self.reconcile_interval)
+                    return dict(self._counts or {})
+
+            with self._lock:
+                # 被主动标记失效的缓存本就不准确，只统计增量维护产生的偏差
+                if self._counts is not None and not self._dirty:
+                    drift = sum(abs(fresh.get(k, 0) - self._counts.get(k, 0))
+                                for k in set(fresh) | set(self._counts))
+                    if drift:
+                        print(f"事件数量缓存偏差 {drift}，已按数据库修正")
+                        self.drift_corrected += drift
+                self._counts = fresh
+                self._loaded_at = time.monotonic()
+                self._dirty = False
+                self._retry_after = 0.0
+                self.reconciles += 1
+                return dict(fresh)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "counts": dict(self._counts or {}),
+                "hits": self.hits,
+                "reconciles": self.reconciles,
+                "drift_corrected": self.drift_corrected,
+            }
+
+    def _adjust(self, status: str, delta: int):
+        with self._lock:
+            if self._counts is not None:
+                self._counts[status] = max(0, self._counts.get(status, 0) + delta)
+
+    def _needs_reconcile(self) -> bool:
+        with self._lock:
+            if time.monotonic() < self._retry_after:
+                return False
+            return (self._dirty or self._counts is None
+                    or time.monotonic() - self._loaded_at >= self.reconcile_interval)
@@ -0,0 +1,128 @@
+"""
+幂等键（Idempotency-Key）结果存储
+移动端在网络不稳定时会重试投票、关注等写请求。客户端为每次操作生成一个幂等键放在请求头中，
+服务端记录该键第一次请求的响应，重试时直接返回原响应，不再访问数据库。
+结果保存在有容量上限和过期时间的内存缓存中，可选持久化到MySQL（进程重启或多进程部署时仍能命中）
+"""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .read_cache import TTLCache
+
+# 幂等键最大长度，与idempotency_keys表的idem_key列一致
+MAX_IDEMPOTENCY_KEY_LENGTH = 128
+
+# 保存的结果：(请求指纹, 状态码, 响应体)
+StoredResponse = Tuple[str, int, Any]
+# 持久化读写函数：loader(scope, user_id, key) 返回StoredResponse或None；saver(scope, user_id, key, stored)
+Loader = Callable[[str, int, str], Optional[StoredResponse]]
+Saver = Callable[[str, int, str, StoredResponse], None]
+
+
+class IdempotencyError(Exception):
+    """幂等键无法使用：同一个键正在处理中（409），或被用于不同的请求（422）"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """请求内容的指纹，用于发现同一个幂等键被用于不同的请求"""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """按 (接口, 用户, 幂等键) 保存第一次请求的响应
+
+    reserve在处理请求前调用：已有结果时返回该结果；否则把键标记为处理中并返回None。
+    请求处理完成后调用complete保存结果，处理失败（服务端错误）时调用release，允许客户端重试。
+    """
+
+    def __init__(self, ttl: float = 86400, maxsize: int = 10000,
+                 loader: Optional[Loader] = None, saver: Optional[Saver] = None):
+        self._results = TTLCache("idempotency", maxsize=maxsize, ttl=ttl)
+        self._loader = loader
+        self._saver = saver
+        # 处理中的键，同一个键的并发重试直接返回409，不会重复执行
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.replays = 0
+        self.conflicts = 0
+        self.persist_errors = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._results.ttl
+
+    def reserve(self, scope: str, user_id: int, key: str, fingerprint: str) -> Optional[Tuple[int, Any]]:
+        """返回已保存的 (状态码, 响应体)；没有时占用该键并返回None"""
+        cache_key = (scope, user_id, key)
+        stored = self._results.get(cache_key)
+        if stored is None and self._loader is not None:
+            try:
+                stored = self._loader(scope, user_id, key)
+            except Exception as e:
+                # 持久化层不可用时只依赖内存结果，不影响请求本身
+                print(f"读取幂等键结果失败: {e}")
+                self.persist_errors += 1
+            if stored is not None:
+                self._results.set(cache_key, stored)
+
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+
+        with self._lock:
+            # 加锁后再查一次：等锁期间另一个请求可能刚好完成
+            stored = self._results.get(cache_key)
+            if stored is None:
+                if cache_key in self._in_flight:
+                    self.conflicts += 1
+                    raise IdempotencyError(409, "相同幂等键的请求正在处理中，请稍后重试")
+                self._in_flight.add(cache_key)
+                return None
+        return self._replay(stored, fingerprint)
+
+    def complete(self, scope: str, user_id: int, key: str, fingerprint: str, status_code: int, body: Any):
+        """保存请求结果并释放该键"""
+        cache_key = (scope, user_id, key)
+        stored = (fingerprint, status_code, body)
+        if self._saver is not None:
+            try:
+                self._saver(scope, user_id, key, stored)
+            except Exception as e:
+                print(f"保存幂等键结果失败: {e}")
+                self.persist_errors += 1
+        with self._lock:
+            self._results.set(cache_key, stored)
+            self._in_flight.discard(cache_key)
+
+    def release(self, scope: str, user_id: int, key: str):
+        """请求处理失败，不保存结果，允许用同一个键重试"""
+        with self._lock:
+            self._in_flight.discard((scope, user_id, key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {
+            **self._results.stats(),
+            "in_flight": in_flight,
+            "replays": self.replays,
+            "conflicts": self.conflicts,
+            "persisted": self._saver is not None,
+            "persist_errors": self.persist_errors,
+        }
+
+    def _replay(self, stored: StoredResponse, fingerprint: str) -> Tuple[int, Any]:
+        stored_fingerprint, status_code, body = stored
+        if stored_fingerprint != fingerprint:
+            self.conflicts += 1
+            raise IdempotencyError(422, "该幂等键已用于另一个不同的请求")
+        self.replays += 1
+        return status_code, body
@@ -0,0 +1,134 @@
+"""
+进程内读缓存
+有容量上限（LRU淘汰）和过期时间（TTL）的线程安全缓存，支持按标签批量失效，
+用于事件列表与事件详情这类读多写少的热点查询
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU + TTL缓存；set时可指定tag，invalidate_tag一次性删除同一标签下的所有条目
+
+    读数据库再回填缓存时，先用generation(tag)取得代数，再把它传给set：读库期间该标签被失效过
+    （或整个缓存被清空过）时拒绝写入，避免把失效前读到的旧数据重新放回缓存。
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 10, enabled: bool = True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        # key -> (过期时间, 值, 标签)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        # 整个缓存的代数（clear时递增）和各标签的代数（invalidate_tag时递增）
+        self._generation = 0
+        self._tag_generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，未命中或已过期时返回default"""
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove_locked(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, tag: Optional[Hashable] = None) -> Tuple[int, int]:
+        """当前代数，在读数据库之前取得，回填缓存时传给set"""
+        with self._lock:
+            return self._generation, self._tag_generations.get(tag, 0)
+
+    def set(self, key: Hashable, value: Any, tag: Optional[Hashable] = None,
+            generation: Optional[Tuple[int, int]] = None):
+        """写入缓存，超过容量时淘汰最久未使用的条目
+
+        传入generation时，如果取得代数之后该标签被失效或缓存被清空，则不写入
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._generation, self._tag_generations.get(tag, 0)):
+                self.stale_sets += 1
+                return
+            if key in self._data:
+                self._remove_locked(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, tag)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove_locked(oldest)
+                self.evictions += 1
+
+    def invalidate_tag(self, tag: Hashable):
+        """删除指定标签下的所有条目"""
+        with self._lock:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+            if len(self._tag_generations) > self.maxsize * 4:
+                # 标签代数表只增不减，过大时整体重置；递增全局代数，让此前取得的代数全部作废
+                self._tag_generations.clear()
+                self._generation += 1
+            keys = self._tags.pop(tag, None)
+            if not keys:
+                return
+            for key in keys:
+                entry = self._data.pop(key, None)
+                if entry is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets,
+            }
+
+    def _remove_locked(self, key: Hashable):
+        _, _, tag = self._data.pop(key)
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
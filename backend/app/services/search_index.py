@@ -0,0 +1,207 @@
+"""
+进程内事件倒排索引
+对事件标题、描述和关键词做中文二元切分（bigram）+ 英文/数字整词切分，
+启动时从events表构建，创建事件和状态流转时增量维护，并定期按updated_at增量刷新
+（其他进程或脚本对events表的修改），搜索按BM25打分排序并可按状态过滤，不再访问数据库
+"""
+
+import heapq
+import math
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 连续的中日韩字符，或连续的英文字母/数字
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9]+")
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+# 各字段词频的权重：标题和关键词命中比描述命中更相关
+FIELD_WEIGHTS = (("title", 3), ("keywords", 2), ("description", 1))
+
+# 搜索结果返回的字段，与数据库搜索的结果保持一致
+DISPLAY_FIELDS = ("id", "title", "description", "keywords", "status",
+                  "created_at", "username", "nickname")
+
+# BM25参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """切分文本：中文按相邻两字切分（单字保留本身），英文和数字按整词切分"""
+    tokens = []
+    for run in _TOKEN_RE.findall((text or "").lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class SearchIndex:
+    """线程安全的事件倒排索引"""
+
+    def __init__(self):
+        # 词 -> {事件ID: 加权词频}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # 事件ID -> 加权文档长度
+        self._doc_len: Dict[int, int] = {}
+        # 事件ID -> 搜索结果展示字段
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._total_len = 0
+        self._lock = threading.RLock()
+        # 重建期间的增量修改，替换前在新索引上重放，避免被读取中的旧数据覆盖
+        self._build_log: Optional[List[Tuple[str, tuple]]] = None
+        self._build_lock = threading.Lock()
+        self.ready = False
+
+    def build(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """用全部事件重建索引，返回构建统计"""
+        started = time.perf_counter()
+        with self._build_lock:
+            with self._lock:
+                self._build_log = []
+            fresh = SearchIndex()
+            try:
+                for row in rows:
+                    fresh._add_locked(row)
+            except BaseException:
+                with self._lock:
+                    self._build_log = None
+                raise
+
+            with self._lock:
+                for op, args in self._build_log:
+                    getattr(fresh, op)(*args)
+                self._build_log = None
+                self._postings = fresh._postings
+                self._doc_len = fresh._doc_len
+                self._docs = fresh._docs
+                self._total_len = fresh._total_len
+                self.ready = True
+
+        stats = self.stats()
+        stats["build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return stats
+
+    def add(self, row: Dict[str, Any]):
+        """新增或替换一个事件"""
+        with self._lock:
+            self._log_locked("_replace_locked", row)
+            self._replace_locked(row)
+
+    def remove(self, event_id: int):
+        with self._lock:
+            self._log_locked("_remove_locked", event_id)
+            self._remove_locked(event_id)
+
+    def update_status(self, event_id: int, status: str):
+        """状态变化不影响分词，只更新展示字段"""
+        with self._lock:
+            self._log_locked("_update_status_locked", event_id, status)
+            self._update_status_locked(event_id, status)
+
+    def can_search(self, query: str) -> bool:
+        """查询中是否有能命中索引的词：文档中的连续汉字按二元切分，单个汉字的查询词在索引中没有词条，
+        只由单个汉字组成的查询应交给数据库的LIKE搜索"""
+        return any(len(token) > 1 or not _CJK_RE.match(token) for token in tokenize(query))
+
+    def search(self, query: str, limit: int = 10, status: str = None) -> List[Dict[str, Any]]:
+        """按BM25相关度返回前limit个事件，结果带relevance分数"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            # 长度归一化项 k1 * (1 - b + b * len / avg_len) 拆成 base + scale * len
+            base = BM25_K1 * (1 - BM25_B)
+            scale = BM25_K1 * BM25_B * n_docs / self._total_len if self._total_len else 0.0
+            docs, doc_len = self._docs, self._doc_len
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                weight = math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * (BM25_K1 + 1)
+                for event_id, tf in postings.items():
+                    if status and docs[event_id]["status"] != status:
+                        continue
+                    score = weight * tf / (tf + base + scale * doc_len[event_id])
+                    scores[event_id] = scores.get(event_id, 0.0) + score
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            results = []
+            for event_id, score in top:
+                result = dict(self._docs[event_id])
+                result["relevance"] = round(score, 4)
+                results.append(result)
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "documents": len(self._docs),
+                "terms": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+                "memory_bytes": self._memory_bytes_locked(),
+            }
+
+    def _log_locked(self, op: str, *args):
+        if self._build_log is not None:
+            self._build_log.append((op, args))
+
+    def _replace_locked(self, row: Dict[str, Any]):
+        self._remove_locked(row["id"])
+        self._add_locked(row)
+
+    def _update_status_locked(self, event_id: int, status: str):
+        doc = self._docs.get(event_id)
+        if doc is not None:
+            doc["status"] = status
+
+    def _add_locked(self, row: Dict[str, Any]):
+        event_id = row["id"]
+        freqs: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(row.get(field)):
+                freqs[token] = freqs.get(token, 0) + weight
+
+        for token, tf in freqs.items():
+            self._postings.setdefault(token, {})[event_id] = tf
+        length = sum(freqs.values())
+        self._doc_len[event_id] = length
+        self._total_len += length
+        self._docs[event_id] = {field: row.get(field) for field in DISPLAY_FIELDS}
+
+    def _remove_locked(self, event_id: int):
+        doc = self._docs.pop(event_id, None)
+        if doc is None:
+            return
+        self._total_len -= self._doc_len.pop(event_id, 0)
+        for field, _ in FIELD_WEIGHTS:
+            for token in set(tokenize(doc.get(field))):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(event_id, None)
+                    if not postings:
+                        del self._postings[token]
+
+    def _memory_bytes_locked(self) -> int:
+        """粗略估算索引占用的内存（容器本身 + 词条字符串 + 展示字段）"""
+        size = sys.getsizeof(self._postings) + sys.getsizeof(self._doc_len) + sys.getsizeof(self._docs)
+        for token, postings in self._postings.items():
+            size += sys.getsizeof(token) + sys.getsizeof(postings)
+        for doc in self._docs.values():
+            size += sys.getsizeof(doc)
+            size += sum(sys.getsizeof(value) for value in doc.values())
+        return size
@@ -1,226 +1,623 @@
+import copy
 import pymysql
-from typing import List, Dict, Optional, Any
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator
 from datetime import datetime
 import json
 
+from ..config import settings
+from ..utils.pagination import decode_cursor, keyset_condition
+from .db_pool import ConnectionPool
+from .event_count_cache import EventCountCache
+from .sql_metrics import SQLMetrics
+from .read_cache import TTLCache
+from .search_index import SearchIndex
+from .suggest_index import SuggestIndex
+from .vote_counter_buffer import RollupDeltas, VoteCounterBuffer
+from .event_bus import EventBus
+from .idempotency_store import IdempotencyStore, StoredResponse
+
+# 投票数达到该值后，投票中的事件自动转为已确认
+CONFIRM_VOTE_THRESHOLD = 20
+
+# get_event_detail可附带的内容：当前用户关注状态、信息源
+EVENT_DETAIL_INCLUDES = ("interest", "sources")
+
+# GET /events/ 的fields参数可选的字段 -> 需要查询的列；creator需要联表users
+EVENT_LIST_FIELDS = {
+    "title": ("e.title",),
+    "description": ("e.description",),
+    "keywords": ("e.keywords",),
+    "status": ("e.status",),
+    "interest_count": ("e.interest_count",),
+    "vote_count": ("e.vote_count",),
+    "support_votes": ("e.support_votes",),
+    "oppose_votes": ("e.oppose_votes",),
+    "ai_summary": ("e.ai_summary",),
+    "ai_rating": ("e.ai_rating",),
+    "nomination_deadline": ("e.nomination_deadline",),
+    "creator_id": ("e.creator_id",),
+    "creator": ("e.creator_id", "u.username", "u.nickname", "u.role"),
+}
+
+# 无论fields如何都会返回的字段：游标翻页与ETag依赖它们
+EVENT_LIST_REQUIRED_FIELDS = ("id", "created_at", "updated_at")
+
+# 计数列为NULL时按0返回
+_COUNTER_FIELDS = ("interest_count", "vote_count", "support_votes", "oppose_votes")
+
+# 批量投票：单次请求的投票数上限，以及每条多行INSERT/IN查询包含的行数
+MAX_BULK_VOTES = 5000
+BULK_VOTE_CHUNK_SIZE = 500
+# 批量投票遇到死锁时整批重试的次数
+BULK_VOTE_DEADLOCK_RETRIES = 2
+
+# 投票趋势的时间粒度 -> (DATE_FORMAT格式, INTERVAL单位, 秒数)，数据来自按分钟汇总的vote_rollups表
+VOTE_TREND_BUCKETS = {
+    "1m": ("%Y-%m-%d %H:%i:00", "MINUTE", 60),
+    "1h": ("%Y-%m-%d %H:00:00", "HOUR", 3600),
+    "1d": ("%Y-%m-%d 00:00:00", "DAY", 86400),
+}
+# 单次趋势查询最多返回的时间段数
+MAX_TREND_BUCKETS = 1440
+
+# MySQL唯一键冲突错误码
+DUPLICATE_ENTRY_ERROR = 1062
+
+# 事务因死锁被回滚的错误码（ER_LOCK_DEADLOCK）
+DEADLOCK_ERROR = 1213
+
+# MATCH的列上没有对应FULLTEXT索引时的错误码（ER_FT_MATCHING_KEY_NOT_FOUND）
+FULLTEXT_INDEX_MISSING_ERROR = 1191
+
+# 构建进程内倒排索引读取的列，与数据库搜索返回的列一致
+SEARCH_INDEX_SQL = """SELECT e.id, e.title, e.description, e.keywords, e.status,
+                             e.created_at, u.username, u.nickname
+                      FROM events e
+                      LEFT JOIN users u ON e.creator_id = u.id"""
+
+# 倒排索引增量刷新时，updated_at的查询范围向前多取的秒数
+SEARCH_INDEX_REFRESH_OVERLAP = 60
+
+# ngram全文解析器的分词长度，与MySQL的ngram_token_size保持一致
+NGRAM_TOKEN_SIZE = 2
+
+# 表示连接已断开的MySQL客户端错误码：服务器已断开、查询中途断开、连接已丢失等
+DISCONNECT_ERROR_CODES = {2006, 2013, 2014, 2045, 2055}
+
+# 语句一定未被服务器执行的断线错误码，写操作只在这些情况（或InterfaceError）下重试
+SAFE_RETRY_ERROR_CODES = {2006, 2045}
+
+
+def is_disconnect_error(e: Exception) -> bool:
+    """判断异常是否由连接断开引起"""
+    if isinstance(e, pymysql.err.InterfaceError):
+        return True
+    if isinstance(e, pymysql.err.OperationalError):
+        return bool(e.args) and e.args[0] in DISCONNECT_ERROR_CODES
+    return False
+
+
+def is_outcome_unknown_error(e: Exception) -> bool:
+    """语句已发出后连接断开（如COMMIT的回复丢失），无法确定事务是否已在服务器上提交"""
+    return (isinstance(e, pymysql.err.OperationalError) and bool(e.args)
+            and e.args[0] in DISCONNECT_ERROR_CODES - SAFE_RETRY_ERROR_CODES)
+
+
 class SimpleDBService:
     """简单的数据库服务类，使用原生pymysql，避免SQLAlchemy的复杂性"""
     
     def __init__(self):
-        self.connection = None
+        # 所有线程共享一个有界连接池，每条语句借出独立连接，互不干扰
+        # 连接只在空闲较久后借出时才ping一次，不再每条语句都多一次往返
+        self.pool = ConnectionPool(
+            self._create_connection,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            idle_timeout=settings.db_pool_idle_timeout,
+            checkout_timeout=settings.db_pool_checkout_timeout,
+            validate=lambda conn: conn.ping(reconnect=False),
+            validate_after=settings.db_pool_validate_after
+        )
+        # execute_transaction专用的连接池：只有这里的连接允许一次发送多条语句，
+        # 普通查询的连接不开启多语句，SQL拼接出错时也无法叠加执行额外语句
+        self.batch_pool = ConnectionPool(
+            lambda: self._create_connection(multi_statements=True),
+            min_size=0,
+            max_size=settings.db_pool_max_size,
+            idle_timeout=settings.db_pool_idle_timeout,
+            checkout_timeout=settings.db_pool_checkout_timeout,
+            validate=lambda conn: conn.ping(reconnect=False),
+            validate_after=settings.db_pool_validate_after
+        )
+        # 每条语句的耗时、行数与错误统计，超过阈值的记录慢查询
+        self.sql_metrics = SQLMetrics(
+            slow_query_ms=settings.slow_query_ms,
+            sample_size=settings.sql_metrics_sample_size,
+            enabled=settings.sql_metrics_enabled
+        )
+        # 事件列表与事件详情的读缓存，写操作通过invalidate_event_cache失效
+        self.event_list_cache = TTLCache(
+            "event_list",
+            maxsize=settings.read_cache_max_size,
+            ttl=settings.read_cache_ttl,
+            enabled=settings.read_cache_enabled
+        )
+        self.event_detail_cache = TTLCache(
+            "event_detail",
+            maxsize=settings.read_cache_max_size,
+            ttl=settings.read_cache_ttl,
+            enabled=settings.read_cache_enabled
+        )
+        # 按状态缓存的事件数量，供事件列表分页使用
+        self.event_counts = EventCountCache(
+            self._load_event_counts,
+            reconcile_interval=settings.event_count_reconcile_interval
+        )
+        # events表是否有全文索引ft_events_text，首次查询发现缺失后置为False
+        self.fulltext_available = True
+        # 进程内倒排索引，build_search_index构建完成前搜索仍走数据库
+        self.search_index = SearchIndex() if settings.search_index_enabled else None
+        # 倒排索引已同步到的数据库时间，refresh_search_index从这里开始增量刷新
+        self._search_index_synced_at: Optional[datetime] = None
+        # 搜索框联想词索引（标题与关键词前缀，按关注数排序）
+        self.suggest_index = SuggestIndex()
+        # 可选的投票计数写回缓冲，关闭时投票计数在投票事务中同步更新
+        self.vote_buffer = VoteCounterBuffer(
+            self._flush_vote_counters,
+            flush_interval_ms=settings.vote_flush_interval_ms,
+            max_pending_votes=settings.vote_flush_max_votes,
+            is_outcome_unknown=is_outcome_unknown_error
+        ) if settings.vote_write_behind_enabled else None
+        # 事件详情页的实时推送（SSE），写操作后publish，按事件合并后推送
+        self.event_bus = EventBus(self.get_event_counters, min_interval=settings.event_stream_min_interval)
+        # 写接口幂等键的结果存储，开启持久化时内存未命中再查idempotency_keys表
+        self.idempotency_store = IdempotencyStore(
+            ttl=settings.idempotency_ttl,
+            maxsize=settings.idempotency_max_keys,
+            loader=self._load_idempotent_response if settings.idempotency_persist else None,
+            saver=self._save_idempotent_response if settings.idempotency_persist else None
+        )
+
+    def _create_connection(self, multi_statements: bool = False):
+        """创建一条新的数据库连接（由连接池调用）；multi_statements只用于execute_transaction的连接"""
+        return pymysql.connect(
+            host=settings.db_host,
+            port=settings.db_port,
+            user=settings.db_user,
+            password=settings.db_password,
+            database=settings.db_name,
+            charset='utf8mb4',
+            autocommit=True,  # 自动提交
+            # 允许一次发送多条语句，用于execute_transaction把整个事务合并为一次往返
+            client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS if multi_statements else 0
+        )
         
     def connect(self):
-        """建立数据库连接"""
+        """预热连接池，建立最少数量的数据库连接"""
         try:
-            self.connection = pymysql.connect(
-                host='115.120.215.107',
-                port=3306,
-                user='truthmirror',
-                password='truthmirror',
-                database='truthmirror',
-                charset='utf8mb4',
-                autocommit=True  # 自动提交
-            )
+            self.pool.reopen()
+            self.batch_pool.reopen()
+            self.pool.fill()
             return True
         except Exception as e:
             print(f"数据库连接失败: {e}")
             return False
     
     def close(self):
-        """关闭数据库连接"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """关闭连接池中的所有连接"""
+        self.pool.close()
+        self.batch_pool.close()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """连接池状态与饱和度统计"""
+        return self.pool.stats()
+
+    def batch_pool_stats(self) -> Dict[str, Any]:
+        """execute_transaction专用连接池的状态"""
+        return self.batch_pool.stats()
+
+    def _run(self, sql: str, params: tuple = None, fetch: bool = True):
+        """从连接池借出连接执行一条语句，出错时抛出异常；连接断开时丢弃该连接"""
+        conn = self.pool.checkout()
+        started = time.perf_counter()
+        try:
+            if fetch:
+                with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                    cursor.execute(sql, params)
+                    result = cursor.fetchall()
+                    rows = len(result)
+            else:
+                with conn.cursor() as cursor:
+                    affected_rows = rows = cursor.execute(sql, params)
+                    # 如果是INSERT操作，返回最后插入的ID
+                    if sql.strip().upper().startswith('INSERT'):
+                        result = cursor.lastrowid or affected_rows
+                    else:
+                        result = affected_rows
+        except Exception as e:
+            self.sql_metrics.record(sql, time.perf_counter() - started, error=True, params=params)
+            # SQL本身的错误不影响连接，只有断线才丢弃
+            self.pool.checkin(conn, discard=is_disconnect_error(e))
+            raise
+        self.sql_metrics.record(sql, time.perf_counter() - started, rows=rows, params=params)
+        self.pool.checkin(conn)
+        return result
+
+    def _run_with_retry(self, sql: str, params: tuple = None, fetch: bool = True):
+        """执行语句，连接断开时换一条新连接透明重试一次"""
+        try:
+            return self._run(sql, params, fetch)
+        except Exception as e:
+            if not is_disconnect_error(e):
+                raise
+            # 写操作只在确定语句未执行时重试，避免重复写入
+            if not fetch and not isinstance(e, pymysql.err.InterfaceError) \
+                    and e.args[0] not in SAFE_RETRY_ERROR_CODES:
+                raise
+            print(f"数据库连接已断开，重试: {e}")
+            return self._run(sql, params, fetch)
     
+    def execute_transaction(self, statements: List[Tuple[str, Optional[tuple]]]) -> List[Dict[str, int]]:
+        """把多条写语句包在BEGIN/COMMIT中一次性发送，在一次网络往返内完成整个事务
+
+        返回每条语句的 {"rowcount": 影响行数, "lastrowid": 插入ID, "rows": 查询语句返回的行（元组）}。
+        任意一条语句出错时整个事务回滚并抛出异常（例如唯一键冲突的IntegrityError）。
+        """
+        # 整个事务按各语句指纹拼接后统计
+        metrics_sql = "; ".join(sql for sql, _ in statements)
+        conn = self.batch_pool.checkout()
+        started = time.perf_counter()
+        try:
+            with conn.cursor() as cursor:
+                batch = [cursor.mogrify(sql, params) for sql, params in statements]
+                cursor.execute(";\n".join(["BEGIN"] + batch + ["COMMIT"]))
+                results = []
+                for _ in statements:
+                    cursor.nextset()
+                    results.append({"rowcount": cursor.rowcount, "lastrowid": cursor.lastrowid,
+                                    "rows": cursor.fetchall() if cursor.description else ()})
+            self.sql_metrics.record(metrics_sql, time.perf_counter() - started,
+                                    rows=sum(r["rowcount"] for r in results))
+        except Exception as e:
+            self.sql_metrics.record(metrics_sql, time.perf_counter() - started, error=True,
+                                    params=[params for _, params in statements])
+            # 出错语句之后的语句（包括COMMIT）都不会被执行，需要显式回滚
+            discard = is_disconnect_error(e)
+            if not discard:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+            self.batch_pool.checkin(conn, discard=discard)
+            raise
+        self.batch_pool.checkin(conn)
+        return results
+    
+    @contextmanager
+    def transaction(self, name: str = "TRANSACTION") -> Iterator[pymysql.cursors.DictCursor]:
+        """交互式事务：在同一条连接上依次执行语句，可以在事务中读取（如SELECT ... FOR UPDATE）
+
+        with块正常结束时提交，抛出异常时回滚；整个事务的耗时按name统计。
+        只需要写入时优先使用execute_transaction，它在一次往返内完成。
+        """
+        conn = self.pool.checkout()
+        started = time.perf_counter()
+        try:
+            conn.begin()
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                yield cursor
+            conn.commit()
+        except BaseException as e:
+            self.sql_metrics.record(name, time.perf_counter() - started, error=True)
+            discard = is_disconnect_error(e)
+            if not discard:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+            self.pool.checkin(conn, discard=discard)
+            raise
+        self.sql_metrics.record(name, time.perf_counter() - started)
+        self.pool.checkin(conn)
+
+    def stream_query(self, sql: str, params: tuple = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """使用服务端无缓冲游标逐行返回查询结果，内存占用与结果集大小无关
+
+        迭代期间独占一条连接；调用方提前结束迭代时，未读完结果的连接会被丢弃。
+        """
+        conn = self.pool.checkout()
+        started = time.perf_counter()
+        total_rows = 0
+        finished = False
+        try:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                total_rows += len(rows)
+                yield from rows
+            cursor.close()
+            finished = True
+        finally:
+            # 流式查询的耗时包含客户端消费时间，仍按同一指纹统计
+            self.sql_metrics.record(sql, time.perf_counter() - started, rows=total_rows,
+                                    error=not finished, params=params)
+            # 提前中断时不去读完剩余结果，直接关闭连接
+            self.pool.checkin(conn, discard=not finished)
+
     def execute_query(self, sql: str, params: tuple = None) -> List[Dict[str, Any]]:
         """执行查询并返回结果"""
-        if not self.connection:
-            if not self.connect():
-                return []
-
         try:
-            # 检查连接是否仍然有效
-            self.connection.ping(reconnect=True)
-            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                cursor.execute(sql, params)
-                return cursor.fetchall()
+            return self._run_with_retry(sql, params, fetch=True)
         except Exception as e:
             print(f"查询执行失败: {e}")
-            # 尝试重新连接
-            self.connection = None
-            if self.connect():
-                try:
-                    with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                        cursor.execute(sql, params)
-                        return cursor.fetchall()
-                except Exception as e2:
-                    print(f"重连后查询仍然失败: {e2}")
             return []
     
     def execute_update(self, sql: str, params: tuple = None) -> int:
         """执行更新/插入/删除操作，返回影响的行数或插入的ID"""
-        if not self.connection:
-            if not self.connect():
-                return 0
-
         try:
-            # 检查连接是否仍然有效
-            self.connection.ping(reconnect=True)
-            with self.connection.cursor() as cursor:
-                affected_rows = cursor.execute(sql, params)
-                # 如果是INSERT操作，返回最后插入的ID
-                if sql.strip().upper().startswith('INSERT'):
-                    return cursor.lastrowid or affected_rows
-                return affected_rows
+            return self._run_with_retry(sql, params, fetch=False)
         except Exception as e:
             print(f"更新执行失败: {e}")
-            # 尝试重新连接
-            self.connection = None
-            if self.connect():
-                try:
-                    with self.connection.cursor() as cursor:
-                        affected_rows = cursor.execute(sql, params)
-                        if sql.strip().upper().startswith('INSERT'):
-                            return cursor.lastrowid or affected_rows
-                        return affected_rows
-                except Exception as e2:
-                    print(f"重连后更新仍然失败: {e2}")
             return 0
     
     # ===== Events 相关方法 =====
     
-    def get_events(self, skip: int = 0, limit: int = 10, status: str = None) -> List[Dict[str, Any]]:
-        """获取事件列表"""
-        base_sql = """
-        SELECT 
-            e.id, e.title, e.description, e.keywords, e.status,
-            e.interest_count, e.vote_count, e.support_votes, e.oppose_votes,
-            e.ai_summary, e.ai_rating, e.nomination_deadline, e.creator_id,
-            e.created_at, e.updated_at,
-            u.username, u.nickname, u.role
-        FROM events e
-        LEFT JOIN users u ON e.creator_id = u.id
+    def get_events(self, skip: int = 0, limit: int = 10, status: str = None,
+                   cursor: str = None, fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """获取事件列表；传入cursor时按游标翻页并忽略skip
+
+        fields为None时返回完整事件结构；否则只查询并返回指定字段（见 EVENT_LIST_FIELDS），
+        另外总是返回 EVENT_LIST_REQUIRED_FIELDS。包含未知字段时抛出ValueError。
         """
+        if fields is not None:
+            requested = set(fields) - set(EVENT_LIST_REQUIRED_FIELDS)
+            unknown = requested - set(EVENT_LIST_FIELDS)
+            if unknown:
+                raise ValueError(f"无效的fields值: {', '.join(sorted(unknown))}")
+            # 按固定顺序排列，相同字段集合共用一个缓存条目
+            fields = tuple(name for name in EVENT_LIST_FIELDS if name in requested)
+
+        cache_key = (skip, limit, status, cursor, fields)
+        cached = self.event_list_cache.get(cache_key)
+        if cached is not None:
+            # 返回深拷贝：creator等嵌套结构与缓存共享时，调用方的修改会影响之后的所有请求
+            return copy.deepcopy(cached)
+        # 查询期间缓存被清空时不回填，避免旧数据覆盖失效
+        generation = self.event_list_cache.generation()
+
+        if fields is None:
+            base_sql = """
+            SELECT 
+                e.id, e.title, e.description, e.keywords, e.status,
+                e.interest_count, e.vote_count, e.support_votes, e.oppose_votes,
+                e.ai_summary, e.ai_rating, e.nomination_deadline, e.creator_id,
+                e.created_at, e.updated_at,
+                u.username, u.nickname, u.role
+            FROM events e
+            LEFT JOIN users u ON e.creator_id = u.id
+            """
+        else:
+            columns = ["e.id", "e.created_at", "e.updated_at"]
+            for name in fields:
+                columns.extend(col for col in EVENT_LIST_FIELDS[name] if col not in columns)
+            base_sql = f"SELECT {', '.join(columns)} FROM events e"
+            # 只有需要创建者信息时才联表
+            if "creator" in fields:
+                base_sql += " LEFT JOIN users u ON e.creator_id = u.id"
         
+        conditions = []
         params = []
         if status:
-            base_sql += " WHERE e.status = %s"
+            conditions.append("e.status = %s")
             params.append(status)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            conditions.append(keyset_condition('e'))
+            params.extend([created_at, created_at, last_id])
+            skip = 0
+        if conditions:
+            base_sql += " WHERE " + " AND ".join(conditions)
         
-        base_sql += " ORDER BY e.created_at DESC LIMIT %s OFFSET %s"
+        base_sql += " ORDER BY e.created_at DESC, e.id DESC LIMIT %s OFFSET %s"
         params.extend([limit, skip])
         
         results = self.execute_query(base_sql, tuple(params))
         print(f"成功获取了 {len(results)} 个事件")
         
         # 转换结果格式
-        events = []
-        for row in results:
-            event = {
-                "id": row["id"],
-                "title": row["title"],
-                "description": row["description"],
-                "keywords": row["keywords"],
-                "status": row["status"],
-                "interest_count": row["interest_count"] or 0,
-                "vote_count": row["vote_count"] or 0,
-                "support_votes": row["support_votes"] or 0,
-                "oppose_votes": row["oppose_votes"] or 0,
-                "ai_summary": row["ai_summary"],
-                "ai_rating": row["ai_rating"],
-                "nomination_deadline": row["nomination_deadline"],
-                "creator_id": row["creator_id"],
-                "created_at": row["created_at"],
-                "updated_at": row["updated_at"],
-                "creator": {
+        if fields is None:
+            events = [self._event_from_row(row) for row in results]
+        else:
+            events = [self._sparse_event_from_row(row, fields) for row in results]
+        # 查询失败时execute_query也返回空列表，空结果不缓存
+        if events:
+            self.event_list_cache.set(cache_key, events, generation=generation)
+        return copy.deepcopy(events)
+
+    @staticmethod
+    def _sparse_event_from_row(row: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+        """只包含指定字段的事件结构，字段格式与_event_from_row一致"""
+        event = {name: row[name] for name in EVENT_LIST_REQUIRED_FIELDS}
+        for name in fields:
+            if name == "creator":
+                event["creator"] = {
                     "id": row["creator_id"],
                     "username": row["username"],
                     "nickname": row["nickname"],
                     "role": row["role"]
                 } if row["username"] else None
-            }
-            events.append(event)
-        
-        return events
+            elif name in _COUNTER_FIELDS:
+                event[name] = row[name] or 0
+            else:
+                event[name] = row[name]
+        return event
+
+    @staticmethod
+    def _event_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        """把events与创建者联表查询的一行转换为接口返回的事件结构"""
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "keywords": row["keywords"],
+            "status": row["status"],
+            "interest_count": row["interest_count"] or 0,
+            "vote_count": row["vote_count"] or 0,
+            "support_votes": row["support_votes"] or 0,
+            "oppose_votes": row["oppose_votes"] or 0,
+            "ai_summary": row["ai_summary"],
+            "ai_rating": row["ai_rating"],
+            "nomination_deadline": row["nomination_deadline"],
+            "creator_id": row["creator_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "creator": {
+                "id": row["creator_id"],
+                "username": row["username"],
+                "nickname": row["nickname"],
+                "role": row["role"]
+            } if row["username"] else None
+        }
 
     def get_events_count(self, status: str = None) -> int:
-        """获取事件总数"""
-        base_sql = "SELECT COUNT(*) as count FROM events"
-        params = []
+        """获取事件总数（读取按状态维护的计数缓存，定期与数据库对账）"""
+        return self.event_counts.get(status)
+
+    def _load_event_counts(self) -> Dict[str, int]:
+        """按状态统计事件数量，供计数缓存对账使用；失败时抛出异常"""
+        rows = self._run_with_retry(
+            "SELECT status, COUNT(*) as count FROM events GROUP BY status"
+        )
+        return {row['status']: row['count'] for row in rows}
+
+    def get_event_detail(self, event_id: int, user_id: int = None,
+                         include: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """获取单个事件详情，事件、创建者、用户关注状态和信息源在一次查询中取回
+
+        include 指定需要附带的内容（见 EVENT_DETAIL_INCLUDES），默认全部附带：
+        - interest: 当前用户是否已关注（仅在提供user_id时有意义）
+        - sources: 投票/已确认阶段事件的信息源
+        只需判断事件是否存在或读取状态时传入 include=() 即可跳过这些子查询。
+        """
+        include = frozenset(EVENT_DETAIL_INCLUDES if include is None else include)
+        cache_key = (event_id, user_id if "interest" in include else None, include)
+        cached = self.event_detail_cache.get(cache_key)
+        if cached is not None:
+            # 深拷贝：creator、information_sources与缓存条目共享时，调用方的修改会污染缓存
+            return copy.deepcopy(cached)
+        # 查询期间该事件被失效时不回填，避免旧数据覆盖失效
+        generation = self.event_detail_cache.generation(event_id)
 
-        if status:
-            base_sql += " WHERE status = %s"
-            params.append(status)
+        params = []
 
-        result = self.execute_query(base_sql, tuple(params))
-        return result[0]['count'] if result else 0
+        # 检查用户是否已关注此事件
+        if "interest" in include and user_id:
+            interest_expr = """EXISTS(SELECT 1 FROM event_interests ei
+                                      WHERE ei.event_id = e.id AND ei.user_id = %s)"""
+            params.append(user_id)
+        else:
+            interest_expr = "0"
+
+        # 信息源在投票阶段和已确认阶段都返回，聚合为JSON数组随事件一起取回
+        if "sources" in include:
+            sources_expr = """CASE WHEN e.status IN ('voting', 'confirmed') THEN (
+                SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                    'id', s.id, 'url', s.url, 'title', s.title,
+                    'website_name', s.website_name, 'ai_summary', s.ai_summary,
+                    'relevance_score', s.relevance_score,
+                    'created_at', DATE_FORMAT(s.created_at, '%%Y-%%m-%%dT%%H:%%i:%%s')))
+                FROM information_sources s
+                WHERE s.event_id = e.id
+            ) END"""
+        else:
+            sources_expr = "NULL"
 
-    def get_event_detail(self, event_id: int, user_id: int = None) -> Optional[Dict[str, Any]]:
-        """获取单个事件详情"""
-        sql = """
+        sql = f"""
         SELECT
             e.id, e.title, e.description, e.keywords, e.status,
             e.interest_count, e.vote_count, e.support_votes, e.oppose_votes,
             e.ai_summary, e.ai_rating, e.nomination_deadline, e.creator_id,
             e.created_at, e.updated_at,
-            u.username, u.nickname, u.role
+            u.username, u.nickname, u.role,
+            {interest_expr} AS user_interested,
+            {sources_expr} AS information_sources
         FROM events e
         LEFT JOIN users u ON e.creator_id = u.id
         WHERE e.id = %s
         """
+        params.append(event_id)
 
-        results = self.execute_query(sql, (event_id,))
+        results = self.execute_query(sql, tuple(params))
         if not results:
             return None
 
         row = results[0]
+        event = self._event_from_row(row)
 
-        # 检查用户是否已关注此事件
-        user_interested = False
-        if user_id:
-            interest_check = self.execute_query(
-                "SELECT id FROM event_interests WHERE event_id = %s AND user_id = %s",
-                (event_id, user_id)
-            )
-            user_interested = len(interest_check) > 0
+        if "interest" in include:
+            event["user_interested"] = bool(row["user_interested"])
+
+        if "sources" in include:
+            information_sources = json.loads(row["information_sources"]) if row["information_sources"] else []
+            # JSON_ARRAYAGG不保证顺序，按相关度降序、创建时间升序排列
+            information_sources.sort(key=lambda src: (-(src["relevance_score"] or 0), src["created_at"] or ""))
+            event["information_sources"] = information_sources
+
+        self.event_detail_cache.set(cache_key, event, tag=event_id, generation=generation)
+        return copy.deepcopy(event)
 
-        # 获取信息源数据
-        information_sources = []
-        if row["status"] in ["voting", "confirmed"]:  # 在投票阶段和已确认阶段都返回信息源
-            sources_sql = """
-            SELECT id, url, title, website_name, ai_summary, relevance_score, created_at
+    def invalidate_event_cache(self, event_id: int = None):
+        """事件数据变化后使读缓存失效；列表中包含计数，任何事件变化都会清空列表缓存"""
+        if event_id is not None:
+            self.event_detail_cache.invalidate_tag(event_id)
+        self.event_list_cache.clear()
+
+    def get_events_batch(self, event_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """批量获取事件详情，返回 {事件ID: 事件}，不存在的ID不出现在结果中
+
+        事件与创建者用一条IN查询获取，投票/已确认事件的信息源用一条查询批量获取，
+        共两次往返；信息源规则与get_event_detail一致。
+        """
+        if not event_ids:
+            return {}
+
+        placeholders = ", ".join(["%s"] * len(event_ids))
+        sql = f"""
+        SELECT
+            e.id, e.title, e.description, e.keywords, e.status,
+            e.interest_count, e.vote_count, e.support_votes, e.oppose_votes,
+            e.ai_summary, e.ai_rating, e.nomination_deadline, e.creator_id,
+            e.created_at, e.updated_at,
+            u.username, u.nickname, u.role
+        FROM events e
+        LEFT JOIN users u ON e.creator_id = u.id
+        WHERE e.id IN ({placeholders})
+        """
+        events = {}
+        for row in self.execute_query(sql, tuple(event_ids)):
+            event = self._event_from_row(row)
+            event["information_sources"] = []
+            events[row["id"]] = event
+
+        # 在投票阶段和已确认阶段都返回信息源
+        source_ids = [eid for eid, event in events.items() if event["status"] in ["voting", "confirmed"]]
+        if source_ids:
+            placeholders = ", ".join(["%s"] * len(source_ids))
+            sources_sql = f"""
+            SELECT event_id, id, url, title, website_name, ai_summary, relevance_score, created_at
             FROM information_sources
-            WHERE event_id = %s
-            ORDER BY relevance_score DESC, created_at ASC
+            WHERE event_id IN ({placeholders})
+            ORDER BY event_id, relevance_score DESC, created_at ASC
             """
-            sources_results = self.execute_query(sources_sql, (event_id,))
-            information_sources = sources_results if sources_results else []
+            for source in self.execute_query(sources_sql, tuple(source_ids)):
+                events[source.pop("event_id")]["information_sources"].append(source)
 
-        return {
-            "id": row["id"],
-            "title": row["title"],
-            "description": row["description"],
-            "keywords": row["keywords"],
-            "status": row["status"],
-            "interest_count": row["interest_count"] or 0,
-            "vote_count": row["vote_count"] or 0,
-            "support_votes": row["support_votes"] or 0,
-            "oppose_votes": row["oppose_votes"] or 0,
-            "ai_summary": row["ai_summary"],
-            "ai_rating": row["ai_rating"],
-            "nomination_deadline": row["nomination_deadline"],
-            "creator_id": row["creator_id"],
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"],
-            "user_interested": user_interested,
-            "information_sources": information_sources,
-            "creator": {
-                "id": row["creator_id"],
-                "username": row["username"],
-                "nickname": row["nickname"],
-                "role": row["role"]
-            } if row["username"] else None
-        }
+        return events
     
     def create_event(self, title: str, description: str, keywords: str, creator_id: int = 1) -> Optional[Dict[str, Any]]:
         """创建新事件"""
@@ -239,8 +636,15 @@ class SimpleDBService:
                     "UPDATE users SET events_created = events_created + 1 WHERE id = %s",
                     (creator_id,)
                 )
+                self.event_counts.on_created('pending')
+                self.invalidate_event_cache()
                 # 返回创建的事件
-                return self.get_event_detail(event_id)
+                event = self.get_event_detail(event_id)
+                if event:
+                    if self.search_index is not None:
+                        self.search_index.add(self._search_row(event))
+                    self.suggest_index.add(event)
+                return event
         except Exception as e:
             print(f"创建事件失败: {e}")
 
@@ -248,10 +652,18 @@ class SimpleDBService:
     
     # ===== Users 相关方法 =====
     
-    def get_users(self, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取用户列表"""
-        sql = "SELECT id, username, email, nickname, role, created_at FROM users ORDER BY created_at DESC LIMIT %s OFFSET %s"
-        return self.execute_query(sql, (limit, skip))
+    def get_users(self, skip: int = 0, limit: int = 10, cursor: str = None) -> List[Dict[str, Any]]:
+        """获取用户列表；传入cursor时按游标翻页并忽略skip"""
+        sql = "SELECT id, username, email, nickname, role, created_at FROM users"
+        params = []
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            sql += " WHERE " + keyset_condition()
+            params.extend([created_at, created_at, last_id])
+            skip = 0
+        sql += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
+        params.extend([limit, skip])
+        return self.execute_query(sql, tuple(params))
     
     def get_user_detail(self, user_id: int) -> Optional[Dict[str, Any]]:
         """获取用户详情"""
@@ -275,118 +687,477 @@ class SimpleDBService:
     
     # ===== Votes 相关方法 =====
     
-    def create_vote(self, event_id: int, user_id: int, stance: str, user_comment: str = None) -> bool:
-        """创建投票"""
-        sql = "INSERT INTO votes (event_id, user_id, stance, user_comment, created_at) VALUES (%s, %s, %s, %s, NOW())"
+    def create_vote(self, event_id: int, user_id: int, stance: str, user_comment: str = None) -> Optional[int]:
+        """创建投票，返回投票ID；用户已对该事件投过票时返回None
 
-        try:
-            vote_id = self.execute_update(sql, (event_id, user_id, stance, user_comment))
-            if vote_id:
+        依赖votes表的uk_event_user唯一键判重，投票记录、事件计数、用户统计以及
+        20票自动确认在同一个事务中一次往返完成，不存在先查后写的竞态窗口。
+        开启写回缓冲时投票记录和用户统计仍同步写入，事件计数与自动确认由缓冲批量写回。
+        """
+        support = 1 if stance == "support" else 0
+        statements = [
+            ("INSERT INTO votes (event_id, user_id, stance, user_comment, created_at) VALUES (%s, %s, %s, %s, NOW())",
+             (event_id, user_id, stance, user_comment)),
+            # 更新用户统计
+            ("UPDATE users SET votes_cast = votes_cast + 1 WHERE id = %s",
+             (user_id,)),
+        ]
+        if self.vote_buffer is not None:
+            # 读回投票时间：写回的投票趋势按数据库记录的投票分钟累加，与对账、删除投票使用同一个时钟
+            statements.append(("SELECT created_at FROM votes WHERE id = LAST_INSERT_ID()", None))
+        else:
+            statements += [
                 # 更新事件的投票统计
-                if stance == "support":
-                    self.execute_update(
-                        "UPDATE events SET vote_count = vote_count + 1, support_votes = support_votes + 1 WHERE id = %s",
-                        (event_id,)
-                    )
-                else:
-                    self.execute_update(
-                        "UPDATE events SET vote_count = vote_count + 1, oppose_votes = oppose_votes + 1 WHERE id = %s",
-                        (event_id,)
-                    )
-
-                # 更新用户统计
-                self.execute_update(
-                    "UPDATE users SET votes_cast = votes_cast + 1 WHERE id = %s",
-                    (user_id,)
+                ("UPDATE events SET vote_count = vote_count + 1, support_votes = support_votes + %s, "
+                 "oppose_votes = oppose_votes + %s WHERE id = %s",
+                 (support, 1 - support, event_id)),
+                # 达到投票阈值时自动转为确认状态（条件更新，不需要先查询）
+                ("UPDATE events SET status = 'confirmed' WHERE id = %s AND status = 'voting' AND vote_count >= %s",
+                 (event_id, CONFIRM_VOTE_THRESHOLD)),
+                # 累加到当前分钟的投票趋势
+                self._vote_rollup_statement({(event_id, None): [support, 1 - support]}),
+            ]
+        try:
+            results = self.execute_transaction(statements)
+        except pymysql.err.IntegrityError as e:
+            if e.args and e.args[0] == DUPLICATE_ENTRY_ERROR:
+                return None  # 已经投过票
+            raise
+
+        if self.vote_buffer is not None:
+            created_at = results[2]["rows"][0][0]
+            self.vote_buffer.add(event_id, support, 1 - support, created_at.replace(second=0, microsecond=0))
+        self.invalidate_event_cache(event_id)
+        self.event_bus.publish(event_id)
+        if self.vote_buffer is None and results[3]["rowcount"]:
+            print(f"事件 {event_id} 投票数达到阈值 ({CONFIRM_VOTE_THRESHOLD})，转为确认状态")
+            self._on_status_changed(event_id, 'voting', 'confirmed')
+        return results[0]["lastrowid"]
+
+    def _flush_vote_counters(self, deltas: Dict[int, List[int]], rollups: RollupDeltas):
+        """把写回缓冲中合并后的计数增量写入events表（由VoteCounterBuffer调用）
+
+        所有事件的计数用一条 CASE UPDATE 更新，投票趋势用一条多行upsert累加到各投票所在的分钟，
+        再逐个事件做达到阈值的条件确认，全部语句在同一个事务中一次往返完成。
+        """
+        event_ids = list(deltas)
+        cases = {column: [] for column in ("vote_count", "support_votes", "oppose_votes")}
+        params = {column: [] for column in cases}
+        for event_id in event_ids:
+            for column, value in zip(cases, deltas[event_id]):
+                cases[column].append("WHEN %s THEN %s")
+                params[column].extend([event_id, value])
+
+        placeholders = ", ".join(["%s"] * len(event_ids))
+        update_sql = "UPDATE events SET " + ", ".join(
+            f"{column} = {column} + CASE id {' '.join(cases[column])} ELSE 0 END" for column in cases
+        ) + f" WHERE id IN ({placeholders})"
+        update_params = tuple(params["vote_count"] + params["support_votes"] + params["oppose_votes"] + event_ids)
+
+        statements = [(update_sql, update_params), self._vote_rollup_statement(rollups)] + [
+            ("UPDATE events SET status = 'confirmed' WHERE id = %s AND status = 'voting' AND vote_count >= %s",
+             (event_id, CONFIRM_VOTE_THRESHOLD))
+            for event_id in event_ids
+        ]
+        results = self.execute_transaction(statements)
+
+        for event_id, result in zip(event_ids, results[2:]):
+            self.invalidate_event_cache(event_id)
+            # 投票时推送的是写回前的计数，写回后再推送一次
+            self.event_bus.publish(event_id)
+            if result["rowcount"]:
+                print(f"事件 {event_id} 投票数达到阈值 ({CONFIRM_VOTE_THRESHOLD})，转为确认状态")
+                self._on_status_changed(event_id, 'voting', 'confirmed')
+
+    @staticmethod
+    def _vote_rollup_statement(rollups: RollupDeltas) -> Tuple[str, tuple]:
+        """把 {(事件ID, 所在分钟): [支持票, 反对票]} 的增量累加到vote_rollups的一条多行upsert
+
+        所在分钟为None表示数据库的当前分钟（与投票记录在同一个事务中写入时使用）。
+        投票趋势总是和events表上的投票计数一起写入：未开启写回缓冲时在投票事务中，
+        开启时由写回缓冲批量写入，避免热门事件的同一分钟行成为新的锁争用点。
+        增量可以为负（删除投票）。
+        """
+        rows, params = [], []
+        for (event_id, minute), (support, oppose) in rollups.items():
+            if minute is None:
+                rows.append("(%s, NOW() - INTERVAL SECOND(NOW()) SECOND, %s, %s)")
+                params.extend((event_id, support, oppose))
+            else:
+                rows.append("(%s, %s, %s, %s)")
+                params.extend((event_id, minute, support, oppose))
+        sql = ("INSERT INTO vote_rollups (event_id, minute, support, oppose) VALUES " + ", ".join(rows)
+               + " ON DUPLICATE KEY UPDATE support = support + VALUES(support), oppose = oppose + VALUES(oppose)")
+        return sql, tuple(params)
+
+    def create_votes_bulk(self, votes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量投票，返回与输入一一对应的结果 {"index", "event_id", "user_id", "status", "reason"?}
+
+        status为accepted（已写入）、duplicate（已投过票或本批重复）或invalid（立场无效、
+        事件或用户不存在）。整批在一个事务中完成：用多行INSERT IGNORE写入新投票，不做加锁读，
+        由uk_event_user唯一键判重；每个事件的计数用一条UPDATE累加，用户统计与投票趋势各合并为
+        一条语句，投票阈值每个事件只检查一次。遇到死锁时整批重试（最多BULK_VOTE_DEADLOCK_RETRIES次）。
+        """
+        results = []
+        candidates = {}  # (event_id, user_id) -> 输入中首次出现的下标
+        for index, vote in enumerate(votes):
+            event_id, user_id, stance = vote["event_id"], vote["user_id"], vote["stance"]
+            result = {"index": index, "event_id": event_id, "user_id": user_id, "status": "accepted"}
+            if stance not in ("support", "oppose"):
+                result.update(status="invalid", reason="投票立场必须是 'support' 或 'oppose'")
+            elif (event_id, user_id) in candidates:
+                result.update(status="duplicate", reason="本批中重复的投票")
+            else:
+                candidates[(event_id, user_id)] = index
+            results.append(result)
+        if not candidates:
+            return results
+
+        for attempt in range(BULK_VOTE_DEADLOCK_RETRIES + 1):
+            try:
+                rejected, deltas, confirmed, minute = self._insert_votes_bulk(votes, candidates)
+                break
+            except pymysql.err.OperationalError as e:
+                if not e.args or e.args[0] != DEADLOCK_ERROR or attempt == BULK_VOTE_DEADLOCK_RETRIES:
+                    raise
+                # 死锁时事务已被回滚，整批重试即可
+                print(f"批量投票遇到死锁，第 {attempt + 1} 次重试")
+
+        for key, (status, reason) in rejected.items():
+            results[candidates[key]].update(status=status, reason=reason)
+
+        # 事务提交后再同步进程内状态
+        for event_id, (total, support, oppose) in deltas.items():
+            if self.vote_buffer is not None:
+                self.vote_buffer.add(event_id, support, oppose, minute)
+            self.invalidate_event_cache(event_id)
+            self.event_bus.publish(event_id)
+        for event_id in confirmed:
+            print(f"事件 {event_id} 投票数达到阈值 ({CONFIRM_VOTE_THRESHOLD})，转为确认状态")
+            self._on_status_changed(event_id, 'voting', 'confirmed')
+        return results
+
+    def _insert_votes_bulk(self, votes: List[Dict[str, Any]], candidates: Dict[Tuple[int, int], int]):
+        """在一个事务中写入批量投票，返回 (被拒绝的键 -> (status, reason), 按事件合并的增量, 转为确认的事件,
+        投票所在的分钟)；整批投票使用事务开始时读取的同一个数据库时间作为created_at
+
+        不使用SELECT ... FOR UPDATE：对不存在的键加锁读会取得间隙锁，两个批次在同一间隙上
+        各自持有间隙锁后再插入就会互相等待而死锁。改为先用普通读找出已有投票，再INSERT IGNORE，
+        写入行数与预期不一致（并发请求抢先写入了同一投票）时，重新读取本批的键：在可重复读隔离级别下
+        快照之后其他事务提交的投票不可见，读到的只有快照前已有的投票和本事务写入的投票。
+        """
+        def chunks(items):
+            for start in range(0, len(items), BULK_VOTE_CHUNK_SIZE):
+                yield items[start:start + BULK_VOTE_CHUNK_SIZE]
+
+        def select_existing(cursor, keys):
+            existing = set()
+            for chunk in chunks(keys):
+                cursor.execute(
+                    f"SELECT event_id, user_id FROM votes WHERE (event_id, user_id) IN "
+                    f"({', '.join(['(%s, %s)'] * len(chunk))})",
+                    [value for key in chunk for value in key]
+                )
+                existing.update((row["event_id"], row["user_id"]) for row in cursor.fetchall())
+            return existing
+
+        rejected = {}
+        confirmed = []
+        with self.transaction("BULK VOTES") as cursor:
+            cursor.execute("SELECT NOW() AS now")
+            now = cursor.fetchall()[0]["now"]
+            minute = now.replace(second=0, microsecond=0)
+
+            # 事件和用户必须存在，否则INSERT IGNORE会静默跳过外键不满足的行
+            event_ids = sorted({event_id for event_id, _ in candidates})
+            cursor.execute(f"SELECT id FROM events WHERE id IN ({', '.join(['%s'] * len(event_ids))})",
+                           event_ids)
+            known_events = {row["id"] for row in cursor.fetchall()}
+            user_ids = sorted({user_id for _, user_id in candidates})
+            cursor.execute(f"SELECT id FROM users WHERE id IN ({', '.join(['%s'] * len(user_ids))})",
+                           user_ids)
+            known_users = {row["id"] for row in cursor.fetchall()}
+            for key in candidates:
+                if key[0] not in known_events:
+                    rejected[key] = ("invalid", "事件不存在")
+                elif key[1] not in known_users:
+                    rejected[key] = ("invalid", "用户不存在")
+
+            # 普通读（不加锁），与上面的查询共用同一个快照
+            existing = select_existing(cursor, [key for key in candidates if key not in rejected])
+            for key in existing:
+                rejected[key] = ("duplicate", "已经投过票")
+
+            new_keys = [key for key in candidates if key not in rejected]
+            inserted = 0
+            for chunk in chunks(new_keys):
+                rows = [votes[candidates[key]] for key in chunk]
+                inserted += cursor.execute(
+                    "INSERT IGNORE INTO votes (event_id, user_id, stance, user_comment, created_at) VALUES "
+                    + ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows)),
+                    [value for vote in rows
+                     for value in (vote["event_id"], vote["user_id"], vote["stance"], vote.get("user_comment"), now)]
                 )
-                return True
-        except Exception as e:
-            print(f"创建投票失败: {e}")
-        
-        return False
-    
-    def get_event_votes(self, event_id: int, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取事件的投票列表"""
-        sql = """SELECT v.id, v.stance, v.user_comment, v.created_at,
-                        u.username, u.nickname
-                 FROM votes v
-                 LEFT JOIN users u ON v.user_id = u.id
-                 WHERE v.event_id = %s
-                 ORDER BY v.created_at DESC
-                 LIMIT %s OFFSET %s"""
 
-        return self.execute_query(sql, (event_id, limit, skip))
-    
-    # ===== Event Interests 相关方法 =====
+            if inserted != len(new_keys):
+                # 被忽略的行由并发请求写入，快照中看不到，重新读取到的才是本事务写入的
+                owned = select_existing(cursor, new_keys)
+                for key in new_keys:
+                    if key not in owned:
+                        rejected[key] = ("duplicate", "已经投过票")
+                new_keys = [key for key in new_keys if key in owned]
+
+            # 按事件合并计数增量
+            deltas: Dict[int, List[int]] = {}
+            per_user: Dict[int, int] = {}
+            for event_id, user_id in new_keys:
+                support = 1 if votes[candidates[(event_id, user_id)]]["stance"] == "support" else 0
+                delta = deltas.setdefault(event_id, [0, 0, 0])
+                delta[0] += 1
+                delta[1] += support
+                delta[2] += 1 - support
+                per_user[user_id] = per_user.get(user_id, 0) + 1
+
+            if per_user:
+                cursor.execute(
+                    "UPDATE users SET votes_cast = votes_cast + CASE id "
+                    + " ".join(["WHEN %s THEN %s"] * len(per_user))
+                    + f" ELSE 0 END WHERE id IN ({', '.join(['%s'] * len(per_user))})",
+                    [value for item in per_user.items() for value in item] + list(per_user)
+                )
 
-    def add_event_interest(self, event_id: int, user_id: int) -> bool:
-        """添加事件兴趣"""
-        try:
-            # 检查是否已经表示过兴趣
-            existing = self.execute_query(
-                "SELECT id FROM event_interests WHERE event_id = %s AND user_id = %s",
-                (event_id, user_id)
+            if self.vote_buffer is None:
+                for event_id, (total, support, oppose) in deltas.items():
+                    cursor.execute(
+                        "UPDATE events SET vote_count = vote_count + %s, support_votes = support_votes + %s, "
+                        "oppose_votes = oppose_votes + %s WHERE id = %s",
+                        (total, support, oppose, event_id)
+                    )
+                    if cursor.execute(
+                        "UPDATE events SET status = 'confirmed' WHERE id = %s AND status = 'voting' AND vote_count >= %s",
+                        (event_id, CONFIRM_VOTE_THRESHOLD)
+                    ):
+                        confirmed.append(event_id)
+                if deltas:
+                    cursor.execute(*self._vote_rollup_statement(
+                        {(event_id, minute): [support, oppose] for event_id, (_, support, oppose) in deltas.items()}))
+
+        return rejected, deltas, confirmed, minute
+
+    def delete_vote(self, vote_id: int, user_id: int) -> Optional[int]:
+        """删除用户自己的投票，返回投票所属的事件ID；投票不存在或不属于该用户时返回None
+
+        投票记录、事件计数、用户统计和投票所在分钟的投票趋势在同一个事务中修改。
+        开启写回缓冲时事件计数也在事务中同步扣减：删除很少发生，不必经过缓冲；
+        投票的增量若尚未写回，之后写回时会再加上，最终结果一致。
+        """
+        with self.transaction("DELETE_VOTE") as cursor:
+            cursor.execute(
+                "SELECT event_id, stance, created_at FROM votes WHERE id = %s AND user_id = %s FOR UPDATE",
+                (vote_id, user_id)
+            )
+            vote = cursor.fetchone()
+            if not vote:
+                return None
+            event_id = vote["event_id"]
+            support = 1 if vote["stance"] == "support" else 0
+            cursor.execute("DELETE FROM votes WHERE id = %s", (vote_id,))
+            cursor.execute(
+                "UPDATE events SET vote_count = vote_count - 1, support_votes = support_votes - %s, "
+                "oppose_votes = oppose_votes - %s WHERE id = %s",
+                (support, 1 - support, event_id)
             )
+            cursor.execute("UPDATE users SET votes_cast = votes_cast - 1 WHERE id = %s", (user_id,))
+            minute = vote["created_at"].replace(second=0, microsecond=0)
+            cursor.execute(*self._vote_rollup_statement({(event_id, minute): [-support, support - 1]}))
 
-            if existing:
-                return False  # 已经表示过兴趣
+        self.invalidate_event_cache(event_id)
+        self.event_bus.publish(event_id)
+        return event_id
 
-            # 添加兴趣记录
-            interest_id = self.execute_update(
-                "INSERT INTO event_interests (event_id, user_id, created_at) VALUES (%s, %s, NOW())",
-                (event_id, user_id)
-            )
+    def flush_vote_counters(self) -> int:
+        """立即写回缓冲中的投票计数，返回写回的票数；未开启写回缓冲时返回0"""
+        return self.vote_buffer.flush() if self.vote_buffer is not None else 0
+    
+    def get_vote_stats(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """从events表的冗余计数读取投票统计，不再扫描votes表；事件不存在时返回None
 
-            if interest_id:
-                # 更新事件的兴趣计数
-                self.execute_update(
-                    "UPDATE events SET interest_count = interest_count + 1 WHERE id = %s",
-                    (event_id,)
-                )
+        计数与votes表的偏差由后台对账任务修正（见 app/tasks/counter_reconciler.py）；
+        开启写回缓冲时返回已写回的计数，最多落后一个写回周期（vote_flush_interval_ms）。
+        """
+        event = self.get_event_detail(event_id, include=())
+        if not event:
+            return None
+        return self._vote_stats_from_event(event)
 
-                # 更新用户统计
-                self.execute_update(
-                    "UPDATE users SET interests_marked = interests_marked + 1 WHERE id = %s",
-                    (user_id,)
-                )
+    def _vote_stats_from_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        total = event["vote_count"]
+        support = event["support_votes"]
+        oppose = event["oppose_votes"]
+        return {
+            "total_votes": total,
+            "support_votes": support,
+            "oppose_votes": oppose,
+            "support_percentage": (support / total * 100) if total > 0 else 0,
+            "oppose_percentage": (oppose / total * 100) if total > 0 else 0
+        }
+
+    def get_event_counters(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """事件状态、关注数与投票统计的快照，用于实时推送；事件不存在时返回None"""
+        event = self.get_event_detail(event_id, include=())
+        if not event:
+            return None
+        return {
+            "event_id": event_id,
+            "status": event["status"],
+            "interest_count": event["interest_count"],
+            **self._vote_stats_from_event(event)
+        }
 
-                # 检查并更新事件状态
-                self.check_and_update_event_status(event_id)
+    def get_vote_trend(self, event_id: int, bucket: str = "1h", limit: int = 48) -> List[Dict[str, Any]]:
+        """最近limit个时间段的投票趋势 [{"time", "support", "oppose", "total"}]，按时间升序
+
+        从按分钟汇总的vote_rollups表按bucket（1m、1h、1d）聚合，查询量与时间段数相关，与票数无关；
+        没有投票的时间段不返回。开启写回缓冲时不包含尚未写回的投票。
+        """
+        if bucket not in VOTE_TREND_BUCKETS:
+            raise ValueError(f"bucket必须是 {', '.join(VOTE_TREND_BUCKETS)} 之一")
+        time_format, unit, _ = VOTE_TREND_BUCKETS[bucket]
+        rows = self._run_with_retry(
+            f"""SELECT DATE_FORMAT(minute, %s) AS bucket_start, SUM(support) AS support, SUM(oppose) AS oppose
+                FROM vote_rollups
+                WHERE event_id = %s AND minute >= STR_TO_DATE(DATE_FORMAT(NOW() - INTERVAL %s {unit}, %s), '%%Y-%%m-%%d %%H:%%i:%%s')
+                GROUP BY bucket_start ORDER BY bucket_start""",
+            (time_format, event_id, limit - 1, time_format)
+        )
+        return [
+            {"time": row["bucket_start"], "support": int(row["support"]), "oppose": int(row["oppose"]),
+             "total": int(row["support"]) + int(row["oppose"])}
+            for row in rows
+        ]
+
+    def get_event_votes(self, event_id: int, skip: int = 0, limit: int = 10,
+                        cursor: str = None) -> List[Dict[str, Any]]:
+        """获取事件的投票列表；传入cursor时按游标翻页并忽略skip"""
+        sql = """SELECT v.id, v.user_id, v.stance, v.user_comment, v.created_at,
+                        u.username, u.nickname
+                 FROM votes v
+                 LEFT JOIN users u ON v.user_id = u.id
+                 WHERE v.event_id = %s"""
+        params = [event_id]
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            sql += " AND " + keyset_condition('v')
+            params.extend([created_at, created_at, last_id])
+            skip = 0
+        sql += " ORDER BY v.created_at DESC, v.id DESC LIMIT %s OFFSET %s"
+        params.extend([limit, skip])
 
-                return True
+        return self.execute_query(sql, tuple(params))
+    
+    # ===== 幂等键持久化 =====
+
+    def _load_idempotent_response(self, scope: str, user_id: int, key: str) -> Optional[StoredResponse]:
+        """读取未过期的幂等键结果"""
+        rows = self._run_with_retry(
+            """SELECT request_hash, status_code, response_body FROM idempotency_keys
+               WHERE scope = %s AND user_id = %s AND idem_key = %s
+                 AND created_at > NOW() - INTERVAL %s SECOND""",
+            (scope, user_id, key, int(settings.idempotency_ttl))
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return row["request_hash"], row["status_code"], json.loads(row["response_body"])
+
+    def _save_idempotent_response(self, scope: str, user_id: int, key: str, stored: StoredResponse):
+        """保存幂等键结果；已过期的旧记录直接覆盖"""
+        request_hash, status_code, body = stored
+        self._run_with_retry(
+            """INSERT INTO idempotency_keys (scope, user_id, idem_key, request_hash, status_code, response_body)
+               VALUES (%s, %s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE request_hash = VALUES(request_hash), status_code = VALUES(status_code),
+                                       response_body = VALUES(response_body), created_at = CURRENT_TIMESTAMP""",
+            (scope, user_id, key, request_hash, status_code, json.dumps(body, ensure_ascii=False, default=str)),
+            fetch=False
+        )
+
+    def purge_idempotency_keys(self) -> int:
+        """删除过期的幂等键记录，返回删除的行数；未开启持久化时不执行"""
+        if not settings.idempotency_persist:
+            return 0
+        return self._run_with_retry(
+            "DELETE FROM idempotency_keys WHERE created_at < NOW() - INTERVAL %s SECOND",
+            (int(settings.idempotency_ttl),), fetch=False
+        )
 
-        except Exception as e:
-            print(f"添加事件兴趣失败: {e}")
+    # ===== Event Interests 相关方法 =====
 
-        return False
+    def add_event_interest(self, event_id: int, user_id: int) -> Optional[int]:
+        """添加事件兴趣，返回事件新的关注数；用户已对该事件表示过兴趣时返回None
 
-    def remove_event_interest(self, event_id: int, user_id: int) -> bool:
-        """移除事件兴趣"""
+        依赖event_interests表的uk_event_user唯一键判重，兴趣记录、事件关注数、用户统计以及
+        达到关注阈值后转为AI处理在同一个事务中一次往返完成。
+        关注数通过 LAST_INSERT_ID(expr) 随UPDATE一起返回，不需要再查询。
+        """
+        statements = [
+            ("INSERT INTO event_interests (event_id, user_id, created_at) VALUES (%s, %s, NOW())",
+             (event_id, user_id)),
+            ("UPDATE events SET interest_count = LAST_INSERT_ID(interest_count + 1) WHERE id = %s",
+             (event_id,)),
+            # 更新用户统计
+            ("UPDATE users SET interests_marked = interests_marked + 1 WHERE id = %s",
+             (user_id,)),
+            # 已提名的事件达到关注阈值时转为AI处理（条件更新，不需要先查询）
+            ("UPDATE events SET status = 'processing' WHERE id = %s AND status = 'nominated' AND interest_count >= %s",
+             (event_id, settings.interest_threshold)),
+        ]
         try:
-            # 删除兴趣记录
-            affected_rows = self.execute_update(
+            results = self.execute_transaction(statements)
+        except pymysql.err.IntegrityError as e:
+            if e.args and e.args[0] == DUPLICATE_ENTRY_ERROR:
+                return None  # 已经表示过兴趣
+            raise
+
+        interest_count = results[1]["lastrowid"]
+        self._on_interest_changed(event_id, interest_count)
+        if results[3]["rowcount"]:
+            print(f"事件 {event_id} 达到关注阈值 ({interest_count}/{settings.interest_threshold})，自动开始AI分析")
+            self._on_status_changed(event_id, 'nominated', 'processing')
+            self.start_ai_analysis_simulation(event_id)
+        return interest_count
+
+    def remove_event_interest(self, event_id: int, user_id: int) -> Optional[int]:
+        """移除事件兴趣，返回事件新的关注数；用户尚未对该事件表示兴趣时返回None
+
+        DELETE锁住兴趣记录后才更新计数，并发的重复取消只有一个会生效；
+        计数是否需要更新取决于DELETE的结果，因此使用交互式事务。
+        """
+        with self.transaction("REMOVE_EVENT_INTEREST") as cursor:
+            if not cursor.execute(
                 "DELETE FROM event_interests WHERE event_id = %s AND user_id = %s",
                 (event_id, user_id)
+            ):
+                return None
+            cursor.execute(
+                "UPDATE events SET interest_count = LAST_INSERT_ID(interest_count - 1) WHERE id = %s",
+                (event_id,)
+            )
+            interest_count = cursor.lastrowid
+            # 更新用户统计
+            cursor.execute(
+                "UPDATE users SET interests_marked = interests_marked - 1 WHERE id = %s",
+                (user_id,)
             )
 
-            if affected_rows > 0:
-                # 更新事件的兴趣计数
-                self.execute_update(
-                    "UPDATE events SET interest_count = interest_count - 1 WHERE id = %s",
-                    (event_id,)
-                )
-
-                # 更新用户统计
-                self.execute_update(
-                    "UPDATE users SET interests_marked = interests_marked - 1 WHERE id = %s",
-                    (user_id,)
-                )
-                return True
-
-        except Exception as e:
-            print(f"移除事件兴趣失败: {e}")
+        self._on_interest_changed(event_id, interest_count)
+        return interest_count
 
-        return False
+    def _on_interest_changed(self, event_id: int, interest_count: int):
+        """关注数变化后同步读缓存、联想词排序与实时推送"""
+        self.invalidate_event_cache(event_id)
+        self.suggest_index.set_score(event_id, interest_count)
+        self.event_bus.publish(event_id)
 
     def check_user_interest(self, event_id: int, user_id: int) -> bool:
         """检查用户是否对事件表示过兴趣"""
@@ -402,18 +1173,30 @@ class SimpleDBService:
 
     # ===== Event Status 相关方法 =====
 
-    def update_event_status(self, event_id: int, new_status: str) -> bool:
-        """更新事件状态"""
+    def update_event_status(self, event_id: int, new_status: str, from_status: str = None) -> bool:
+        """更新事件状态；指定from_status时仅当事件仍处于该状态才更新"""
         try:
-            affected_rows = self.execute_update(
-                "UPDATE events SET status = %s WHERE id = %s",
-                (new_status, event_id)
-            )
+            sql = "UPDATE events SET status = %s WHERE id = %s"
+            params = [new_status, event_id]
+            if from_status:
+                sql += " AND status = %s"
+                params.append(from_status)
+            affected_rows = self.execute_update(sql, tuple(params))
+            if affected_rows > 0:
+                self._on_status_changed(event_id, from_status, new_status)
             return affected_rows > 0
         except Exception as e:
             print(f"更新事件状态失败: {e}")
             return False
 
+    def _on_status_changed(self, event_id: int, old_status: Optional[str], new_status: str):
+        """事件状态变化后同步进程内的派生数据；old_status为None表示旧状态未知"""
+        self.event_counts.on_status_changed(old_status, new_status)
+        self.invalidate_event_cache(event_id)
+        if self.search_index is not None:
+            self.search_index.update_status(event_id, new_status)
+        self.event_bus.publish(event_id)
+
     def check_and_update_event_status(self, event_id: int, interest_threshold: int = 10) -> bool:
         """检查并自动更新事件状态"""
         try:
@@ -434,16 +1217,16 @@ class SimpleDBService:
             if current_status == 'nominated' and interest_count >= interest_threshold:
                 # 从已提名转为AI处理状态，自动触发AI分析
                 print(f"事件 {event_id} 达到关注阈值 ({interest_count}/{interest_threshold})，自动开始AI分析")
-                success = self.update_event_status(event_id, 'processing')
+                success = self.update_event_status(event_id, 'processing', from_status='nominated')
                 if success:
                     # 异步启动AI分析任务
                     self.start_ai_analysis_simulation(event_id)
                 return success
 
-            elif current_status == 'voting' and vote_count >= 20:
+            elif current_status == 'voting' and vote_count >= CONFIRM_VOTE_THRESHOLD:
                 # 投票达到20票后，自动转为确认状态
-                print(f"事件 {event_id} 投票数达到阈值 ({vote_count}/20)，转为确认状态")
-                return self.update_event_status(event_id, 'confirmed')
+                print(f"事件 {event_id} 投票数达到阈值 ({vote_count}/{CONFIRM_VOTE_THRESHOLD})，转为确认状态")
+                return self.update_event_status(event_id, 'confirmed', from_status='voting')
 
             return False
 
@@ -469,7 +1252,7 @@ class SimpleDBService:
                 return False
 
             # 更新状态为processing
-            success = self.update_event_status(event_id, 'processing')
+            success = self.update_event_status(event_id, 'processing', from_status='nominated')
             if success:
                 print(f"事件 {event_id} 开始AI处理")
                 # 启动AI分析模拟
@@ -510,7 +1293,7 @@ class SimpleDBService:
                 update_sql += ", ai_rating = %s"
                 params.append(ai_rating)
 
-            update_sql += " WHERE id = %s"
+            update_sql += " WHERE id = %s AND status = 'processing'"
             params.append(event_id)
 
             affected_rows = self.execute_update(update_sql, tuple(params))
@@ -518,6 +1301,7 @@ class SimpleDBService:
 
             if success:
                 print(f"事件 {event_id} AI处理完成，进入投票阶段")
+                self._on_status_changed(event_id, 'processing', 'voting')
 
             return success
 
@@ -552,12 +1336,8 @@ class SimpleDBService:
                 ai_ratings = ['reliable', 'questionable', 'unreliable', 'insufficient']
                 ai_rating = random.choice(ai_ratings)
 
-                # 在线程中重新建立数据库连接
-                from app.services.simple_db_service import SimpleDBService
-                thread_db = SimpleDBService()
-                if not thread_db.connect():
-                    print(f"线程中数据库连接失败")
-                    return
+                # 连接池是线程安全的，后台线程直接复用当前服务实例
+                thread_db = self
 
                 # 填充10条模拟的兴趣数据
                 thread_db.fill_simulation_interests(event_id)
@@ -573,8 +1353,6 @@ class SimpleDBService:
                 else:
                     print(f"事件 {event_id} AI分析完成但状态更新失败")
 
-                thread_db.close()
-
             except Exception as e:
                 print(f"AI分析模拟失败: {e}")
                 import traceback
@@ -725,6 +1503,7 @@ class SimpleDBService:
                          source["content"], source["ai_summary"], source["relevance_score"])
                     )
 
+            self.invalidate_event_cache(event_id)
             print(f"已为事件 {event_id} 填充5条模拟来源信息")
 
         except Exception as e:
@@ -732,28 +1511,127 @@ class SimpleDBService:
 
     # ===== Search 相关方法 =====
 
-    def search_events(self, query: str = "", limit: int = 10) -> List[Dict[str, Any]]:
-        """搜索事件"""
+    @staticmethod
+    def _search_row(event: Dict[str, Any]) -> Dict[str, Any]:
+        """事件详情结构 -> 倒排索引的行：创建者的用户名和昵称提到顶层，与搜索SQL的列一致"""
+        creator = event.get("creator") or {}
+        return {**event, "username": creator.get("username"), "nickname": creator.get("nickname")}
+
+    def build_search_index(self) -> Optional[Dict[str, Any]]:
+        """从events表全量构建进程内倒排索引，返回构建统计；未启用或失败时返回None"""
+        if self.search_index is None:
+            return None
+        try:
+            # 以数据库时间为准记录构建起点，之后的增量刷新从这里开始
+            synced_at = self._run_with_retry("SELECT NOW() AS now")[0]["now"]
+            stats = self.search_index.build(self.stream_query(SEARCH_INDEX_SQL))
+            self._search_index_synced_at = synced_at
+            return stats
+        except Exception as e:
+            print(f"构建搜索索引失败，搜索将使用数据库: {e}")
+            return None
+
+    def refresh_search_index(self) -> Optional[int]:
+        """把上次构建/刷新以来events表中新增或修改的事件（updated_at变化）写入倒排索引，返回刷新的事件数
+
+        索引按进程维护，其他worker创建的事件、状态流转以及直接修改数据库的脚本只能由这里同步；
+        查询范围向前多取SEARCH_INDEX_REFRESH_OVERLAP秒，覆盖提交晚于updated_at的事务。
+        索引未构建时返回None。
+        """
+        if self.search_index is None or self._search_index_synced_at is None:
+            return None
+        synced_at = self._run_with_retry("SELECT NOW() AS now")[0]["now"]
+        refreshed = 0
+        for row in self.stream_query(
+                SEARCH_INDEX_SQL + " WHERE e.updated_at >= %s - INTERVAL %s SECOND",
+                (self._search_index_synced_at, SEARCH_INDEX_REFRESH_OVERLAP)):
+            self.search_index.add(row)
+            refreshed += 1
+        self._search_index_synced_at = synced_at
+        return refreshed
+
+    def build_suggest_index(self) -> Optional[Dict[str, Any]]:
+        """从events表全量构建联想词索引，返回构建统计；失败时返回None"""
+        sql = "SELECT id, title, keywords, interest_count FROM events"
+        try:
+            return self.suggest_index.build(self.stream_query(sql))
+        except Exception as e:
+            print(f"构建联想词索引失败: {e}")
+            return None
+
+    def suggest_events(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """搜索框联想：返回以prefix开头的事件标题和关键词"""
+        return self.suggest_index.suggest(prefix, limit)
+
+    def search_events(self, query: str = "", limit: int = 10, status: str = None) -> List[Dict[str, Any]]:
+        """搜索事件：依次尝试进程内倒排索引、FULLTEXT(ngram)索引，最后退回LIKE"""
+        query = (query or "").strip()
         if not query:
             # 如果没有查询词，返回最新的事件
             sql = """SELECT e.id, e.title, e.description, e.keywords, e.status, 
                             e.created_at, u.username, u.nickname
                      FROM events e
-                     LEFT JOIN users u ON e.creator_id = u.id
-                     ORDER BY e.created_at DESC
-                     LIMIT %s"""
-            return self.execute_query(sql, (limit,))
-        else:
-            # 在标题、描述和关键词中搜索
-            search_term = f"%{query}%"
-            sql = """SELECT e.id, e.title, e.description, e.keywords, e.status, 
-                            e.created_at, u.username, u.nickname
-                     FROM events e
-                     LEFT JOIN users u ON e.creator_id = u.id
-                     WHERE e.title LIKE %s OR e.description LIKE %s OR e.keywords LIKE %s
-                     ORDER BY e.created_at DESC
-                     LIMIT %s"""
-            return self.execute_query(sql, (search_term, search_term, search_term, limit))
+                     LEFT JOIN users u ON e.creator_id = u.id"""
+            params = []
+            if status:
+                sql += " WHERE e.status = %s"
+                params.append(status)
+            sql += " ORDER BY e.created_at DESC LIMIT %s"
+            params.append(limit)
+            return self.execute_query(sql, tuple(params))
+
+        # 单个汉字等索引中没有词条的查询，继续走下面的数据库搜索
+        if self.search_index is not None and self.search_index.ready and self.search_index.can_search(query):
+            return self.search_index.search(query, limit, status)
+
+        # ngram分词最短为ngram_token_size（默认2），更短的词全文索引匹配不到
+        if self.fulltext_available and len(query) >= NGRAM_TOKEN_SIZE:
+            try:
+                return self._search_events_fulltext(query, limit, status)
+            except pymysql.err.MySQLError as e:
+                if e.args and e.args[0] == FULLTEXT_INDEX_MISSING_ERROR:
+                    # 索引缺失不会自己恢复，之后直接走LIKE，执行升级脚本后重启即可
+                    print("events表缺少全文索引 ft_events_text，搜索退回LIKE")
+                    self.fulltext_available = False
+                else:
+                    print(f"全文搜索失败，退回LIKE: {e}")
+
+        return self._search_events_like(query, limit, status)
+
+    def _search_events_fulltext(self, query: str, limit: int, status: str = None) -> List[Dict[str, Any]]:
+        """MATCH ... AGAINST 自然语言模式，按相关度降序"""
+        sql = """SELECT e.id, e.title, e.description, e.keywords, e.status, 
+                        e.created_at, u.username, u.nickname,
+                        MATCH(e.title, e.description, e.keywords) AGAINST (%s IN NATURAL LANGUAGE MODE) AS relevance
+                 FROM events e
+                 LEFT JOIN users u ON e.creator_id = u.id
+                 WHERE MATCH(e.title, e.description, e.keywords) AGAINST (%s IN NATURAL LANGUAGE MODE)"""
+        params = [query, query]
+        if status:
+            sql += " AND e.status = %s"
+            params.append(status)
+        sql += " ORDER BY relevance DESC, e.created_at DESC LIMIT %s"
+        params.append(limit)
+        rows = self._run_with_retry(sql, tuple(params), fetch=True)
+        for row in rows:
+            row['relevance'] = float(row['relevance'] or 0)
+        return rows
+
+    def _search_events_like(self, query: str, limit: int, status: str = None) -> List[Dict[str, Any]]:
+        """在标题、描述和关键词中模糊搜索（全表扫描，仅作为兜底）"""
+        search_term = f"%{query}%"
+        sql = """SELECT e.id, e.title, e.description, e.keywords, e.status, 
+                        e.created_at, u.username, u.nickname
+                 FROM events e
+                 LEFT JOIN users u ON e.creator_id = u.id
+                 WHERE (e.title LIKE %s OR e.description LIKE %s OR e.keywords LIKE %s)"""
+        params = [search_term, search_term, search_term]
+        if status:
+            sql += " AND e.status = %s"
+            params.append(status)
+        sql += " ORDER BY e.created_at DESC LIMIT %s"
+        params.append(limit)
+        return self.execute_query(sql, tuple(params))
 
 # 创建全局数据库服务实例
 db_service = SimpleDBService()
\ No newline at end of file
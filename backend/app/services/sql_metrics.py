@@ -0,0 +1,234 @@
+"""
+SQL执行统计
+按归一化后的SQL指纹聚合每条语句的执行次数、延迟分位数、返回行数和错误数，
+记录慢查询，并输出Prometheus文本格式供 /metrics 抓取
+"""
+
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+# 字面量替换为?之后的词法单元：(前面是否有空白, 单元)
+_TOKEN_RE = re.compile(r"(\s*)(\w+|\?|[(),;]|`[^`]*`|[^\w\s(),;?`]+)")
+
+
+def _tokenize(text: str) -> list:
+    """拆成词法单元，括号内的部分嵌套为 (前导空白, [子单元...]) 的分组"""
+    root: list = []
+    stack = [root]
+    for space, token in _TOKEN_RE.findall(text):
+        if token == "(":
+            group: list = []
+            stack[-1].append((space, group))
+            stack.append(group)
+        elif token == ")" and len(stack) > 1:
+            stack.pop()
+        else:
+            stack[-1].append((space, token))
+    return root
+
+
+def _is_word(token) -> bool:
+    return isinstance(token, str) and (token[0].isalnum() or token[0] in "_`")
+
+
+def _has_word(items: list, word: str) -> bool:
+    return any(_has_word(token, word) if isinstance(token, list) else token.upper() == word
+               for _, token in items)
+
+
+def _render(items: list) -> str:
+    """输出归一化的SQL，同时折叠变长部分：
+    IN (...) 列表（含 IN ((?, ?), ...) 元组列表，子查询除外）、INSERT的多行VALUES
+    （行内可以有NOW()等函数调用；ON DUPLICATE KEY UPDATE中的VALUES(col)不折叠）、
+    连续的 WHEN ? THEN ? 分支
+    """
+    out = []
+    prev: list = []  # 已输出的最近两个单元
+    i = 0
+    while i < len(items):
+        space, token = items[i]
+        lead = " " if space else ""
+        if isinstance(token, list):
+            keyword = prev[-1].upper() if prev and isinstance(prev[-1], str) else ""
+            values_list = keyword == "VALUES" and (len(prev) < 2 or _is_word(prev[-2]) or prev[-2] == ")")
+            if (keyword == "IN" and not _has_word(token, "SELECT")) or values_list:
+                out.append(lead + "(...)")
+                i += 1
+                # 多行VALUES的后续行
+                while values_list and i + 1 < len(items) and items[i][1] == "," \
+                        and isinstance(items[i + 1][1], list):
+                    i += 2
+            else:
+                out.append(lead + "(" + _render(token).strip() + ")")
+                i += 1
+            prev = (prev + [")"])[-2:]
+            continue
+        if token.upper() == "WHEN" and [t for _, t in items[i + 1:i + 4]] == ["?", "THEN", "?"]:
+            i += 4
+            while i + 3 < len(items) and isinstance(items[i][1], str) and items[i][1].upper() == "WHEN" \
+                    and [t for _, t in items[i + 1:i + 4]] == ["?", "THEN", "?"]:
+                i += 4
+            out.append(lead + "WHEN ? THEN ? ...")
+            prev = (prev + ["?"])[-2:]
+            continue
+        out.append(lead + token)
+        prev = (prev + [token])[-2:]
+        i += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """把SQL归一化为指纹：去掉注释，字面量和占位符替换为?，折叠IN列表、多行VALUES与CASE分支；
+    execute_transaction拼接的多条语句中，连续重复的语句只保留一条"""
+    text = _COMMENT_RE.sub(" ", sql)
+    text = _STRING_RE.sub("?", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    statements: List[str] = []
+    for statement in _render(_tokenize(text)).split(";"):
+        statement = " ".join(statement.split())
+        if not statement:
+            continue
+        # 事务中逐个事件执行的同一条语句只保留一条，批量大小不同的事务得到同一个指纹
+        if not statements or statements[-1] != statement:
+            statements.append(statement)
+    return "; ".join(statements)
+
+
+class _StatementStats:
+    """单个SQL指纹的累计统计"""
+
+    __slots__ = ("count", "errors", "rows", "total_time", "max_time", "samples")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        # 最近若干次耗时，用于计算分位数
+        self.samples = deque(maxlen=sample_size)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class SQLMetrics:
+    """线程安全的SQL执行统计"""
+
+    def __init__(self, slow_query_ms: float = 200, sample_size: int = 1024,
+                 max_fingerprints: int = 500, enabled: bool = True):
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self.max_fingerprints = max_fingerprints
+        self.enabled = enabled
+        self.slow_queries = 0
+        self._stats: Dict[str, _StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, elapsed: float, rows: int = 0, error: bool = False, params: Any = None):
+        """记录一次语句执行；elapsed为秒"""
+        if not self.enabled:
+            return
+        fp = fingerprint(sql)
+
+        slow = elapsed * 1000 >= self.slow_query_ms
+        if slow:
+            params_text = repr(params)
+            if len(params_text) > 200:
+                params_text = params_text[:200] + "..."
+            print(f"慢查询 {elapsed * 1000:.1f}ms: {fp} 参数: {params_text}")
+
+        with self._lock:
+            stats = self._stats.get(fp)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    fp = "(other)"
+                    stats = self._stats.get(fp)
+                if stats is None:
+                    stats = self._stats[fp] = _StatementStats(self.sample_size)
+            stats.count += 1
+            stats.rows += rows or 0
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if error:
+                stats.errors += 1
+            stats.samples.append(elapsed)
+            if slow:
+                self.slow_queries += 1
+
+    def snapshot(self, limit: int = None) -> List[Dict[str, Any]]:
+        """按累计耗时降序返回各SQL指纹的统计（耗时单位毫秒）"""
+        with self._lock:
+            items = [(fp, s.count, s.errors, s.rows, s.total_time, s.max_time, sorted(s.samples))
+                     for fp, s in self._stats.items()]
+
+        result = []
+        for fp, count, errors, rows, total_time, max_time, samples in items:
+            result.append({
+                "fingerprint": fp,
+                "count": count,
+                "errors": errors,
+                "rows": rows,
+                "total_ms": round(total_time * 1000, 3),
+                "avg_ms": round(total_time * 1000 / count, 3) if count else 0,
+                "p50_ms": round(_percentile(samples, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+                "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+                "max_ms": round(max_time * 1000, 3),
+            })
+        result.sort(key=lambda item: item["total_ms"], reverse=True)
+        return result[:limit] if limit else result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.slow_queries = 0
+
+    def prometheus(self) -> str:
+        """Prometheus文本格式的SQL统计"""
+        lines = [
+            "# HELP truthmirror_sql_duration_seconds SQL statement latency by fingerprint",
+            "# TYPE truthmirror_sql_duration_seconds summary",
+        ]
+        rows_lines = [
+            "# HELP truthmirror_sql_rows_total Rows returned or affected by fingerprint",
+            "# TYPE truthmirror_sql_rows_total counter",
+        ]
+        error_lines = [
+            "# HELP truthmirror_sql_errors_total Failed statements by fingerprint",
+            "# TYPE truthmirror_sql_errors_total counter",
+        ]
+        for item in self.snapshot():
+            label = f'fingerprint="{_escape_label(item["fingerprint"])}"'
+            for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'truthmirror_sql_duration_seconds{{{label},quantile="{q}"}} {item[key] / 1000:.6f}')
+            lines.append(f"truthmirror_sql_duration_seconds_sum{{{label}}} {item['total_ms'] / 1000:.6f}")
+            lines.append(f"truthmirror_sql_duration_seconds_count{{{label}}} {item['count']}")
+            rows_lines.append(f"truthmirror_sql_rows_total{{{label}}} {item['rows']}")
+            error_lines.append(f"truthmirror_sql_errors_total{{{label}}} {item['errors']}")
+
+        lines += rows_lines + error_lines
+        lines += [
+            "# HELP truthmirror_sql_slow_queries_total Statements slower than the slow query threshold",
+            "# TYPE truthmirror_sql_slow_queries_total counter",
+            f"truthmirror_sql_slow_queries_total {self.slow_queries}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
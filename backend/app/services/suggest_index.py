@@ -0,0 +1,191 @@
+"""
+搜索联想索引
+把事件标题和逗号分隔的关键词（统一转小写）存入有序数组，用bisect二分定位前缀区间，
+候选按事件的关注数（interest_count）取前k个并按前缀缓存，整个过程不访问数据库
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+# 关键词分隔符：半角/全角逗号、顿号
+_KEYWORD_SPLIT_RE = re.compile(r"[,，、]")
+
+# 每个前缀缓存的联想词数，不小于接口的limit上限（api/search.py 的 MAX_SUGGESTIONS）
+TOP_K = 20
+
+# 最多缓存的前缀数，超过时淘汰最久未使用的前缀
+MAX_CACHED_PREFIXES = 4096
+
+# 缓存的联想词：(关注数, 小写文本, 原文, 类型, 事件ID)
+Suggestion = Tuple[int, str, str, str, int]
+
+
+def _completions(row: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """一个事件可提供的联想词：(类型, 原文)"""
+    items = []
+    title = (row.get("title") or "").strip()
+    if title:
+        items.append(("title", title))
+    for keyword in _KEYWORD_SPLIT_RE.split(row.get("keywords") or ""):
+        keyword = keyword.strip()
+        if keyword:
+            items.append(("keyword", keyword))
+    return items
+
+
+class SuggestIndex:
+    """线程安全的前缀联想索引
+
+    前缀第一次被查询时扫描完整的前缀区间，结果（前TOP_K个）按前缀缓存；新增事件和关注数变化时
+    增量更新已缓存的前缀，关注数下降且该事件在某前缀的结果中时删除该前缀的缓存，下次查询重新扫描。
+    """
+
+    def __init__(self):
+        # 有序条目 (小写文本, 原文, 类型, 事件ID)
+        self._entries: List[Tuple[str, str, str, int]] = []
+        # 事件ID -> 关注数
+        self._scores: Dict[int, int] = {}
+        # 事件ID -> 该事件的联想词 [(小写文本, 原文, 类型)]
+        self._event_entries: Dict[int, List[Tuple[str, str, str]]] = {}
+        # 前缀 -> 按关注数降序的前TOP_K个联想词，同一文本只保留关注数最高的一条
+        self._top: "OrderedDict[str, List[Suggestion]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.ready = False
+
+        # 统计信息
+        self.scans = 0
+        self.cache_hits = 0
+
+    def build(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """用全部事件重建索引，返回构建统计"""
+        started = time.perf_counter()
+        entries = []
+        scores = {}
+        event_entries = {}
+        for row in rows:
+            scores[row["id"]] = row.get("interest_count") or 0
+            event_entries[row["id"]] = [(text.lower(), text, kind) for kind, text in _completions(row)]
+            entries.extend((lowered, text, kind, row["id"]) for lowered, text, kind in event_entries[row["id"]])
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._scores = scores
+            self._event_entries = event_entries
+            self._top.clear()
+            self.ready = True
+
+        return {
+            "entries": len(entries),
+            "events": len(scores),
+            "build_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def add(self, row: Dict[str, Any]):
+        """新建事件后插入其标题和关键词"""
+        event_id = row["id"]
+        score = row.get("interest_count") or 0
+        with self._lock:
+            self._scores[event_id] = score
+            self._event_entries[event_id] = [(text.lower(), text, kind) for kind, text in _completions(row)]
+            for lowered, text, kind in self._event_entries[event_id]:
+                bisect.insort(self._entries, (lowered, text, kind, event_id))
+                self._offer_locked((score, lowered, text, kind, event_id))
+
+    def set_score(self, event_id: int, interest_count: int):
+        """关注数变化后更新排序分数（传入事务中读到的最新关注数）"""
+        with self._lock:
+            old = self._scores.get(event_id)
+            if old is None or old == interest_count:
+                return
+            self._scores[event_id] = interest_count
+            for lowered, text, kind in self._event_entries.get(event_id, ()):
+                if interest_count > old:
+                    self._offer_locked((interest_count, lowered, text, kind, event_id))
+                    continue
+                # 分数下降：该事件在结果中时，区间内其他联想词可能超过它，删除缓存等下次重新扫描
+                for prefix in self._cached_prefixes_locked(lowered):
+                    if any(item[4] == event_id and item[1] == lowered for item in self._top[prefix]):
+                        del self._top[prefix]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """返回以prefix开头的联想词，按对应事件关注数降序；同一文本只保留关注数最高的事件"""
+        prefix = (prefix or "").strip().lower()
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            if limit > TOP_K:
+                top = self._scan_locked(prefix, limit)
+            else:
+                top = self._top.get(prefix)
+                if top is None:
+                    top = self._scan_locked(prefix, TOP_K)
+                    self._top[prefix] = top
+                    if len(self._top) > MAX_CACHED_PREFIXES:
+                        self._top.popitem(last=False)
+                else:
+                    self._top.move_to_end(prefix)
+                    self.cache_hits += 1
+                top = top[:limit]
+
+        return [
+            {"text": text, "type": kind, "event_id": event_id, "interest_count": score}
+            for score, _, text, kind, event_id in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ready": self.ready, "entries": len(self._entries), "events": len(self._scores),
+                    "cached_prefixes": len(self._top), "scans": self.scans, "cache_hits": self.cache_hits}
+
+    # ===== 内部方法（调用方需持有锁） =====
+
+    def _scan_locked(self, prefix: str, k: int) -> List[Suggestion]:
+        """扫描完整的前缀区间，返回按关注数降序的前k个联想词"""
+        self.scans += 1
+        entries = self._entries
+        best: Dict[str, Suggestion] = {}
+        for index in range(bisect.bisect_left(entries, (prefix,)), len(entries)):
+            lowered, text, kind, event_id = entries[index]
+            if not lowered.startswith(prefix):
+                break
+            score = self._scores.get(event_id, 0)
+            current = best.get(lowered)
+            if current is None or score > current[0]:
+                best[lowered] = (score, lowered, text, kind, event_id)
+        return heapq.nlargest(k, best.values(), key=lambda item: item[0])
+
+    def _cached_prefixes_locked(self, lowered: str) -> List[str]:
+        """lowered的前缀中已缓存的前缀"""
+        return [lowered[:length] for length in range(1, len(lowered) + 1) if lowered[:length] in self._top]
+
+    def _offer_locked(self, suggestion: Suggestion):
+        """新增联想词或分数上升后，更新包含它的各前缀缓存"""
+        score, lowered, _, _, event_id = suggestion
+        for prefix in self._cached_prefixes_locked(lowered):
+            top = self._top[prefix]
+            for index, item in enumerate(top):
+                if item[1] == lowered:
+                    if item[4] != event_id and item[0] >= score:
+                        break  # 同一文本已有关注数更高的事件
+                    del top[index]
+                    self._insert(top, suggestion)
+                    break
+            else:
+                if len(top) < TOP_K or score > top[-1][0]:
+                    self._insert(top, suggestion)
+                    del top[TOP_K:]
+
+    @staticmethod
+    def _insert(top: List[Suggestion], suggestion: Suggestion):
+        """按关注数降序插入，同分时排在已有条目之后"""
+        index = 0
+        while index < len(top) and top[index][0] >= suggestion[0]:
+            index += 1
+        top.insert(index, suggestion)
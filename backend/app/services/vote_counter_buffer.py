@@ -0,0 +1,153 @@
+"""
+投票计数写回缓冲（write-behind）
+热门事件的每一票都对events表同一行执行 vote_count = vote_count + 1，行锁争用成为瓶颈。
+开启后投票记录仍然同步插入，事件上的计数增量先在内存中按事件合并，
+每隔flush_interval_ms毫秒或累计max_pending_votes票时由后台线程用一条UPDATE批量写回；
+投票趋势的增量按(事件, 投票所在分钟)合并，写回时累加到投票所在的分钟而不是写回时的分钟
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# 事件ID -> [总票数, 支持票, 反对票] 的增量
+Deltas = Dict[int, List[int]]
+# (事件ID, 所在分钟) -> [支持票, 反对票] 的增量
+RollupDeltas = Dict[Tuple[int, datetime], List[int]]
+
+
+class VoteCounterBuffer:
+    """按事件合并投票计数增量，后台定期写回"""
+
+    def __init__(self, flush_func: Callable[[Deltas, RollupDeltas], None], flush_interval_ms: float = 200,
+                 max_pending_votes: int = 500, is_outcome_unknown: Callable[[Exception], bool] = None):
+        # flush_func把一批增量写入数据库，失败时抛出异常
+        self._flush_func = flush_func
+        # 判断写回失败时事务是否可能已经提交（如COMMIT的回复丢失），此时丢弃增量而不是放回重试，
+        # 避免同一批增量被写入两次；丢弃造成的计数偏差由计数器对账任务按明细表修正
+        self._is_outcome_unknown = is_outcome_unknown
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending_votes = max_pending_votes
+        self._deltas: Deltas = {}
+        self._rollups: RollupDeltas = {}
+        self._pending_votes = 0
+        self._lock = threading.Lock()
+        # 保证同一时间只有一个线程在写回，失败回填时不会和下一次写回交错
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self.flushes = 0
+        self.flushed_votes = 0
+        self.flush_errors = 0
+        self.dropped_votes = 0
+
+    def add(self, event_id: int, support: int, oppose: int, minute: datetime):
+        """记录计数增量：support/oppose为新增的支持票与反对票数（单次投票时为1和0）
+
+        minute为投票所在的分钟，取自数据库记录的投票时间（votes.created_at），
+        不使用应用服务器的时钟，否则与数据库的时钟或时区偏差会让增量记到错误的分钟
+        """
+        self._ensure_started()
+        with self._lock:
+            delta = self._deltas.setdefault(event_id, [0, 0, 0])
+            delta[0] += support + oppose
+            delta[1] += support
+            delta[2] += oppose
+            rollup = self._rollups.setdefault((event_id, minute), [0, 0])
+            rollup[0] += support
+            rollup[1] += oppose
+            self._pending_votes += support + oppose
+            full = self._pending_votes >= self.max_pending_votes
+        if full:
+            self._wakeup.set()
+
+    def pending_event_ids(self) -> Set[int]:
+        """有尚未写回增量的事件ID"""
+        with self._lock:
+            return set(self._deltas)
+
+    def flush(self) -> int:
+        """立即写回所有增量，返回写回的票数；写回失败时增量放回缓冲，等待下次重试（结果未知时丢弃）"""
+        with self._flush_lock:
+            return self._flush_locked()
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """先写回所有增量，然后在with块内暂停写回
+
+        块内新增的增量只留在缓冲中，写回失败的增量也会留下，调用方用pending_event_ids()
+        找出这些事件；按明细表对账投票计数时据此跳过它们，避免同一票既被对账计入又被之后的写回计入。
+        """
+        with self._flush_lock:
+            self._flush_locked()
+            yield
+
+    def _flush_locked(self) -> int:
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            rollups, self._rollups = self._rollups, {}
+            votes, self._pending_votes = self._pending_votes, 0
+        if not deltas:
+            return 0
+        try:
+            self._flush_func(deltas, rollups)
+        except Exception as e:
+            self.flush_errors += 1
+            if self._is_outcome_unknown is not None and self._is_outcome_unknown(e):
+                print(f"投票计数写回结果未知，丢弃 {votes} 票的增量，由计数器对账修正: {e}")
+                self.dropped_votes += votes
+                return 0
+            print(f"投票计数写回失败，稍后重试: {e}")
+            with self._lock:
+                for event_id, (total, support, oppose) in deltas.items():
+                    delta = self._deltas.setdefault(event_id, [0, 0, 0])
+                    delta[0] += total
+                    delta[1] += support
+                    delta[2] += oppose
+                for key, (support, oppose) in rollups.items():
+                    rollup = self._rollups.setdefault(key, [0, 0])
+                    rollup[0] += support
+                    rollup[1] += oppose
+                self._pending_votes += votes
+            return 0
+        self.flushes += 1
+        self.flushed_votes += votes
+        return votes
+
+    def stop(self):
+        """停止后台线程并写回剩余增量"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending_votes, pending_events = self._pending_votes, len(self._deltas)
+        return {
+            "pending_votes": pending_votes,
+            "pending_events": pending_events,
+            "flushes": self.flushes,
+            "flushed_votes": self.flushed_votes,
+            "flush_errors": self.flush_errors,
+            "dropped_votes": self.dropped_votes,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="vote-counter-flusher", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,383 @@
+"""
+计数器对账任务
+events表与users表上的冗余计数（投票数、关注数、用户的投票/关注/创建事件数）由多条
+互相独立的UPDATE维护，部分失败后会与明细表产生偏差。本任务在后台定期按明细表重新统计：
+按主键ID分段，每段先用一条集合式SELECT找出有偏差的行，只有存在偏差时才执行一条
+集合式UPDATE修正，避免长时间锁表，并报告修正的行数与偏差量。
+按分钟汇总的投票趋势（vote_rollups）同样按votes表重新统计最近一段时间内已结束的分钟
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config import settings
+from ..services.simple_db_service import db_service, SimpleDBService
+
+
+class CounterSpec:
+    """一组由同一张明细表统计出来的计数列
+
+    source是按ref_id分组的统计子查询，带两个 %s 作为ref_id的范围；
+    counters是要修正的计数列，子查询中的统计列与其同名。
+    quiet_column不为空时，跳过该列在最近几秒内更新过的行（可能有进行中的写入）；
+    quiet_detail不为空时，跳过明细表中最近几秒内有新记录的行，它是以t.id关联明细表、
+    带一个 %s 作为秒数的EXISTS子查询。
+    write_behind为True表示计数可能有写回缓冲中尚未写回的增量，对账时跳过这些行。
+    """
+
+    def __init__(self, name: str, table: str, counters: Tuple[str, ...], source: str,
+                 quiet_column: Optional[str] = None, quiet_detail: Optional[str] = None,
+                 write_behind: bool = False):
+        self.name = name
+        self.table = table
+        self.counters = counters
+        self.source = source
+        self.quiet_column = quiet_column
+        self.quiet_detail = quiet_detail
+        self.write_behind = write_behind
+
+    def _join(self) -> str:
+        return f"{self.table} t LEFT JOIN ({self.source}) s ON s.ref_id = t.id"
+
+    def _where(self, skipped: int) -> str:
+        mismatch = " OR ".join(f"t.{col} <> COALESCE(s.{col}, 0)" for col in self.counters)
+        sql = "WHERE t.id BETWEEN %s AND %s"
+        if self.quiet_column:
+            sql += f" AND t.{self.quiet_column} < NOW() - INTERVAL %s SECOND"
+        if self.quiet_detail:
+            sql += f" AND NOT EXISTS ({self.quiet_detail})"
+        if skipped:
+            sql += f" AND t.id NOT IN ({', '.join(['%s'] * skipped)})"
+        return sql + f" AND ({mismatch})"
+
+    def select_drift_sql(self, skipped: int = 0) -> str:
+        drift = " + ".join(f"ABS(t.{col} - COALESCE(s.{col}, 0))" for col in self.counters)
+        return f"SELECT t.id, {drift} AS drift FROM {self._join()} {self._where(skipped)}"
+
+    def update_sql(self, skipped: int = 0) -> str:
+        assignments = ", ".join(f"t.{col} = COALESCE(s.{col}, 0)" for col in self.counters)
+        return f"UPDATE {self._join()} SET {assignments} {self._where(skipped)}"
+
+    def params(self, start: int, end: int, quiet_seconds: int, skip_ids: Tuple[int, ...] = ()) -> tuple:
+        params = (start, end, start, end)
+        if self.quiet_column:
+            params += (quiet_seconds,)
+        if self.quiet_detail:
+            params += (quiet_seconds,)
+        return params + tuple(skip_ids)
+
+
+COUNTER_SPECS: List[CounterSpec] = [
+    CounterSpec(
+        "event_votes", "events", ("vote_count", "support_votes", "oppose_votes"),
+        """SELECT event_id AS ref_id, COUNT(*) AS vote_count,
+                  SUM(stance = 'support') AS support_votes, SUM(stance = 'oppose') AS oppose_votes
+           FROM votes WHERE event_id BETWEEN %s AND %s GROUP BY event_id""",
+        quiet_column="updated_at",
+        # 开启写回缓冲时投票不更新events.updated_at，用投票时间判断是否有进行中的写入：
+        # 刚提交、还没加入缓冲的投票已计入COUNT(*)，对账后再写回会被重复计入
+        quiet_detail="""SELECT 1 FROM votes v
+                        WHERE v.event_id = t.id AND v.created_at >= NOW() - INTERVAL %s SECOND""",
+        write_behind=True
+    ),
+    CounterSpec(
+        "event_interests", "events", ("interest_count",),
+        """SELECT event_id AS ref_id, COUNT(*) AS interest_count
+           FROM event_interests WHERE event_id BETWEEN %s AND %s GROUP BY event_id""",
+        quiet_column="updated_at"
+    ),
+    # users表没有updated_at，与对账同时发生的写入可能被覆盖，下一轮会再修正
+    CounterSpec(
+        "user_votes", "users", ("votes_cast",),
+        """SELECT user_id AS ref_id, COUNT(*) AS votes_cast
+           FROM votes WHERE user_id BETWEEN %s AND %s GROUP BY user_id"""
+    ),
+    CounterSpec(
+        "user_interests", "users", ("interests_marked",),
+        """SELECT user_id AS ref_id, COUNT(*) AS interests_marked
+           FROM event_interests WHERE user_id BETWEEN %s AND %s GROUP BY user_id"""
+    ),
+    CounterSpec(
+        "user_events", "users", ("events_created",),
+        """SELECT creator_id AS ref_id, COUNT(*) AS events_created
+           FROM events WHERE creator_id BETWEEN %s AND %s GROUP BY creator_id"""
+    ),
+]
+
+
+# NOW()往前若干秒（%s）所在分钟的起点
+_MINUTE_AGO = "DATE_FORMAT(NOW() - INTERVAL %s SECOND, '%%Y-%%m-%%d %%H:%%i:00')"
+
+# 多进程之间互斥执行对账的MySQL命名锁
+RECONCILE_LOCK_NAME = "truthmirror_counter_reconciler"
+
+# task_runs表中记录对账完成时间的任务名；各进程共用这条记录，不论哪个进程执行了对账
+RECONCILE_TASK_NAME = "counter_reconciler"
+
+# 读取task_runs中的完成时间后，这么多秒内直接复用，轮询接口不会每次都多一次查询
+LAST_RUN_CACHE_SECONDS = 10
+
+# 首轮之后投票趋势只对账最近的 2 * interval + ROLLUP_WINDOW_MARGIN 秒，首轮对账全部历史
+ROLLUP_WINDOW_MARGIN = 3600
+
+
+class CounterReconciler:
+    """后台计数器对账，interval秒执行一轮"""
+
+    def __init__(self, db: SimpleDBService, interval: float = 300, batch_size: int = 1000,
+                 quiet_seconds: int = 5, specs: List[CounterSpec] = None, db_lock: bool = False):
+        self.db = db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.quiet_seconds = quiet_seconds
+        self.specs = specs if specs is not None else COUNTER_SPECS
+        # 每个uvicorn worker都会启动对账任务，db_lock为True时用MySQL命名锁让各进程轮流执行
+        self.db_lock = db_lock
+        self.skipped_runs = 0
+        # 最近一次成功对账（任意进程）的完成时间，来自task_runs表
+        self.last_reconciled_at: Optional[datetime] = None
+        self._last_run_loaded = 0.0
+        # 本进程是否已完成过一轮对账（首轮对账全部历史的投票趋势）
+        self._has_run = False
+        self.last_report: Dict[str, Any] = {}
+        # 启动以来累计修正的偏差量
+        self.total_drift_corrected = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+    def reconcile(self, spec: CounterSpec, skip: Callable[[], Set[int]] = None) -> Dict[str, int]:
+        """按明细表修正一组计数，返回 {"rows": 修正行数, "drift": 偏差总量}
+
+        skip返回本轮需要跳过的行ID，每段对账前重新获取
+        """
+        bounds = self.db._run_with_retry(f"SELECT MIN(id) AS min_id, MAX(id) AS max_id FROM {spec.table}")
+        result = {"rows": 0, "drift": 0}
+        if not bounds or bounds[0]["min_id"] is None:
+            return result
+
+        for start in range(bounds[0]["min_id"], bounds[0]["max_id"] + 1, self.batch_size):
+            end = start + self.batch_size - 1
+            skip_ids = tuple(sorted(row_id for row_id in skip() if start <= row_id <= end)) if skip else ()
+            select_sql, update_sql = spec.select_drift_sql(len(skip_ids)), spec.update_sql(len(skip_ids))
+            params = spec.params(start, end, self.quiet_seconds, skip_ids)
+            drifted = self.db._run_with_retry(select_sql, params)
+            if not drifted:
+                continue
+            # 两条语句之间又有写入时UPDATE以当时的统计为准，偏差量只作参考
+            result["rows"] += self.db._run_with_retry(update_sql, params, fetch=False)
+            result["drift"] += sum(int(row["drift"]) for row in drifted)
+        return result
+
+    def reconcile_rollups(self, window_seconds: Optional[int] = None,
+                          skip: Callable[[], Set[int]] = None) -> Dict[str, int]:
+        """按votes表修正vote_rollups，返回 {"rows": 修正行数, "drift": 偏差票数}
+
+        写回丢弃的增量、部分失败的写入都会让投票趋势与明细不一致。
+        只对账截止到quiet_seconds之前、已经结束的分钟；window_seconds不为空时只对账最近这么多秒，
+        skip返回需要跳过的事件ID（有尚未写回增量的事件）。
+        """
+        bounds = self.db._run_with_retry("SELECT MIN(id) AS min_id, MAX(id) AS max_id FROM events")
+        result = {"rows": 0, "drift": 0}
+        if not bounds or bounds[0]["min_id"] is None:
+            return result
+
+        for start in range(bounds[0]["min_id"], bounds[0]["max_id"] + 1, self.batch_size):
+            end = start + self.batch_size - 1
+            skip_ids = tuple(sorted(row_id for row_id in skip() if start <= row_id <= end)) if skip else ()
+
+            def conditions(table: str, time_column: str) -> Tuple[str, tuple]:
+                """事件分段、[窗口起点, 截止分钟)、跳过的事件"""
+                sql = f"{table}.event_id BETWEEN %s AND %s AND {table}.{time_column} < {_MINUTE_AGO}"
+                params = (start, end, self.quiet_seconds)
+                if window_seconds is not None:
+                    sql += f" AND {table}.{time_column} >= {_MINUTE_AGO}"
+                    params += (window_seconds,)
+                if skip_ids:
+                    sql += f" AND {table}.event_id NOT IN ({', '.join(['%s'] * len(skip_ids))})"
+                    params += skip_ids
+                return sql, params
+
+            where, source_params = conditions("v", "created_at")
+            source = f"""SELECT v.event_id, v.created_at - INTERVAL SECOND(v.created_at) SECOND AS minute,
+                                SUM(v.stance = 'support') AS support, SUM(v.stance = 'oppose') AS oppose
+                         FROM votes v WHERE {where} GROUP BY v.event_id, minute"""
+            # 统计值与汇总行不一致或缺少汇总行
+            mismatch = f"""FROM ({source}) s
+                LEFT JOIN vote_rollups r ON r.event_id = s.event_id AND r.minute = s.minute
+                WHERE r.event_id IS NULL OR r.support <> s.support OR r.oppose <> s.oppose"""
+            # 对应分钟已经没有投票的汇总行（投票被删除）
+            where, rollup_params = conditions("r", "minute")
+            stale = f"""vote_rollups r
+                LEFT JOIN ({source}) s ON s.event_id = r.event_id AND s.minute = r.minute
+                WHERE {where} AND s.event_id IS NULL"""
+            stale_params = source_params + rollup_params
+
+            mismatched = self.db._run_with_retry(
+                "SELECT ABS(s.support - COALESCE(r.support, 0)) + ABS(s.oppose - COALESCE(r.oppose, 0)) AS drift "
+                + mismatch, source_params)
+            if mismatched:
+                # 外层派生表给新值起别名，ON DUPLICATE KEY UPDATE中引用时不与vote_rollups的列重名
+                self.db._run_with_retry(
+                    "INSERT INTO vote_rollups (event_id, minute, support, oppose) SELECT * FROM ("
+                    f"SELECT s.event_id, s.minute, s.support AS new_support, s.oppose AS new_oppose {mismatch}"
+                    ") fix ON DUPLICATE KEY UPDATE support = new_support, oppose = new_oppose",
+                    source_params, fetch=False)
+            stale_rows = self.db._run_with_retry(
+                f"SELECT ABS(r.support) + ABS(r.oppose) AS drift FROM {stale}", stale_params)
+            if stale_rows:
+                self.db._run_with_retry(f"DELETE r FROM {stale}", stale_params, fetch=False)
+
+            drifted = list(mismatched) + list(stale_rows)
+            result["rows"] += len(drifted)
+            result["drift"] += sum(int(row["drift"]) for row in drifted)
+        return result
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[bool]:
+        """在整轮对账期间持有MySQL命名锁，返回是否取得；锁绑定在连接上，整轮都占用同一条连接"""
+        if not self.db_lock:
+            yield True
+            return
+        conn = self.db.pool.checkout()
+        acquired = False
+        discard = False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0)", (RECONCILE_LOCK_NAME,))
+                acquired = cursor.fetchone()[0] == 1
+            yield acquired
+        except Exception:
+            discard = True
+            raise
+        finally:
+            if acquired and not discard:
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT RELEASE_LOCK(%s)", (RECONCILE_LOCK_NAME,))
+                except Exception:
+                    # 释放失败时丢弃连接，连接关闭后服务器会释放它持有的命名锁
+                    discard = True
+            self.db.pool.checkin(conn, discard=discard)
+
+    def get_last_reconciled_at(self) -> Optional[datetime]:
+        """最近一次成功对账的完成时间，不论由哪个进程执行；LAST_RUN_CACHE_SECONDS秒内复用上次读取的结果"""
+        if time.monotonic() - self._last_run_loaded >= LAST_RUN_CACHE_SECONDS:
+            self._load_last_run()
+        return self.last_reconciled_at
+
+    def _load_last_run(self):
+        try:
+            rows = self.db._run_with_retry("SELECT finished_at FROM task_runs WHERE name = %s",
+                                           (RECONCILE_TASK_NAME,))
+            if rows:
+                self.last_reconciled_at = rows[0]["finished_at"]
+        except Exception as e:
+            # 未执行升级脚本（没有task_runs表）时只能报告本进程的对账时间
+            print(f"读取对账完成时间失败: {e}")
+        self._last_run_loaded = time.monotonic()
+
+    def _save_last_run(self):
+        """持有命名锁时记录本轮的完成时间（数据库时间），再读回供本进程使用"""
+        try:
+            self.db._run_with_retry(
+                "INSERT INTO task_runs (name, finished_at) VALUES (%s, NOW()) "
+                "ON DUPLICATE KEY UPDATE finished_at = VALUES(finished_at)",
+                (RECONCILE_TASK_NAME,), fetch=False)
+        except Exception as e:
+            print(f"记录对账完成时间失败: {e}")
+        self._load_last_run()
+
+    def run_once(self) -> Dict[str, Any]:
+        """执行一轮对账并返回报告；其他进程正在对账时跳过本轮，返回上一轮的报告"""
+        with self._run_lock, self._exclusive() as acquired:
+            if not acquired:
+                self.skipped_runs += 1
+                # 本轮由其他进程执行，完成时间以task_runs中的记录为准
+                self._load_last_run()
+                return self.last_report
+            started = time.perf_counter()
+            counters = {}
+            buffer = self.db.vote_buffer
+            for spec in self.specs:
+                if spec.write_behind and buffer is not None:
+                    # 对账期间暂停写回：先写回已有增量，对账中新增或写回失败的增量留在缓冲中，
+                    # 跳过这些事件，否则同一票会被对账和之后的写回各计入一次
+                    with buffer.paused():
+                        counters[spec.name] = self.reconcile(spec, skip=buffer.pending_event_ids)
+                else:
+                    counters[spec.name] = self.reconcile(spec)
+                if counters[spec.name]["rows"]:
+                    print(f"计数器对账 {spec.name}：修正 {counters[spec.name]['rows']} 行，"
+                          f"偏差 {counters[spec.name]['drift']}")
+
+            # 首轮对账全部历史，之后只对账最近一段时间
+            window = None if not self._has_run else \
+                int(max(self.interval, 0) * 2 + ROLLUP_WINDOW_MARGIN)
+            if buffer is not None:
+                with buffer.paused():
+                    rollups = self.reconcile_rollups(window, skip=buffer.pending_event_ids)
+            else:
+                rollups = self.reconcile_rollups(window)
+            if rollups["rows"]:
+                print(f"投票趋势对账：修正 {rollups['rows']} 行，偏差 {rollups['drift']}")
+
+            drift = sum(item["drift"] for item in counters.values()) + rollups["drift"]
+            if any(item["rows"] for item in counters.values()):
+                # 计数变化的事件未知，整体失效读缓存
+                self.db.event_detail_cache.clear()
+                self.db.invalidate_event_cache()
+            self.total_drift_corrected += drift
+
+            self._has_run = True
+            self.last_reconciled_at = datetime.now()
+            self._save_last_run()
+            self.last_report = {
+                "counters": counters,
+                "rollups": rollups,
+                "drift": drift,
+                "total_drift_corrected": self.total_drift_corrected,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                "finished_at": self.last_reconciled_at.isoformat(),
+            }
+            return self.last_report
+
+    def start(self):
+        """启动后台对账线程；interval<=0时不启动"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="counter-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        # 启动后先等一个周期，避免和启动时的索引构建争抢连接
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"计数器对账失败: {e}")
+            # 顺带清理过期的幂等键记录
+            try:
+                purged = self.db.purge_idempotency_keys()
+                if purged:
+                    print(f"清理过期幂等键 {purged} 条")
+            except Exception as e:
+                print(f"清理幂等键失败: {e}")
+
+
+# 全局对账任务实例
+counter_reconciler = CounterReconciler(
+    db_service,
+    interval=settings.counter_reconcile_interval,
+    batch_size=settings.counter_reconcile_batch_size,
+    db_lock=settings.counter_reconcile_db_lock
+)
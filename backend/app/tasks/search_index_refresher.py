@@ -0,0 +1,54 @@
+"""
+搜索索引增量刷新任务
+进程内倒排索引只在启动时全量构建，本进程的写操作会增量维护索引，但其他uvicorn worker
+创建的事件、状态流转以及直接修改数据库的脚本不会经过本进程。本任务在后台定期按
+events.updated_at把变化的事件同步进索引
+"""
+
+import threading
+from typing import Optional
+
+from ..config import settings
+from ..services.simple_db_service import db_service, SimpleDBService
+
+
+class SearchIndexRefresher:
+    """后台增量刷新倒排索引，interval秒执行一次"""
+
+    def __init__(self, db: SimpleDBService, interval: float = 30):
+        self.db = db
+        self.interval = interval
+        self.last_refreshed: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台刷新线程；interval<=0或未启用倒排索引时不启动"""
+        if self.interval <= 0 or self.db.search_index is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="search-index-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.db._search_index_synced_at is None:
+                    # 启动时构建失败（数据库暂不可用），搜索走数据库，这里重试全量构建
+                    self.db.build_search_index()
+                else:
+                    self.last_refreshed = self.db.refresh_search_index()
+            except Exception as e:
+                print(f"刷新搜索索引失败: {e}")
+
+
+# 全局刷新任务实例
+search_index_refresher = SearchIndexRefresher(
+    db_service,
+    interval=settings.search_index_refresh_interval
+)
@@ -0,0 +1,26 @@
+"""
+响应压缩
+GZipMiddleware会把响应体攒到minimum_size才开始压缩并分块发送，流式接口（NDJSON导出、SSE）
+的数据因此被缓冲、延迟到达；这些路径直接跳过压缩
+"""
+
+import re
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """路径匹配exclude_paths中任一正则时不压缩，其余请求与GZipMiddleware行为一致"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9,
+                 exclude_paths: Iterable[str] = ()):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_paths = [re.compile(pattern) for pattern in exclude_paths]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and any(pattern.match(scope["path"]) for pattern in self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
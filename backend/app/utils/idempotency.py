@@ -0,0 +1,55 @@
+"""
+写接口的幂等键处理
+请求头带 Idempotency-Key 时，同一用户用同一个键重复请求同一接口，直接返回第一次请求的响应
+（响应头 Idempotent-Replayed: true），不再执行写操作；不带该请求头时行为不变
+"""
+
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from ..services.idempotency_store import IdempotencyError, MAX_IDEMPOTENCY_KEY_LENGTH, request_fingerprint
+from ..services.simple_db_service import db_service
+from .json_response import json_response
+
+
+async def idempotent(scope: str, user_id: int, key: Optional[str], request_parts: tuple,
+                     handler: Callable[[], Awaitable[Any]], status_code: int = 200) -> Any:
+    """以幂等方式执行handler
+
+    request_parts是决定请求内容的参数，同一个键用于不同内容时返回422；同一个键的请求仍在处理中时返回409。
+    handler成功或返回4xx错误时保存结果供重试时重放；5xx错误不保存，客户端可以用同一个键重试。
+    """
+    if not key:
+        return await handler()
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key长度不能超过{MAX_IDEMPOTENCY_KEY_LENGTH}")
+
+    store = db_service.idempotency_store
+    fingerprint = request_fingerprint(*request_parts)
+    try:
+        # 开启持久化时可能查询数据库，放到线程池中执行
+        stored = await run_in_threadpool(store.reserve, scope, user_id, key, fingerprint)
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if stored is not None:
+        stored_status, body = stored
+        response = json_response(body, status_code=stored_status)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    try:
+        body = await handler()
+    except HTTPException as e:
+        if e.status_code < 500:
+            await run_in_threadpool(store.complete, scope, user_id, key, fingerprint,
+                                    e.status_code, {"detail": e.detail})
+        else:
+            store.release(scope, user_id, key)
+        raise
+    except BaseException:
+        store.release(scope, user_id, key)
+        raise
+    await run_in_threadpool(store.complete, scope, user_id, key, fingerprint, status_code, body)
+    return json_response(body, status_code=status_code)
@@ -0,0 +1,56 @@
+"""
+JSON响应
+默认使用orjson序列化（比标准库json快数倍），并统一处理datetime、Decimal等数据库返回类型；
+未安装orjson时退回标准库json，行为保持一致
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson是可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """orjson/json无法直接序列化的类型"""
+    if isinstance(obj, Decimal):
+        # 如信息源的relevance_score
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if isinstance(obj, (datetime, date, time)):
+        # 仅在标准库json下走到这里，orjson原生支持
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为UTF-8字节；字典的非字符串键（如事件ID）转为字符串"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """应用的默认响应类"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """直接构造响应，跳过FastAPI对返回值逐层调用jsonable_encoder的开销，用于大响应体接口
+
+    response为路由注入的Response时，沿用其上已设置的响应头（如ETag）。
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,42 @@
+"""
+游标（keyset）分页工具
+游标对外是不透明字符串，内部编码最后一行的 (created_at, id)，
+下一页使用 WHERE (created_at, id) < (游标值) 定位，翻页深度不再影响查询代价
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """把 (created_at, id) 编码为游标字符串"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat(sep=' ')
+    raw = f"{created_at}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标字符串，格式不正确时抛出ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """根据本页最后一行生成下一页游标；本页不满时说明没有更多数据"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last['created_at'], last['id'])
+
+
+def keyset_condition(alias: str = '') -> str:
+    """按 created_at DESC, id DESC 排序时的“下一页”条件，参数为 (created_at, created_at, id)"""
+    prefix = f"{alias}." if alias else ''
+    return (f"({prefix}created_at < %s OR "
+            f"({prefix}created_at = %s AND {prefix}id < %s))")
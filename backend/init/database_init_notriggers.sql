@@ -39,7 +39,8 @@ CREATE TABLE `users` (
     `last_login_at` TIMESTAMP DEFAULT NULL COMMENT '最后登录时间',
     
     INDEX `idx_username` (`username`),
-    INDEX `idx_email` (`email`)
+    INDEX `idx_email` (`email`),
+    INDEX `idx_created_id` (`created_at`, `id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户表';
 
 -- =====================================================
@@ -73,7 +74,11 @@ CREATE TABLE `events` (
     FOREIGN KEY (`creator_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
     INDEX `idx_title` (`title`),
     INDEX `idx_status` (`status`),
-    INDEX `idx_creator_id` (`creator_id`)
+    INDEX `idx_creator_id` (`creator_id`),
+    INDEX `idx_status_created_id` (`status`, `created_at`, `id`),
+    INDEX `idx_created_id` (`created_at`, `id`),
+    INDEX `idx_updated_at` (`updated_at`),
+    FULLTEXT INDEX `ft_events_text` (`title`, `description`, `keywords`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='事件表';
 
 -- =====================================================
@@ -123,9 +128,49 @@ CREATE TABLE `votes` (
     
     FOREIGN KEY (`event_id`) REFERENCES `events`(`id`) ON DELETE CASCADE,
     FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
-    UNIQUE KEY `uk_event_user` (`event_id`, `user_id`)
+    UNIQUE KEY `uk_event_user` (`event_id`, `user_id`),
+    INDEX `idx_event_created_id` (`event_id`, `created_at`, `id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户投票表';
 
+-- =====================================================
+-- 6. 幂等键结果表 (idempotency_keys) - 开启IDEMPOTENCY_PERSIST时使用
+-- =====================================================
+CREATE TABLE `idempotency_keys` (
+    `scope` VARCHAR(32) NOT NULL COMMENT '接口（vote、interest）',
+    `user_id` INT NOT NULL COMMENT '用户ID',
+    `idem_key` VARCHAR(128) NOT NULL COMMENT '客户端提供的幂等键',
+    `request_hash` CHAR(40) NOT NULL COMMENT '请求内容指纹',
+    `status_code` SMALLINT NOT NULL COMMENT '第一次请求的响应状态码',
+    `response_body` TEXT NOT NULL COMMENT '第一次请求的响应体（JSON）',
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+
+    PRIMARY KEY (`scope`, `user_id`, `idem_key`),
+    INDEX `idx_created_at` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='写接口幂等键结果表';
+
+-- =====================================================
+-- 7. 投票趋势表 (vote_rollups) - 随投票按分钟累加，供趋势图按时间段聚合
+-- =====================================================
+CREATE TABLE `vote_rollups` (
+    `event_id` INT NOT NULL COMMENT '事件ID',
+    `minute` DATETIME NOT NULL COMMENT '所在分钟（秒数为0）',
+    `support` INT NOT NULL DEFAULT 0 COMMENT '该分钟的支持票数',
+    `oppose` INT NOT NULL DEFAULT 0 COMMENT '该分钟的反对票数',
+
+    PRIMARY KEY (`event_id`, `minute`),
+    FOREIGN KEY (`event_id`) REFERENCES `events`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='按分钟汇总的投票趋势表';
+
+-- =====================================================
+-- 8. 后台任务执行记录表 (task_runs) - 多进程共享计数器对账的完成时间
+-- =====================================================
+CREATE TABLE `task_runs` (
+    `name` VARCHAR(64) NOT NULL COMMENT '任务名',
+    `finished_at` TIMESTAMP NOT NULL COMMENT '最近一次成功执行的完成时间',
+
+    PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='后台任务执行记录表';
+
 -- =====================================================
 -- 插入初始数据
 -- =====================================================
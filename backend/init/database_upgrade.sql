@@ -0,0 +1,84 @@
+-- =====================================================
+-- 真相之镜数据库升级脚本
+-- 用于已经用 database_init_notriggers.sql 初始化过的数据库，
+-- 按顺序执行尚未执行过的小节即可（新库直接执行初始化脚本，无需本脚本）
+-- =====================================================
+
+USE `truthmirror`;
+
+-- =====================================================
+-- 1. 游标分页索引：支持 ORDER BY created_at DESC, id DESC 的keyset翻页
+-- =====================================================
+ALTER TABLE `users`
+    ADD INDEX `idx_created_id` (`created_at`, `id`);
+
+ALTER TABLE `events`
+    ADD INDEX `idx_status_created_id` (`status`, `created_at`, `id`),
+    ADD INDEX `idx_created_id` (`created_at`, `id`);
+
+ALTER TABLE `votes`
+    ADD INDEX `idx_event_created_id` (`event_id`, `created_at`, `id`);
+
+-- =====================================================
+-- 2. 全文搜索索引：ngram解析器支持中文分词，供 MATCH ... AGAINST 按相关度搜索
+--    （ngram_token_size 使用默认值2；未建索引时搜索会自动退回LIKE）
+-- =====================================================
+ALTER TABLE `events`
+    ADD FULLTEXT INDEX `ft_events_text` (`title`, `description`, `keywords`) WITH PARSER ngram;
+
+-- =====================================================
+-- 3. 幂等键结果表：开启 IDEMPOTENCY_PERSIST 时保存写接口第一次请求的响应，
+--    进程重启或多进程部署时重试请求仍能命中
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `idempotency_keys` (
+    `scope` VARCHAR(32) NOT NULL COMMENT '接口（vote、interest）',
+    `user_id` INT NOT NULL COMMENT '用户ID',
+    `idem_key` VARCHAR(128) NOT NULL COMMENT '客户端提供的幂等键',
+    `request_hash` CHAR(40) NOT NULL COMMENT '请求内容指纹',
+    `status_code` SMALLINT NOT NULL COMMENT '第一次请求的响应状态码',
+    `response_body` TEXT NOT NULL COMMENT '第一次请求的响应体（JSON）',
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+
+    PRIMARY KEY (`scope`, `user_id`, `idem_key`),
+    INDEX `idx_created_at` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='写接口幂等键结果表';
+
+-- =====================================================
+-- 4. 投票趋势表：按分钟汇总投票数，趋势查询不再扫描votes表；
+--    建表后用votes表的统计回填（覆盖已有的分钟行，可重复执行）
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `vote_rollups` (
+    `event_id` INT NOT NULL COMMENT '事件ID',
+    `minute` DATETIME NOT NULL COMMENT '所在分钟（秒数为0）',
+    `support` INT NOT NULL DEFAULT 0 COMMENT '该分钟的支持票数',
+    `oppose` INT NOT NULL DEFAULT 0 COMMENT '该分钟的反对票数',
+
+    PRIMARY KEY (`event_id`, `minute`),
+    FOREIGN KEY (`event_id`) REFERENCES `events`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='按分钟汇总的投票趋势表';
+
+INSERT INTO `vote_rollups` (`event_id`, `minute`, `support`, `oppose`)
+SELECT `event_id`,
+       `created_at` - INTERVAL SECOND(`created_at`) SECOND AS `minute`,
+       SUM(`stance` = 'support'),
+       SUM(`stance` = 'oppose')
+FROM `votes`
+GROUP BY `event_id`, `minute`
+ON DUPLICATE KEY UPDATE `support` = VALUES(`support`), `oppose` = VALUES(`oppose`);
+
+-- =====================================================
+-- 5. 事件更新时间索引：进程内搜索索引按 updated_at 增量刷新其他进程的修改
+-- =====================================================
+ALTER TABLE `events`
+    ADD INDEX `idx_updated_at` (`updated_at`);
+
+-- =====================================================
+-- 6. 后台任务执行记录表：计数器对账的完成时间由执行对账的进程写入，
+--    其他worker读取同一条记录，接口返回的last_reconciled_at不再因进程而异
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `task_runs` (
+    `name` VARCHAR(64) NOT NULL COMMENT '任务名',
+    `finished_at` TIMESTAMP NOT NULL COMMENT '最近一次成功执行的完成时间',
+
+    PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='后台任务执行记录表';
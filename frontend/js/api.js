@@ -70,11 +70,12 @@ class TruthMirrorAPI {
 
     // 获取事件列表
     async getEvents(params = {}) {
-        const { skip = 0, limit = 10, status = '', _t = null } = params;
+        const { skip = 0, limit = 10, status = '', fields = '', _t = null } = params;
         const queryParams = new URLSearchParams();
         if (skip) queryParams.append('skip', skip);
         if (limit) queryParams.append('limit', limit);
         if (status) queryParams.append('status', status);
+        if (fields) queryParams.append('fields', fields); // 只返回需要的字段，如 title,status,vote_count
         if (_t) queryParams.append('_t', _t); // 缓存破坏参数
         
         const endpoint = `/events/?${queryParams}`;
@@ -101,6 +102,12 @@ class TruthMirrorAPI {
         });
     }
 
+    // 批量获取事件详情，返回 { events: {id: 事件}, missing: [不存在的ID] }
+    async getEventsBatch(eventIds) {
+        const ids = encodeURIComponent(eventIds.join(','));
+        return await this.apiCall(`/events/batch?ids=${ids}`, { method: 'GET' });
+    }
+
     // 创建新事件
     async createEvent(eventData) {
         // 从localStorage获取当前用户信息
@@ -225,6 +232,36 @@ class TruthMirrorAPI {
         });
     }
 
+    // 获取投票趋势，bucket为时间粒度（1m、1h、1d），limit为最近多少个时间段
+    async getVoteTrend(eventId, params = {}) {
+        const { bucket = '1h', limit = 48 } = params;
+        const queryParams = new URLSearchParams({ bucket, limit });
+        return await this.apiCall(`/events/${eventId}/votes/trend?${queryParams}`, {
+            method: 'GET'
+        });
+    }
+
+    // 订阅事件实时更新（SSE），onUpdate收到 {event_id, status, interest_count, total_votes, ...}
+    // 连接被关闭且不再重连时调用onClosed（调用方可退回轮询）
+    // 返回EventSource，调用方不再需要时调用 close()
+    subscribeEventUpdates(eventId, onUpdate, onClosed) {
+        const source = new EventSource(`${this.baseUrl}/events/${eventId}/stream`);
+        source.addEventListener('counters', (e) => {
+            try {
+                onUpdate(JSON.parse(e.data));
+            } catch (err) {
+                console.error('解析实时更新失败:', err);
+            }
+        });
+        // 网络中断时浏览器会自动重连；服务端拒绝（非200响应等）时连接被关闭，不再重试
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED && onClosed) {
+                onClosed();
+            }
+        };
+        return source;
+    }
+
     // 获取投票统计
     async getVoteStats(eventId) {
         return await this.apiCall(`/votes/stats/${eventId}`, {
@@ -249,6 +286,12 @@ class TruthMirrorAPI {
 
     // ===== 搜索和AI分析API =====
 
+    // 搜索框联想词，返回 { prefix, suggestions: [{text, type, event_id, interest_count}] }
+    async suggestEvents(prefix, limit = 10) {
+        const queryParams = new URLSearchParams({ prefix, limit });
+        return await this.apiCall(`/search/suggest?${queryParams}`, { method: 'GET' });
+    }
+
     // 触发搜索和分析
     async triggerAnalysis(eventId) {
         return await this.apiCall(`/search/trigger/${eventId}`, {
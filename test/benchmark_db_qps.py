@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库查询吞吐微基准
+对比基线实现（单连接，每条语句前 ping(reconnect=True)，即改造前 SimpleDBService.execute_query 的代码）
+与当前实现（连接池，仅在借出空闲较久的连接时检查存活）的每秒查询数
+
+用法:
+    # 连接真实MySQL（连接参数读取 backend/.env 中的 DB_* 配置）
+    DB_HOST=127.0.0.1 python test/benchmark_db_qps.py [--queries N] [--threads T]
+    # 不需要数据库：启动内置的最小MySQL协议服务端，每个请求模拟 --rtt-ms 毫秒的网络往返
+    python test/benchmark_db_qps.py --fake-server --rtt-ms 1 [--queries N] [--threads T]
+
+参考结果（内置服务端，Python 3.11 / PyMySQL 2.2.8，每种方式 5000 次查询，两次运行的范围）:
+
+    模拟往返   线程数   基线(QPS)     连接池(QPS)    提升
+    0 ms       1        6390-7620     8120-8420      1.07-1.32x
+    1 ms       1         359-384       681-692       1.77-1.93x
+    1 ms       8         348-366      3280-3370      9.2-9.4x
+
+基线每条语句两次往返（ping + 查询），连接池只有一次；多线程时基线的单连接只能串行使用
+（基线代码本身没有加锁，并发使用会破坏协议流，这里加锁串行作为它能达到的最好情况），
+连接池可以同时借出多条连接。内置服务端不执行真实查询，真实MySQL上网络往返占单次查询耗时的
+比例越高，提升越接近上表1 ms一行；尚未在真实MySQL上测量。
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import pymysql
+from app.config import settings
+from app.services.simple_db_service import SimpleDBService
+
+SQL = "SELECT id, status, vote_count FROM events ORDER BY id LIMIT 1"
+
+
+class BaselineDBService:
+    """改造前的实现：所有线程共享一条连接，每条语句前 ping(reconnect=True)"""
+
+    def __init__(self):
+        self.connection = None
+        # 基线代码没有锁，多线程共享连接会互相破坏协议流；这里串行化，作为基线的最好情况
+        self._lock = threading.Lock()
+
+    def connect(self):
+        self.connection = pymysql.connect(
+            host=settings.db_host,
+            port=settings.db_port,
+            user=settings.db_user,
+            password=settings.db_password,
+            database=settings.db_name,
+            charset='utf8mb4',
+            autocommit=True
+        )
+        return True
+
+    def execute_query(self, sql, params=None):
+        with self._lock:
+            if not self.connection:
+                self.connect()
+            # 检查连接是否仍然有效
+            self.connection.ping(reconnect=True)
+            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+# ===== 内置的最小MySQL协议服务端（只用于基准测试） =====
+
+_CAPABILITIES = (0x00000001 | 0x00000008 | 0x00000200 | 0x00002000 | 0x00008000
+                 | 0x00010000 | 0x00020000 | 0x00080000)
+_STATUS_AUTOCOMMIT = 0x0002
+
+
+def _lenenc_str(value: bytes) -> bytes:
+    return bytes([len(value)]) + value
+
+
+class _FakeMySQLHandler(socketserver.BaseRequestHandler):
+    """握手后对任意用户名密码返回成功；SELECT返回一行固定结果，其他语句返回OK；
+    每个请求在回复前等待rtt秒，模拟一次网络往返"""
+
+    rtt = 0.0
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._send(sock, 0, self._handshake())
+        if self._recv(sock) is None:
+            return
+        self._send(sock, 2, self._ok())
+        while True:
+            packet = self._recv(sock)
+            if not packet or packet[0] == 0x01:  # COM_QUIT
+                return
+            if self.rtt:
+                time.sleep(self.rtt)
+            if packet[0] == 0x03 and packet[1:].lstrip().upper().startswith(b"SELECT"):
+                self._send_result(sock)
+            else:  # COM_PING、SET NAMES等
+                self._send(sock, 1, self._ok())
+
+    @staticmethod
+    def _handshake() -> bytes:
+        salt = b"12345678901234567890"
+        return (b"\x0a" + b"8.0.0-benchmark\x00" + struct.pack("<I", 1) + salt[:8] + b"\x00"
+                + struct.pack("<H", _CAPABILITIES & 0xFFFF) + bytes([45])
+                + struct.pack("<H", _STATUS_AUTOCOMMIT) + struct.pack("<H", _CAPABILITIES >> 16)
+                + bytes([21]) + b"\x00" * 10 + salt[8:] + b"\x00" + b"mysql_native_password\x00")
+
+    @staticmethod
+    def _ok() -> bytes:
+        return b"\x00\x00\x00" + struct.pack("<HH", _STATUS_AUTOCOMMIT, 0)
+
+    @staticmethod
+    def _eof() -> bytes:
+        return b"\xfe" + struct.pack("<HH", 0, _STATUS_AUTOCOMMIT)
+
+    def _send_result(self, sock):
+        columns = (b"id", b"status", b"vote_count")
+        packets = [bytes([len(columns)])]
+        for name in columns:
+            packets.append(b"".join(_lenenc_str(part) for part in (b"def", b"truthmirror", b"events",
+                                                                   b"events", name, name))
+                           + b"\x0c" + struct.pack("<HIBHB", 45, 255, 0xFD, 0, 0) + b"\x00\x00")
+        packets.append(self._eof())
+        packets.append(b"".join(_lenenc_str(value) for value in (b"1", b"voting", b"42")))
+        packets.append(self._eof())
+        sock.sendall(b"".join(struct.pack("<I", len(p))[:3] + bytes([seq + 1]) + p
+                              for seq, p in enumerate(packets)))
+
+    @staticmethod
+    def _send(sock, seq: int, payload: bytes):
+        sock.sendall(struct.pack("<I", len(payload))[:3] + bytes([seq]) + payload)
+
+    @staticmethod
+    def _recv(sock):
+        header = _recv_exact(sock, 4)
+        if header is None:
+            return None
+        return _recv_exact(sock, int.from_bytes(header[:3], "little"))
+
+
+def _recv_exact(sock, size: int):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def start_fake_server(rtt_ms: float) -> int:
+    """在后台线程启动内置服务端，返回监听端口"""
+    _FakeMySQLHandler.rtt = rtt_ms / 1000
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeMySQLHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+# ===== 基准 =====
+
+def run(name: str, db, total: int, threads: int) -> float:
+    per_thread = total // threads
+
+    def worker():
+        for _ in range(per_thread):
+            db.execute_query(SQL)
+
+    # 预热
+    for _ in range(50):
+        db.execute_query(SQL)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    qps = per_thread * threads / elapsed
+    print(f"{name:<24} {per_thread * threads:>8} 次  {elapsed:>8.3f} 秒  {qps:>10.1f} QPS")
+    return qps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库查询吞吐基准：基线单连接 vs 连接池")
+    parser.add_argument("--queries", type=int, default=5000, help="每种方式的查询次数")
+    parser.add_argument("--threads", type=int, default=1, help="并发线程数")
+    parser.add_argument("--fake-server", action="store_true", help="使用内置的最小MySQL协议服务端")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="内置服务端模拟的往返延迟（毫秒）")
+    args = parser.parse_args()
+
+    if args.fake_server:
+        settings.db_host, settings.db_port = "127.0.0.1", start_fake_server(args.rtt_ms)
+        # 连接池上限不小于线程数，避免排队等待连接
+        settings.db_pool_max_size = max(settings.db_pool_max_size, args.threads)
+
+    baseline = BaselineDBService()
+    db = SimpleDBService()
+    try:
+        baseline.connect()
+    except Exception as e:
+        print(f"❌ 无法连接数据库，请检查 DB_HOST 等配置: {e}")
+        return False
+    if not db.connect():
+        return False
+
+    target = f"内置服务端（往返 {args.rtt_ms} ms）" if args.fake_server else f"{settings.db_host}:{settings.db_port}"
+    print(f"🎯 查询吞吐基准: {args.queries} 次查询, {args.threads} 个线程, {target}")
+    print("=" * 60)
+    before = run("单连接+每条ping（基线）", baseline, args.queries, args.threads)
+    after = run("连接池（当前）", db, args.queries, args.threads)
+    print("=" * 60)
+    print(f"📊 提升: {after / before:.2f}x")
+    print(f"🔌 连接池: {db.pool_stats()}")
+
+    baseline.close()
+    db.close()
+    return True
+
+
+if __name__ == "__main__":
+    main()
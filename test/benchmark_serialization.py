@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件列表序列化微基准
+用100个事件的一页数据（含较长的description与ai_summary）对比：
+  1. 旧实现：FastAPI对返回值调用jsonable_encoder后用标准库json序列化
+  2. 默认响应类：jsonable_encoder + orjson
+  3. 直接返回FastJSONResponse：跳过jsonable_encoder，只用orjson
+并统计原始字节数与gzip压缩后的字节数
+
+用法（不需要数据库）:
+    python test/benchmark_serialization.py [每种方式的重复次数]
+"""
+
+import sys
+import os
+import gzip
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.utils.json_response import FastJSONResponse, orjson
+
+PAGE_SIZE = 100
+
+
+def build_page():
+    """构造一页与 GET /events/ 结构相同的数据"""
+    now = datetime.now()
+    events = []
+    for i in range(PAGE_SIZE):
+        events.append({
+            "id": i + 1,
+            "title": f"关于某地第{i}号新闻事件真实性的讨论",
+            "description": "据网络流传的消息称，该事件涉及多方信息来源，内容需要进一步核实。" * 8,
+            "keywords": "新闻,核实,辟谣,社会",
+            "status": "voting",
+            "interest_count": 12 + i,
+            "vote_count": 40 + i,
+            "support_votes": 25,
+            "oppose_votes": 15 + i,
+            "ai_summary": "综合多个信息源的报道，AI认为该事件的主要事实基本可信，但部分细节存在出入。" * 12,
+            "ai_rating": "questionable",
+            "nomination_deadline": None,
+            "creator_id": 1,
+            "created_at": str(now - timedelta(minutes=i)),
+            "updated_at": str(now),
+            "relevance_score": Decimal("0.87"),
+            "creator": {"id": 1, "username": "admin", "nickname": "管理员", "role": "admin"},
+        })
+    return {
+        "events": events,
+        "total": 1000,
+        "page": 1,
+        "pageSize": PAGE_SIZE,
+        "totalPages": 10,
+        "next_cursor": None,
+    }
+
+
+def bench(name, func, rounds):
+    body = func()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - started) / rounds
+    compressed = gzip.compress(body, compresslevel=settings.gzip_compress_level)
+    print(f"{name:<36} {elapsed * 1000:8.3f} ms/次   原始 {len(body):7d} B   gzip {len(compressed):6d} B")
+    return elapsed
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    page = build_page()
+
+    print(f"一页 {PAGE_SIZE} 个事件，每种方式重复 {rounds} 次，orjson: {'已安装' if orjson else '未安装（退回标准库json）'}")
+    baseline = bench("jsonable_encoder + json（旧）", lambda: JSONResponse(jsonable_encoder(page)).body, rounds)
+    default = bench("jsonable_encoder + FastJSONResponse", lambda: FastJSONResponse(jsonable_encoder(page)).body, rounds)
+    direct = bench("FastJSONResponse（直接返回）", lambda: FastJSONResponse(page).body, rounds)
+
+    print(f"默认响应类加速 {baseline / default:.1f}x，直接返回加速 {baseline / direct:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试异步数据库服务（AsyncDBService）代理的方法范围
+公开的阻塞方法都在线程池中执行，上下文管理器、生成器和内部方法不代理。不需要数据库:
+    python test/test_async_db_service.py
+"""
+
+import sys
+import os
+import asyncio
+import threading
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.async_db_service import AsyncDBService
+from app.services.simple_db_service import SimpleDBService
+
+
+def test_public_methods_run_in_executor():
+    """路由用到的查询方法（get_users、get_event_votes、execute_query等）都能await，并在线程池中执行"""
+    db = SimpleDBService()
+    threads = []
+    db._run_with_retry = lambda sql, params=None, fetch=True: threads.append(threading.current_thread().name) or []
+    service = AsyncDBService(db, max_workers=1)
+
+    async def main():
+        await service.get_users(limit=5)
+        await service.get_event_votes(1)
+        await service.execute_query("SELECT 1")
+
+    asyncio.run(main())
+    service.shutdown()
+    assert len(threads) == 3 and all(name.startswith("db") for name in threads), threads
+    print("✅ 公开方法在数据库线程池中执行")
+
+
+def test_unsafe_methods_are_not_proxied():
+    """事务、流式查询与内部方法不能跨线程代理"""
+    service = AsyncDBService(SimpleDBService(), max_workers=1)
+    for name in ("transaction", "stream_query", "_run_with_retry", "pool", "no_such_method"):
+        try:
+            getattr(service, name)
+        except AttributeError:
+            continue
+        raise AssertionError(f"{name} 不应被代理")
+    service.shutdown()
+    print("✅ 上下文管理器、生成器和内部方法不代理")
+
+
+if __name__ == "__main__":
+    test_public_methods_run_in_executor()
+    test_unsafe_methods_are_not_proxied()
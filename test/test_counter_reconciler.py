@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试计数器对账任务（CounterReconciler）在多进程部署下的完成时间
+执行对账的进程把完成时间写入task_runs表，没取得命名锁的进程读取同一条记录。不需要数据库:
+    python test/test_counter_reconciler.py
+"""
+
+import sys
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.read_cache import TTLCache
+from app.tasks import counter_reconciler as reconciler_module
+from app.tasks.counter_reconciler import CounterReconciler
+
+
+class SharedDB:
+    """多个进程共用的数据库：只记录task_runs表，没有需要修正的计数"""
+
+    def __init__(self):
+        self.task_runs = {}
+        self.now = datetime(2026, 1, 1, 12, 0)
+        self.vote_buffer = None
+        self.event_detail_cache = TTLCache("event_detail")
+
+    def _run_with_retry(self, sql, params=None, fetch=True):
+        if sql.startswith("SELECT MIN(id)"):
+            return [{"min_id": None, "max_id": None}]
+        if sql.startswith("INSERT INTO task_runs"):
+            self.task_runs[params[0]] = self.now
+            return 1
+        if sql.startswith("SELECT finished_at FROM task_runs"):
+            return [{"finished_at": self.task_runs[params[0]]}] if params[0] in self.task_runs else []
+        raise AssertionError(sql)
+
+
+def make_worker(db, holds_lock):
+    reconciler = CounterReconciler(db, specs=[], db_lock=True)
+
+    @contextmanager
+    def exclusive():
+        yield holds_lock
+
+    reconciler._exclusive = exclusive
+    return reconciler
+
+
+def test_all_workers_report_the_same_run():
+    """取得锁的进程对账后，其他进程报告的完成时间与它一致，不再是None或各自的旧值"""
+    db = SharedDB()
+    winner, other = make_worker(db, True), make_worker(db, False)
+    assert other.get_last_reconciled_at() is None
+
+    report = winner.run_once()
+    assert report["finished_at"] == db.now.isoformat()
+    assert other.run_once() == {} and other.skipped_runs == 1
+    assert other.last_reconciled_at == winner.last_reconciled_at == db.now
+
+    # 之后的对账只更新数据库中的记录；其他进程在缓存过期后读到新的时间
+    db.now = datetime(2026, 1, 1, 12, 5)
+    winner.run_once()
+    other._last_run_loaded -= reconciler_module.LAST_RUN_CACHE_SECONDS
+    assert other.get_last_reconciled_at() == db.now
+    print("✅ 各进程报告同一个对账完成时间")
+
+
+if __name__ == "__main__":
+    test_all_workers_report_the_same_run()
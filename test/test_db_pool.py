@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据库连接池（ConnectionPool）
+有界借出与超时、空闲回收在锁外关闭连接、出错时丢弃连接、空闲较久后借出前检查存活。
+不需要数据库，连接替换为记录状态的假连接:
+    python test/test_db_pool.py
+"""
+
+import sys
+import os
+import threading
+import time
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, pool_ref, number):
+        self.pool_ref = pool_ref
+        self.number = number
+        self.closed = False
+        self.closed_under_lock = False
+
+    def close(self):
+        pool = self.pool_ref[0]
+        # 能立即取得连接池的锁，说明关闭时没有持有它
+        if pool._cond.acquire(blocking=False):
+            pool._cond.release()
+        else:
+            self.closed_under_lock = True
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    pool_ref = []
+    created = []
+
+    def creator():
+        conn = FakeConnection(pool_ref, len(created) + 1)
+        created.append(conn)
+        return conn
+
+    pool = ConnectionPool(creator, **kwargs)
+    pool_ref.append(pool)
+    return pool, created
+
+
+def test_bounded_checkout_and_timeout():
+    """借出数达到max_size后等待归还，超时抛出PoolTimeoutError"""
+    pool, created = make_pool(min_size=0, max_size=2, checkout_timeout=0.05)
+    first, second = pool.checkout(), pool.checkout()
+    try:
+        pool.checkout()
+    except PoolTimeoutError:
+        pass
+    else:
+        raise AssertionError("连接池已满时应超时")
+    assert pool.stats()["timeouts"] == 1 and len(created) == 2
+
+    # 等待中的线程在其他线程归还后拿到同一条连接
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.checkout(timeout=2)))
+    waiter.start()
+    time.sleep(0.05)
+    pool.checkin(first)
+    waiter.join()
+    assert got == [first] and len(created) == 2
+    stats = pool.stats()
+    assert stats["waits"] >= 1 and stats["in_use"] == 2 and stats["peak_in_use"] == 2
+    pool.checkin(second)
+    pool.checkin(got[0])
+    print("✅ 有界借出与等待超时")
+
+
+def test_idle_eviction_closes_outside_lock():
+    """空闲超时的连接被回收（保留min_size个），关闭发生在释放锁之后"""
+    pool, created = make_pool(min_size=1, max_size=4, idle_timeout=0.05)
+    conns = [pool.checkout() for _ in range(3)]
+    for conn in conns:
+        pool.checkin(conn)
+    time.sleep(0.1)
+    conn = pool.checkout()
+    closed = [c for c in created if c.closed]
+    assert len(closed) == 2 and not any(c.closed_under_lock for c in closed)
+    assert pool.stats()["evicted"] == 2 and pool.stats()["size"] == 1
+    pool.checkin(conn)
+    print("✅ 空闲连接在锁外回收")
+
+
+def test_error_discards_connection():
+    """connection()块中出错时连接被关闭，不再放回池中"""
+    pool, created = make_pool(min_size=0, max_size=2)
+    try:
+        with pool.connection():
+            raise RuntimeError("Lost connection to MySQL server during query")
+    except RuntimeError:
+        pass
+    assert created[0].closed and pool.stats()["size"] == 0
+    with pool.connection() as conn:
+        assert conn is created[1]
+    assert pool.stats()["idle"] == 1
+    print("✅ 出错时丢弃连接")
+
+
+def test_validate_after_idle():
+    """热连接直接复用；空闲超过validate_after的连接借出前检查，检查失败时换新连接"""
+    dead = set()
+
+    def validate(conn):
+        if conn.number in dead:
+            raise RuntimeError("MySQL server has gone away")
+
+    pool, created = make_pool(min_size=0, max_size=2, validate=validate, validate_after=0.05)
+    conn = pool.checkout()
+    pool.checkin(conn)
+    assert pool.checkout() is conn and pool.stats()["validations"] == 0
+    pool.checkin(conn)
+
+    dead.add(conn.number)
+    time.sleep(0.1)
+    fresh = pool.checkout()
+    assert fresh is not conn and conn.closed
+    stats = pool.stats()
+    assert stats["validations"] == 1 and stats["invalid"] == 1 and stats["size"] == 1
+    pool.checkin(fresh)
+    print("✅ 空闲较久的连接借出前检查存活")
+
+
+if __name__ == "__main__":
+    test_bounded_checkout_and_timeout()
+    test_idle_eviction_closes_outside_lock()
+    test_error_discards_connection()
+    test_validate_after_idle()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试事件数量缓存（EventCountCache）的对账与失败退避
+不需要数据库，统计函数替换为可控的loader:
+    python test/test_event_count_cache.py
+"""
+
+import sys
+import os
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services import event_count_cache
+from app.services.event_count_cache import EventCountCache
+
+
+class Loader:
+    """记录调用次数；failing为True时模拟数据库故障"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+        self.counts = {"pending": 3, "voting": 2}
+
+    def __call__(self):
+        self.calls += 1
+        if self.failing:
+            raise RuntimeError("MySQL server has gone away")
+        return dict(self.counts)
+
+
+def test_incremental_updates():
+    loader = Loader()
+    cache = EventCountCache(loader, reconcile_interval=60)
+    assert cache.get() == 5 and cache.get("voting") == 2
+    cache.on_created("pending")
+    cache.on_status_changed("voting", "confirmed")
+    assert cache.get("pending") == 4 and cache.get("confirmed") == 1 and cache.get() == 6
+    assert loader.calls == 1
+    print("✅ 增量维护不访问数据库")
+
+
+def test_failed_reconcile_backs_off():
+    """对账失败后在retry_after之前返回上次的数量，被标记失效也不会每次读取都查询数据库"""
+    loader = Loader()
+    cache = EventCountCache(loader, reconcile_interval=60)
+    assert cache.get() == 5
+
+    loader.failing = True
+    cache.invalidate()
+    for _ in range(100):
+        assert cache.get() == 5
+    assert loader.calls == 2
+
+    # 退避结束后重试，数据库恢复后清除失效标记
+    loader.failing = False
+    loader.counts["confirmed"] = 1
+    cache._retry_after -= event_count_cache.RECONCILE_RETRY_SECONDS
+    assert cache.get() == 6
+    assert cache.get() == 6 and loader.calls == 3
+    print("✅ 对账失败后退避重试")
+
+
+if __name__ == "__main__":
+    test_incremental_updates()
+    test_failed_reconcile_backs_off()
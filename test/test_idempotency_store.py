@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试幂等键结果存储（IdempotencyStore）
+重放已保存的响应、处理中的键并发重试返回409、同一个键用于不同请求返回422、失败后允许重试。
+不需要数据库，持久化读写替换为字典:
+    python test/test_idempotency_store.py
+"""
+
+import sys
+import os
+import threading
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.idempotency_store import IdempotencyError, IdempotencyStore, request_fingerprint
+
+FINGERPRINT = request_fingerprint(1, "support", None)
+
+
+def expect_error(status_code, func, *args):
+    try:
+        func(*args)
+    except IdempotencyError as e:
+        assert e.status_code == status_code, e.status_code
+        return
+    raise AssertionError(f"应返回 {status_code}")
+
+
+def test_replay_completed_response():
+    store = IdempotencyStore()
+    assert store.reserve("vote", 1, "k1", FINGERPRINT) is None
+    store.complete("vote", 1, "k1", FINGERPRINT, 201, {"vote_id": 9})
+    assert store.reserve("vote", 1, "k1", FINGERPRINT) == (201, {"vote_id": 9})
+    # 不同用户的同名键互不影响
+    assert store.reserve("vote", 2, "k1", FINGERPRINT) is None
+    assert store.stats()["replays"] == 1
+    print("✅ 重放已保存的响应")
+
+
+def test_in_flight_conflict():
+    """同一个键正在处理中时，并发重试只有一个能占用，其余返回409；release后可以重试"""
+    store = IdempotencyStore()
+    barrier = threading.Barrier(8)
+    outcomes = []
+
+    def attempt():
+        barrier.wait()
+        try:
+            outcomes.append(store.reserve("vote", 1, "k1", FINGERPRINT))
+        except IdempotencyError as e:
+            outcomes.append(e.status_code)
+
+    threads = [threading.Thread(target=attempt) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outcomes.count(None) == 1 and outcomes.count(409) == 7
+
+    store.release("vote", 1, "k1")
+    assert store.reserve("vote", 1, "k1", FINGERPRINT) is None
+    print("✅ 处理中的键返回409")
+
+
+def test_payload_mismatch():
+    store = IdempotencyStore()
+    store.reserve("vote", 1, "k1", FINGERPRINT)
+    store.complete("vote", 1, "k1", FINGERPRINT, 201, {"vote_id": 9})
+    expect_error(422, store.reserve, "vote", 1, "k1", request_fingerprint(1, "oppose", None))
+    print("✅ 同一个键用于不同请求返回422")
+
+
+def test_persisted_results():
+    """开启持久化时，内存未命中（如其他进程保存的结果）从loader读取；持久化失败不影响请求"""
+    rows = {}
+    store = IdempotencyStore(loader=lambda *key: rows.get(key),
+                             saver=lambda scope, user_id, key, stored: rows.__setitem__((scope, user_id, key), stored))
+    store.reserve("interest", 1, "k1", FINGERPRINT)
+    store.complete("interest", 1, "k1", FINGERPRINT, 200, {"interest_count": 3})
+
+    other = IdempotencyStore(loader=lambda *key: rows.get(key))
+    assert other.reserve("interest", 1, "k1", FINGERPRINT) == (200, {"interest_count": 3})
+
+    def broken(*args):
+        raise RuntimeError("MySQL server has gone away")
+
+    failing = IdempotencyStore(loader=broken, saver=broken)
+    assert failing.reserve("interest", 1, "k2", FINGERPRINT) is None
+    failing.complete("interest", 1, "k2", FINGERPRINT, 200, {})
+    assert failing.reserve("interest", 1, "k2", FINGERPRINT) == (200, {})
+    assert failing.stats()["persist_errors"] == 2
+    print("✅ 持久化的结果与持久化失败")
+
+
+if __name__ == "__main__":
+    test_replay_completed_response()
+    test_in_flight_conflict()
+    test_payload_mismatch()
+    test_persisted_results()
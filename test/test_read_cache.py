@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试读缓存（TTLCache）与事件读缓存
+代数保护（失效后拒绝旧数据回填）、按标签失效、LRU容量上限与过期；
+缓存命中时返回的事件与缓存条目互不影响。不需要数据库，查询替换为固定结果:
+    python test/test_read_cache.py
+"""
+
+import sys
+import os
+import json
+import time
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.read_cache import TTLCache
+from app.services.simple_db_service import SimpleDBService
+
+
+def test_stale_set_after_invalidate_is_refused():
+    """读库前取得代数，读库期间标签被失效或缓存被清空时，回填被拒绝"""
+    cache = TTLCache("test")
+    generation = cache.generation(1)
+    cache.invalidate_tag(1)
+    cache.set("detail:1", "旧数据", tag=1, generation=generation)
+    assert cache.get("detail:1") is None
+
+    generation = cache.generation(2)
+    cache.clear()
+    cache.set("detail:2", "旧数据", tag=2, generation=generation)
+    assert cache.get("detail:2") is None
+
+    # 其他标签的失效不影响回填
+    generation = cache.generation(3)
+    cache.invalidate_tag(4)
+    cache.set("detail:3", "新数据", tag=3, generation=generation)
+    assert cache.get("detail:3") == "新数据"
+    assert cache.stats()["stale_sets"] == 2
+    print("✅ 失效后拒绝旧数据回填")
+
+
+def test_invalidate_tag():
+    cache = TTLCache("test")
+    cache.set(("detail", 1, None), "a", tag=1)
+    cache.set(("detail", 1, 7), "b", tag=1)
+    cache.set(("detail", 2, None), "c", tag=2)
+    cache.invalidate_tag(1)
+    assert cache.get(("detail", 1, None)) is None and cache.get(("detail", 1, 7)) is None
+    assert cache.get(("detail", 2, None)) == "c"
+    assert cache.stats()["invalidations"] == 2
+    print("✅ 按标签失效")
+
+
+def test_lru_bound_and_ttl():
+    """超过容量时淘汰最久未使用的条目；过期条目不返回"""
+    cache = TTLCache("test", maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None and cache.stats()["size"] == 1
+    print("✅ LRU容量上限与过期")
+
+
+def test_tag_generations_reset_invalidates_old_generations():
+    """标签代数表过大整体重置后，此前取得的代数全部作废"""
+    cache = TTLCache("test", maxsize=1)
+    generation = cache.generation("x")
+    for tag in range(5):
+        cache.invalidate_tag(tag)
+    cache.set("x", "旧数据", tag="x", generation=generation)
+    assert cache.get("x") is None
+    print("✅ 标签代数重置")
+
+
+def event_row(event_id):
+    return {"id": event_id, "title": "北京暴雨", "description": "", "keywords": "", "status": "voting",
+            "interest_count": 3, "vote_count": 1, "support_votes": 1, "oppose_votes": 0,
+            "ai_summary": None, "ai_rating": None, "nomination_deadline": None, "creator_id": 1,
+            "created_at": None, "updated_at": None, "username": "alice", "nickname": "爱丽丝", "role": "user",
+            "user_interested": 0,
+            "information_sources": json.dumps([{"id": 1, "title": "来源", "relevance_score": 1, "created_at": ""}])}
+
+
+def make_service():
+    db = SimpleDBService()
+    db.queries = 0
+
+    def execute_query(sql, params=None):
+        db.queries += 1
+        return [event_row(1)]
+
+    db.execute_query = execute_query
+    return db
+
+
+def test_detail_cache_returns_independent_copies():
+    """修改返回的事件（包括creator和information_sources）不会影响之后命中缓存的请求"""
+    db = make_service()
+    first = db.get_event_detail(1)
+    first["creator"]["nickname"] = "已修改"
+    first["information_sources"].append({"id": 2})
+
+    cached = db.get_event_detail(1)
+    assert db.queries == 1
+    assert cached["creator"]["nickname"] == "爱丽丝"
+    assert [source["id"] for source in cached["information_sources"]] == [1]
+    cached["creator"]["nickname"] = "再次修改"
+    assert db.get_event_detail(1)["creator"]["nickname"] == "爱丽丝"
+    print("✅ 事件详情缓存返回独立副本")
+
+
+def test_list_cache_returns_independent_copies():
+    db = make_service()
+    db.get_events(limit=10)[0]["creator"]["username"] = "mallory"
+    assert db.get_events(limit=10)[0]["creator"]["username"] == "alice"
+    assert db.queries == 1
+    print("✅ 事件列表缓存返回独立副本")
+
+
+if __name__ == "__main__":
+    test_stale_set_after_invalidate_is_refused()
+    test_invalidate_tag()
+    test_lru_bound_and_ttl()
+    test_tag_generations_reset_invalidates_old_generations()
+    test_detail_cache_returns_independent_copies()
+    test_list_cache_returns_independent_copies()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试进程内倒排索引（SearchIndex）的增量维护
+新建事件的搜索结果、重建期间的增量修改、按updated_at的增量刷新。不需要数据库:
+    python test/test_search_index.py
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.search_index import SearchIndex
+from app.services.simple_db_service import SimpleDBService
+
+
+def row(event_id, title, status="pending", username="alice", nickname="爱丽丝"):
+    return {"id": event_id, "title": title, "description": "", "keywords": "", "status": status,
+            "created_at": None, "username": username, "nickname": nickname}
+
+
+def make_service(detail):
+    """数据库调用替换为固定返回值：插入得到事件ID 42，事件详情返回detail"""
+    db = SimpleDBService()
+    db.execute_update = lambda sql, params=None: 42
+    db.get_event_detail = lambda event_id, user_id=None, include=None: dict(detail)
+    db.search_index.build([])
+    return db
+
+
+def test_created_event_has_creator_fields():
+    """新建事件的搜索结果带创建者用户名和昵称，与数据库搜索一致"""
+    detail = {"id": 42, "title": "北京暴雨", "description": "地铁停运", "keywords": "暴雨",
+              "status": "pending", "created_at": None,
+              "creator": {"id": 1, "username": "alice", "nickname": "爱丽丝", "role": "user"}}
+    db = make_service(detail)
+    db.create_event("北京暴雨", "地铁停运", "暴雨", creator_id=1)
+
+    results = db.search_events("暴雨")
+    assert [item["id"] for item in results] == [42]
+    assert results[0]["username"] == "alice" and results[0]["nickname"] == "爱丽丝"
+    print("✅ 新建事件的搜索结果带创建者信息")
+
+
+def test_build_replays_concurrent_changes():
+    """重建读取全表期间发生的新增、状态变化和删除，在替换为新索引后仍然生效"""
+    index = SearchIndex()
+    index.build([row(1, "上海疫情"), row(2, "北京地铁")])
+
+    def rows():
+        yield row(1, "上海疫情")
+        # 读取进行中：新建事件3、事件1状态变化、删除事件2（读到的仍是旧数据）
+        index.add(row(3, "上海台风"))
+        index.update_status(1, "voting")
+        index.remove(2)
+        yield row(2, "北京地铁")
+
+    index.build(rows())
+    assert sorted(item["id"] for item in index.search("上海")) == [1, 3]
+    assert index.search("上海疫情")[0]["status"] == "voting"
+    assert index.search("北京") == []
+    print("✅ 重建期间的增量修改不丢失")
+
+
+def test_refresh_picks_up_external_changes():
+    """其他进程新建的事件和状态变化通过增量刷新进入索引"""
+    db = SimpleDBService()
+    first, second = datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 1, 12, 1)
+    clock = iter([first, second])
+    queries = []
+
+    db._run_with_retry = lambda sql, params=None, fetch=True: [{"now": next(clock)}]
+
+    def stream_query(sql, params=None):
+        queries.append((sql, params))
+        if params is None:
+            return iter([row(1, "上海疫情")])
+        return iter([row(1, "上海疫情", status="voting"), row(2, "北京地铁", username="bob")])
+
+    db.stream_query = stream_query
+    db.build_search_index()
+    assert db.refresh_search_index() == 2
+
+    assert "e.updated_at >= %s - INTERVAL %s SECOND" in queries[1][0] and queries[1][1][0] == first
+    assert db._search_index_synced_at == second
+    assert db.search_events("上海疫情")[0]["status"] == "voting"
+    assert db.search_events("北京")[0]["username"] == "bob"
+    print("✅ 增量刷新同步外部修改")
+
+
+if __name__ == "__main__":
+    test_created_event_has_creator_fields()
+    test_build_replays_concurrent_changes()
+    test_refresh_picks_up_external_changes()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试SQL指纹归一化
+批量投票、投票趋势upsert、写回缓冲等生成的变长语句，不同批量大小必须得到同一个指纹，
+否则每种批量大小各占一个指纹，很快占满max_fingerprints，其余语句都被归入"(other)"
+
+不需要数据库，语句由服务层的真实代码生成（数据库调用替换为记录SQL）:
+    python test/test_sql_fingerprint.py
+"""
+
+import sys
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.sql_metrics import fingerprint
+from app.services.simple_db_service import SimpleDBService
+
+BATCH_SIZES = (1, 3, 50)
+
+
+class RecordingCursor:
+    """记录执行的SQL；事件和用户都视为存在，没有已存在的投票"""
+
+    def __init__(self, statements):
+        self.statements = statements
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.startswith("SELECT id FROM"):
+            self._rows = [{"id": value} for value in params]
+        elif sql.startswith("SELECT NOW()"):
+            self._rows = [{"now": datetime(2026, 1, 1, 12, 0, 30)}]
+        else:
+            self._rows = []
+        if sql.startswith("INSERT IGNORE"):
+            return len(params) // 5
+        # 条件确认不命中，避免触发状态变化的后续处理
+        return 0 if "status = 'confirmed'" in sql else 1
+
+    def fetchall(self):
+        return self._rows
+
+
+def make_service(statements):
+    db = SimpleDBService()
+
+    @contextmanager
+    def transaction(name="TRANSACTION"):
+        yield RecordingCursor(statements)
+
+    def execute_transaction(batch):
+        # 与execute_transaction统计时拼接的SQL一致
+        statements.append("; ".join(sql for sql, _ in batch))
+        return [{"rowcount": 0, "lastrowid": 1} for _ in batch]
+
+    db.transaction = transaction
+    db.execute_transaction = execute_transaction
+    db.execute_query = lambda sql, params=None: statements.append(sql) or []
+    return db
+
+
+def bulk_statements(size):
+    statements = []
+    votes = [{"event_id": i % 7 + 1, "user_id": i + 1, "stance": "support" if i % 2 else "oppose"}
+             for i in range(size)]
+    make_service(statements).create_votes_bulk(votes)
+    return statements
+
+
+def assert_same_fingerprint(name, build):
+    """不同批量大小生成的语句指纹集合必须相同（按事件逐条执行的语句只算一种）"""
+    fingerprints = {size: sorted({fingerprint(sql) for sql in build(size)}) for size in BATCH_SIZES}
+    first = fingerprints[BATCH_SIZES[0]]
+    for size, fps in fingerprints.items():
+        assert fps == first, f"{name}: 批量大小 {size} 的指纹与 {BATCH_SIZES[0]} 不同\n{fps}\n{first}"
+    print(f"✅ {name}")
+    for fp in first:
+        print(f"   {fp}")
+    return first
+
+
+def test_bulk_vote_statements():
+    """批量投票：IN列表、(event_id, user_id) IN ((?, ?), ...)、多行VALUES、CASE更新"""
+    fps = assert_same_fingerprint("批量投票", bulk_statements)
+    assert any(fp.endswith("WHERE (event_id, user_id) IN (...)") for fp in fps)
+    assert any(fp.startswith("INSERT IGNORE INTO votes") and fp.endswith("VALUES (...)") for fp in fps)
+    assert any("CASE id WHEN ? THEN ? ... ELSE ? END WHERE id IN (...)" in fp for fp in fps)
+
+
+def test_vote_rollup_upsert():
+    """投票趋势upsert：折叠多行VALUES，保留ON DUPLICATE KEY UPDATE中的VALUES(col)；
+    当前分钟（NOW()）和指定分钟两种写法得到同一个指纹"""
+    def build(size):
+        minute = datetime(2026, 1, 1, 12, 0)
+        rollups = {(event_id, None): [1, 0] for event_id in range(1, size + 1)}
+        explicit = {(event_id, minute + timedelta(minutes=event_id)): [1, 0] for event_id in range(1, size + 1)}
+        return [SimpleDBService._vote_rollup_statement(rollups)[0],
+                SimpleDBService._vote_rollup_statement(explicit)[0]]
+
+    fp = assert_same_fingerprint("投票趋势upsert", build)[0]
+    assert "VALUES (...) ON DUPLICATE KEY UPDATE" in fp
+    assert "support = support + VALUES(support), oppose = oppose + VALUES(oppose)" in fp
+
+
+def test_vote_counter_flush():
+    """写回缓冲：三列CASE更新 + 每个事件一条确认语句"""
+    def build(size):
+        statements = []
+        minute = datetime(2026, 1, 1, 12, 0)
+        make_service(statements)._flush_vote_counters({event_id: [2, 1, 1] for event_id in range(1, size + 1)},
+                                                      {(event_id, minute): [1, 1] for event_id in range(1, size + 1)})
+        return statements
+
+    fp = assert_same_fingerprint("投票计数写回", build)[0]
+    assert fp.count("WHEN ? THEN ? ...") == 3
+    assert fp.count("UPDATE events SET status") == 1, fp
+
+
+def test_events_batch():
+    """批量获取事件：IN列表"""
+    def build(size):
+        statements = []
+        make_service(statements).get_events_batch(list(range(1, size + 1)))
+        return statements
+
+    assert "IN (...)" in assert_same_fingerprint("批量获取事件", build)[0]
+
+
+def test_subquery_not_collapsed():
+    fp = fingerprint("SELECT id FROM events WHERE id IN (SELECT event_id FROM votes WHERE user_id = %s)")
+    assert fp == "SELECT id FROM events WHERE id IN (SELECT event_id FROM votes WHERE user_id = ?)", fp
+    print("✅ 子查询不折叠")
+
+
+def test_literals_and_comments():
+    fp = fingerprint("SELECT COUNT(*) FROM t -- 注释\n WHERE a = 'x''y' AND b = 10 LIMIT %s")
+    assert fp == "SELECT COUNT(*) FROM t WHERE a = ? AND b = ? LIMIT ?", fp
+    print("✅ 字面量与注释")
+
+
+if __name__ == "__main__":
+    test_bulk_vote_statements()
+    test_vote_rollup_upsert()
+    test_vote_counter_flush()
+    test_events_batch()
+    test_subquery_not_collapsed()
+    test_literals_and_comments()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试搜索联想索引（SuggestIndex）
+随机新增事件、修改关注数，每一步都与不带缓存的完整扫描结果比较。不需要数据库:
+    python test/test_suggest_index.py
+"""
+
+import sys
+import os
+import random
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.suggest_index import SuggestIndex, TOP_K
+
+WORDS = ["北京", "北京暴雨", "北京地铁", "北极", "上海", "上海疫情", "a", "ab", "abc", "abd"]
+PREFIXES = ["北", "北京", "北京暴", "上", "a", "ab", "abc", "x"]
+
+
+def expected(events, prefix, limit):
+    """完整扫描：每个文本取关注数最高的事件，按关注数降序取前limit个关注数"""
+    best = {}
+    for event in events.values():
+        texts = [event["title"]] + event["keywords"].split(",")
+        for text in texts:
+            if text.lower().startswith(prefix):
+                best[text.lower()] = max(best.get(text.lower(), -1), event["interest_count"])
+    return sorted(best.values(), reverse=True)[:limit]
+
+
+def test_suggest_matches_full_scan():
+    rng = random.Random(20261017)
+    events = {}
+    for event_id in range(1, 400):
+        events[event_id] = {"id": event_id, "title": rng.choice(WORDS) + str(event_id % 7),
+                            "keywords": ",".join(rng.sample(WORDS, 2)), "interest_count": rng.randint(0, 50)}
+    index = SuggestIndex()
+    index.build(list(events.values())[:300])
+    indexed = dict(list(events.items())[:300])
+
+    for step in range(3000):
+        action = rng.random()
+        if action < 0.05 and len(indexed) < len(events):
+            event = events[len(indexed) + 1]
+            indexed[event["id"]] = event
+            index.add(event)
+        elif action < 0.6:
+            event = indexed[rng.choice(list(indexed))]
+            event["interest_count"] = max(0, event["interest_count"] + rng.randint(-10, 10))
+            index.set_score(event["id"], event["interest_count"])
+        prefix = rng.choice(PREFIXES)
+        limit = rng.choice([1, 5, TOP_K, TOP_K + 5])
+        got = [item["interest_count"] for item in index.suggest(prefix, limit)]
+        assert got == expected(indexed, prefix, limit), (step, prefix, limit)
+
+    stats = index.stats()
+    assert stats["cache_hits"] > 0
+    print(f"✅ 联想结果与完整扫描一致: {stats}")
+
+
+if __name__ == "__main__":
+    test_suggest_matches_full_scan()
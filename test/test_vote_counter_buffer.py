@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试投票计数写回缓冲（VoteCounterBuffer）
+不需要数据库，写回函数替换为记录增量:
+    python test/test_vote_counter_buffer.py
+"""
+
+import sys
+import os
+
+# 添加后端路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from datetime import datetime, timedelta
+
+import pymysql
+
+from app.services.read_cache import TTLCache
+from app.services.simple_db_service import SimpleDBService, is_outcome_unknown_error
+from app.services.vote_counter_buffer import VoteCounterBuffer
+from app.tasks.counter_reconciler import COUNTER_SPECS, CounterReconciler
+
+
+MINUTE = datetime(2026, 1, 1, 12, 0)
+
+
+def make_buffer(max_pending_votes=500, flush_func=None):
+    flushed = []
+    buffer = VoteCounterBuffer(flush_func or (lambda deltas, rollups: flushed.append((deltas, rollups))),
+                               flush_interval_ms=60000,
+                               max_pending_votes=max_pending_votes, is_outcome_unknown=is_outcome_unknown_error)
+    # 不启动后台线程，由测试显式写回
+    buffer._ensure_started = lambda: None
+    return buffer, flushed
+
+
+def test_pending_votes_counts_bulk_deltas():
+    """批量投票一次add多票，待写回票数按票数累计，达到max_pending_votes时唤醒写回"""
+    buffer, flushed = make_buffer(max_pending_votes=10)
+    buffer.add(1, 6, 3, MINUTE)
+    buffer.add(2, 1, 0, MINUTE)
+    assert buffer.stats()["pending_votes"] == 10
+    assert buffer._wakeup.is_set()
+    assert buffer.flush() == 10
+    assert flushed == [({1: [9, 6, 3], 2: [1, 1, 0]}, {(1, MINUTE): [6, 3], (2, MINUTE): [1, 0]})]
+    assert buffer.stats()["flushed_votes"] == 10
+    print("✅ 批量增量的待写回票数")
+
+
+def test_rollups_keep_vote_minute():
+    """投票趋势增量按投票所在分钟合并，跨分钟的投票不会都记到写回时的分钟"""
+    buffer, flushed = make_buffer()
+    later = MINUTE + timedelta(minutes=1)
+    buffer.add(1, 1, 0, MINUTE)
+    buffer.add(1, 0, 1, later)
+    buffer.add(1, 1, 0, later)
+    buffer.flush()
+    assert flushed == [({1: [3, 2, 1]}, {(1, MINUTE): [1, 0], (1, later): [1, 1]})]
+    print("✅ 投票趋势增量记到投票所在分钟")
+
+
+def test_failed_flush_is_retried():
+    """写回前连接已断开（语句未执行）时增量放回缓冲，下次重试"""
+    def fail(deltas, rollups):
+        raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    buffer, _ = make_buffer(flush_func=fail)
+    buffer.add(1, 1, 0, MINUTE)
+    assert buffer.flush() == 0
+    assert buffer.pending_event_ids() == {1}
+    assert buffer.stats()["pending_votes"] == 1
+    print("✅ 写回失败时保留增量")
+
+
+def test_unknown_outcome_drops_deltas():
+    """COMMIT的回复丢失时事务可能已提交，丢弃增量而不是重试，避免重复计入"""
+    def lost(deltas, rollups):
+        raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+
+    buffer, _ = make_buffer(flush_func=lost)
+    buffer.add(1, 1, 0, MINUTE)
+    buffer.add(1, 0, 1, MINUTE)
+    assert buffer.flush() == 0
+    assert buffer.pending_event_ids() == set()
+    assert buffer.stats()["dropped_votes"] == 2
+    print("✅ 写回结果未知时丢弃增量")
+
+
+def test_create_vote_uses_db_minute():
+    """写回模式下投票趋势的分钟取自数据库记录的created_at，而不是应用服务器的时钟"""
+    buffer, flushed = make_buffer()
+    db = SimpleDBService()
+    db.vote_buffer = buffer
+    executed = []
+    db_time = datetime(2020, 5, 1, 8, 30, 59)
+
+    def execute_transaction(statements):
+        executed.extend(sql for sql, _ in statements)
+        return [{"rowcount": 1, "lastrowid": 99, "rows": ()}, {"rowcount": 1, "lastrowid": 0, "rows": ()},
+                {"rowcount": 1, "lastrowid": 0, "rows": ((db_time,),)}]
+
+    db.execute_transaction = execute_transaction
+    assert db.create_vote(5, 1, "oppose") == 99
+    assert "LAST_INSERT_ID()" in executed[-1]
+    buffer.flush()
+    assert flushed == [({5: [1, 0, 1]}, {(5, datetime(2020, 5, 1, 8, 30)): [0, 1]})]
+    print("✅ 写回的投票趋势使用数据库的投票时间")
+
+
+class FakeReconcileDB:
+    """记录对账语句；events表只有ID 1-10，所有行都有偏差"""
+
+    def __init__(self, buffer):
+        self.vote_buffer = buffer
+        self.event_detail_cache = TTLCache("event_detail")
+        self.statements = []
+
+    def invalidate_event_cache(self, event_id=None):
+        pass
+
+    def _run_with_retry(self, sql, params=None, fetch=True):
+        if sql.startswith("SELECT MIN(id)"):
+            return [{"min_id": 1, "max_id": 10}]
+        if "task_runs" in sql:
+            return [{"finished_at": MINUTE}] if fetch else 1
+        assert sql.count("%s") == len(params), sql
+        self.statements.append((sql, params))
+        # 对账期间又有一票加入缓冲
+        self.vote_buffer.add(7, 1, 0, MINUTE)
+        return [{"id": 1, "drift": 1}] if fetch else 1
+
+
+def test_reconcile_skips_pending_events():
+    """投票计数对账期间暂停写回，跳过有未写回增量的事件和最近有投票的事件"""
+    buffer, flushed = make_buffer()
+    buffer.add(3, 1, 0, MINUTE)
+    db = FakeReconcileDB(buffer)
+    reconciler = CounterReconciler(db, batch_size=5, specs=[COUNTER_SPECS[0]])
+    reconciler.run_once()
+
+    # 对账开始前写回已有增量，对账中新增的增量留在缓冲里
+    assert flushed[0][0] == {3: [1, 1, 0]}
+    assert buffer.pending_event_ids() == {7}
+    sqls = [sql for sql, _ in db.statements if "events t" in sql]
+    assert len(sqls) == 4 and all("NOT EXISTS (SELECT 1 FROM votes v" in sql for sql in sqls)
+    # 第一段（1-5）对账时缓冲为空；第二段（6-10）跳过事件7
+    assert "NOT IN" not in db.statements[0][0]
+    assert "NOT IN (%s)" in db.statements[2][0] and db.statements[2][1][-1] == 7
+    print("✅ 对账跳过有未写回增量的事件")
+
+
+if __name__ == "__main__":
+    test_pending_votes_counts_bulk_deltas()
+    test_rollups_keep_vote_minute()
+    test_failed_flush_is_retried()
+    test_unknown_outcome_drops_deltas()
+    test_create_vote_uses_db_minute()
+    test_reconcile_skips_pending_events()